@@ -6,12 +6,113 @@ in real-time as users fill in the APA7 form. It takes form data and converts
 it to the appropriate Typst syntax for the versatile-apa package.
 """
 
+import copy
 import json
 import uuid
 from pathlib import Path
 from typing import Optional
 
-from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtCore import QObject, QThread, Signal, Slot
+
+from .compile_scheduler import CompileScheduler
+from .form_journal import FormJournal
+from .generation_worker import GenerationWorker
+from .typst_codegen import group_sections, render_main_typ, render_section_file
+
+# Form fields and their values for a document that has not been filled in yet.
+DEFAULT_FORM_DATA = {
+    "title": "",
+    "authors": [],
+    "affiliations": [],
+    "sections": [],
+    "running_head": "",
+    "author_notes": "",
+    "course": "",
+    "instructor": "",
+    "due_date": "",
+    "abstract": "",
+    "keywords": "",
+    "font_family": "Libertinus Serif",
+    "font_size": 12,
+    "paper_size": "us-letter",
+    "region": "us",
+    "language": "en",
+    "implicit_intro": False,
+    "abstract_as_desc": True,
+}
+
+# Render target for main.typ. Section files are targeted as ("section", id),
+# using the id of the level 1 section that owns the file.
+MAIN_TARGET = ("main",)
+
+
+def document_from(data: dict) -> dict:
+    """
+    Builds a complete document model from saved form data.
+
+    Args:
+        data: The form data, e.g., as loaded from form_data.json. Not modified.
+
+    Returns:
+        A copy of the data with defaults for every missing field and a label
+        for every image block.
+    """
+    document = copy.deepcopy(DEFAULT_FORM_DATA)
+    document.update(copy.deepcopy(data))
+    assign_missing_labels(document["sections"])
+    return document
+
+
+def assign_missing_labels(sections: list):
+    """
+    Gives a label to every image block that lacks one.
+
+    Done when sections enter the model, so rendering never has to modify a
+    snapshot.
+
+    Args:
+        sections: The list of section dictionaries, modified in place.
+    """
+    for section in sections:
+        for block in section.get("blocks", []):
+            if block.get("type", "text") == "image" and not block.get("label"):
+                block["label"] = f"img:{uuid.uuid4()}"
+
+
+def render_files(snapshot: dict) -> dict:
+    """
+    Renders the files of a generation from a form snapshot.
+
+    Only the render targets listed in the snapshot's "dirty" set are
+    rendered; a missing or None set renders every file. Only reads the
+    snapshot, so it is safe to call from the generation worker thread.
+
+    Args:
+        snapshot: Dictionary with the project path, the form data and the
+            optional set of dirty render targets.
+
+    Returns:
+        A dictionary with the Typst sources to write ("sources") and the
+        main.typ path ("main").
+    """
+    project_path = snapshot["project_path"]
+    form_data = snapshot["form_data"]
+    dirty = snapshot.get("dirty")
+    sections = form_data["sections"]
+    sections_dir = project_path / "sections"
+
+    sources = []
+
+    # Level 1 sections get their own file, subsections are appended to it
+    for l1_id, group in group_sections(sections):
+        if dirty is None or ("section", l1_id) in dirty:
+            sources.append((sections_dir / f"{l1_id}.typ", render_section_file(group)))
+
+    main_typ_path = project_path / "main.typ"
+    if dirty is None or MAIN_TARGET in dirty:
+        sources.append((main_typ_path, render_main_typ(form_data)))
+
+    return {"sources": sources, "main": main_typ_path}
 
 
 class Apa7FormHandler(QObject):
@@ -21,6 +122,16 @@ class Apa7FormHandler(QObject):
     This class takes form input data and generates the corresponding Typst code
     using the versatile-apa package format. It writes the main.typ file in
     real-time as the user updates form fields.
+
+    Generation runs on a dedicated worker thread: the GUI thread only takes a
+    snapshot of the form state and hands it over, so typing never blocks on
+    filesystem I/O.
+
+    The handler holds the authoritative document model. The form sends small
+    patches (one field, one block, one author) instead of the whole state, and
+    each patch only re-renders the files it affects. The model is updated
+    copy-on-write: containers along a patched path are replaced, never mutated,
+    so the current model can be handed to the worker as a snapshot as is.
     """
 
     # Signal emitted when the file is successfully generated/updated.
@@ -29,11 +140,41 @@ class Apa7FormHandler(QObject):
     # Signal emitted when file generation fails.
     fileGenerationFailed = Signal(str)  # Emits the error message
 
+    # Signal emitted after each generation with the write statistics.
+    filesWritten = Signal(int, int)  # Emits (files touched, files skipped)
+
+    # Signal emitted when the document's font family changes.
+    fontFamilyChanged = Signal(str)  # Emits the family name
+
     def __init__(self, parent=None):
         """Initializes the Apa7FormHandler."""
         super().__init__(parent)
         self.project_path: Optional[Path] = None
 
+        # The authoritative document model (see the class docstring).
+        self._document = copy.deepcopy(DEFAULT_FORM_DATA)
+
+        # The font family last reported through fontFamilyChanged.
+        self._font_family = self._document["font_family"]
+
+        # Write statistics of the most recent generation.
+        self.files_touched = 0
+        self.files_skipped = 0
+
+        # The worker renders and writes snapshots on its own thread. Its signals
+        # are delivered back to this object on the GUI thread.
+        self._thread = QThread()
+        self._worker = GenerationWorker(render_files)
+        self._worker.moveToThread(self._thread)
+        self._worker.fileGenerated.connect(self.fileGenerated)
+        self._worker.fileGenerationFailed.connect(self.fileGenerationFailed)
+        self._worker.filesWritten.connect(self._on_files_written)
+        self._thread.start()
+
+        # Paces the snapshots handed to the worker according to how long Typst
+        # takes to compile. Fed with compile events by the process manager.
+        self.compile_scheduler = CompileScheduler(self._worker.submit, parent=self)
+
     @Slot(str)
     def set_project_path(self, project_path: str):
         """
@@ -43,12 +184,28 @@ class Apa7FormHandler(QObject):
             project_path: The absolute path to the project directory.
         """
         self.project_path = Path(project_path)
+        self._document = copy.deepcopy(DEFAULT_FORM_DATA)
+        self._font_family = self._document["font_family"]
+
+    @Slot(result=dict)
+    def get_write_stats(self):
+        """
+        Gets the write statistics of the most recent generation.
+
+        Returns:
+            A dictionary with the number of files touched and skipped.
+        """
+        return {"touched": self.files_touched, "skipped": self.files_skipped}
 
     @Slot(result=dict)
     def load_form_data(self):
         """
         Loads form data from the project's form_data.json file.
 
+        Edits recorded in the form data journal since the last compaction are
+        replayed on top of the file. The font family of the loaded document
+        (or the default one) is reported once through fontFamilyChanged.
+
         Returns:
             A dictionary containing the saved form data, or an empty dict if
             the file doesn't exist or loading fails.
@@ -56,16 +213,199 @@ class Apa7FormHandler(QObject):
         if not self.project_path:
             return {}
 
+        data = {}
         json_path = self.project_path / "form_data.json"
-        if not json_path.exists():
-            return {}
+        if json_path.exists() or FormJournal.journal_path_for(json_path).exists():
+            try:
+                data = FormJournal.load(json_path)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Error loading form data: {e}")
+                data = {}
 
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (OSError, json.JSONDecodeError) as e:
-            print(f"Error loading form data: {e}")
-            return {}
+        # The loaded data becomes the authoritative model, with defaults for
+        # any field the file does not contain.
+        self._document = document_from(data)
+        self._font_family = self._document["font_family"]
+        self.fontFamilyChanged.emit(self._font_family)
+
+        return data
+
+    @Slot(result=str)
+    def get_font_family(self):
+        """
+        Gets the font family of the document.
+
+        The form shows this family until it loads saved form data, so the
+        form and the font set of the watch process agree on it.
+
+        Returns:
+            The font family name.
+        """
+        return self._document["font_family"]
+
+    @Slot(str, "QVariant")
+    def set_field(self, key: str, value):
+        """
+        Patches a top-level document field, such as the title or the abstract.
+
+        Only main.typ is regenerated.
+
+        Args:
+            key: The form data key (e.g., "title", "running_head", "font_size").
+            value: The new value of the field.
+        """
+        if key not in DEFAULT_FORM_DATA or key in ("authors", "affiliations", "sections"):
+            print(f"Warning: Cannot patch unknown field '{key}'.")
+            return
+        if self._document.get(key) == value:
+            return
+
+        document = dict(self._document)
+        document[key] = value
+        self._document = document
+        self._submit({MAIN_TARGET}, [key], value)
+
+    @Slot(str, str, "QVariant")
+    def set_section_field(self, section_id: str, key: str, value):
+        """
+        Patches one field of a section, such as its title or legacy content.
+
+        Only the file of the level 1 section that contains it is regenerated,
+        unless the patch changes the section's level.
+
+        Args:
+            section_id: The id of the section to patch.
+            key: The section key (e.g., "title", "content").
+            value: The new value of the field.
+        """
+        index, owner_id = self._find_section(section_id)
+        if index is None:
+            print(f"Warning: Cannot patch unknown section '{section_id}'.")
+            return
+
+        sections = list(self._document["sections"])
+        section = dict(sections[index])
+        if section.get(key) == value:
+            return
+        section[key] = value
+        sections[index] = section
+
+        document = dict(self._document)
+        document["sections"] = sections
+        self._document = document
+
+        # A new level changes which file the section belongs to.
+        dirty = None if key in ("id", "level") else {("section", owner_id)}
+        self._submit(dirty, ["sections", section_id, key], value)
+
+    @Slot(str, int, str, "QVariant")
+    def set_block_field(self, section_id: str, block_index: int, key: str, value):
+        """
+        Patches one field of a content block, such as its text or caption.
+
+        Only the file of the level 1 section that contains it is regenerated.
+
+        Args:
+            section_id: The id of the section containing the block.
+            block_index: The index of the block within the section.
+            key: The block key (e.g., "content", "caption", "note").
+            value: The new value of the field.
+        """
+        index, owner_id = self._find_section(section_id)
+        if index is None:
+            print(f"Warning: Cannot patch unknown section '{section_id}'.")
+            return
+
+        sections = list(self._document["sections"])
+        section = dict(sections[index])
+        blocks = list(section.get("blocks", []))
+        if not 0 <= block_index < len(blocks):
+            print(f"Warning: Cannot patch unknown block {block_index} of section '{section_id}'.")
+            return
+
+        block = dict(blocks[block_index])
+        if block.get(key) == value:
+            return
+        block[key] = value
+        blocks[block_index] = block
+        section["blocks"] = blocks
+        sections[index] = section
+
+        document = dict(self._document)
+        document["sections"] = sections
+        self._document = document
+        self._submit({("section", owner_id)}, ["sections", section_id, "blocks", block_index, key], value)
+
+    @Slot(int, str, "QVariant")
+    def set_author_field(self, index: int, key: str, value):
+        """
+        Patches one field of an author, such as the name or ORCID iD.
+
+        Only main.typ is regenerated.
+
+        Args:
+            index: The index of the author.
+            key: The author key (e.g., "name", "orcid", "affiliationIds").
+            value: The new value of the field.
+        """
+        self._set_list_item_field("authors", index, key, value)
+
+    @Slot(int, str, "QVariant")
+    def set_affiliation_field(self, index: int, key: str, value):
+        """
+        Patches one field of an affiliation.
+
+        Only main.typ is regenerated.
+
+        Args:
+            index: The index of the affiliation.
+            key: The affiliation key (e.g., "name").
+            value: The new value of the field.
+        """
+        self._set_list_item_field("affiliations", index, key, value)
+
+    @Slot(list)
+    def set_sections(self, sections: list):
+        """
+        Replaces the whole section list after a structural change.
+
+        Used when sections or blocks are added, removed or reordered. All
+        section files and main.typ are regenerated.
+
+        Args:
+            sections: The new list of section dictionaries.
+        """
+        assign_missing_labels(sections)
+        document = dict(self._document)
+        document["sections"] = sections
+        self._document = document
+        self._submit(None, ["sections"], sections)
+
+    @Slot(list)
+    def set_authors(self, authors: list):
+        """
+        Replaces the whole author list after a structural change.
+
+        Args:
+            authors: The new list of author dictionaries.
+        """
+        document = dict(self._document)
+        document["authors"] = authors
+        self._document = document
+        self._submit({MAIN_TARGET}, ["authors"], authors)
+
+    @Slot(list)
+    def set_affiliations(self, affiliations: list):
+        """
+        Replaces the whole affiliation list after a structural change.
+
+        Args:
+            affiliations: The new list of affiliation dictionaries.
+        """
+        document = dict(self._document)
+        document["affiliations"] = affiliations
+        self._document = document
+        self._submit({MAIN_TARGET}, ["affiliations"], affiliations)
 
     @Slot(str, list, list, list, str, str, str, str, str, str, str, str, int, str, str, str, bool, bool)
     def generate_main_typ(
@@ -117,394 +457,129 @@ class Apa7FormHandler(QObject):
             self.fileGenerationFailed.emit(error_msg)
             return
 
-        try:
-            # Create sections directory
-            sections_dir = self.project_path / "sections"
-            sections_dir.mkdir(exist_ok=True)
-
-            # Write section files (Level 1 sections get their own file, subsections are appended)
-            current_l1_id = None
-            current_l1_content = []
-
-            for section in sections:
-                sec_id = section.get("id")
-                sec_title = section.get("title", "")
-                
-                # Determine content from blocks (text/image) or fallback to simple content
-                blocks = section.get("blocks", [])
-                if blocks:
-                    parts = []
-                    for block in blocks:
-                        b_type = block.get("type", "text")
-                        if b_type == "text":
-                            parts.append(block.get("content", ""))
-                        elif b_type == "image":
-                            path = block.get("path", "").replace("\\", "/")
-                            caption = block.get("caption", "")
-                            note = block.get("note", "")
-                            
-                            label = block.get("label", "")
-                            if not label:
-                                label = f"img:{uuid.uuid4()}"
-                                block["label"] = label
-
-                            fig_code = "#figure(\n"
-                            fig_code += f'  image("../{path}"),\n'
-                            if caption:
-                                fig_code += f"  caption: [{self._escape_typst(caption)}],\n"
-                            fig_code += ")"
-                            if label:
-                                fig_code += f" <{label}>"
-                            
-                            if note:
-                                fig_code += "\n#pad(top: 0.5em)[\n"
-                                fig_code += f'  #text(style: "italic")[Note.] {self._escape_typst(note)}\n'
-                                fig_code += "]"
-                            
-                            parts.append(fig_code)
-                    sec_content = "\n\n".join(parts)
-                else:
-                    sec_content = section.get("content", "")
-
-                level = int(section.get("level", 1))
-
-                heading_markup = f"{'=' * level} {self._escape_typst(sec_title)}"
-                full_content = f"{heading_markup}\n\n{sec_content}"
-
-                if level == 1:
-                    # Write previous accumulated L1 section if exists
-                    if current_l1_id:
-                        file_content = '#import "@preview/versatile-apa:7.1.5": *\n\n' + "\n\n".join(current_l1_content)
-                        (sections_dir / f"{current_l1_id}.typ").write_text(file_content, encoding="utf-8")
-                    
-                    current_l1_id = sec_id
-                    current_l1_content = [full_content]
-                else:
-                    # Append subsection to current L1 section
-                    if current_l1_id:
-                        current_l1_content.append(full_content)
-
-            # Write the final section
-            if current_l1_id:
-                file_content = '#import "@preview/versatile-apa:7.1.5": *\n\n' + "\n\n".join(current_l1_content)
-                (sections_dir / f"{current_l1_id}.typ").write_text(file_content, encoding="utf-8")
-
-            content = self._build_main_typ_content(
-                title,
-                authors,
-                affiliations,
-                sections,
-                running_head,
-                author_notes,
-                course,
-                instructor,
-                due_date,
-                abstract,
-                keywords,
-                font_family,
-                font_size,
-                paper_size,
-                region,
-                language,
-                implicit_intro,
-                abstract_as_desc,
-            )
-
-            main_typ_path = self.project_path / "main.typ"
-            main_typ_path.write_text(content, encoding="utf-8")
-
-            # Save form data to JSON for persistence
-            form_data = {
-                "title": title,
-                "authors": authors,
-                "affiliations": affiliations,
-                "sections": sections,
-                "running_head": running_head,
-                "author_notes": author_notes,
-                "course": course,
-                "instructor": instructor,
-                "due_date": due_date,
-                "abstract": abstract,
-                "keywords": keywords,
-                "font_family": font_family,
-                "font_size": font_size,
-                "paper_size": paper_size,
-                "region": region,
-                "language": language,
-                "implicit_intro": implicit_intro,
-                "abstract_as_desc": abstract_as_desc,
-            }
-
-            json_path = self.project_path / "form_data.json"
-            try:
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(form_data, f, indent=2, ensure_ascii=False)
-            except OSError as e:
-                print(f"Warning: Failed to save form data: {e}")
-
-            self.fileGenerated.emit(str(main_typ_path))
+        # Copies the form state so the model never shares containers with the
+        # caller.
+        form_data = copy.deepcopy({
+            "title": title,
+            "authors": authors,
+            "affiliations": affiliations,
+            "sections": sections,
+            "running_head": running_head,
+            "author_notes": author_notes,
+            "course": course,
+            "instructor": instructor,
+            "due_date": due_date,
+            "abstract": abstract,
+            "keywords": keywords,
+            "font_family": font_family,
+            "font_size": font_size,
+            "paper_size": paper_size,
+            "region": region,
+            "language": language,
+            "implicit_intro": implicit_intro,
+            "abstract_as_desc": abstract_as_desc,
+        })
+
+        assign_missing_labels(form_data["sections"])
+        self._document = form_data
+        self._submit(None)
+
+    @Slot()
+    def shutdown(self):
+        """
+        Stops the generation thread.
 
-        except OSError as e:
-            error_msg = f"Failed to write main.typ: {e}"
-            print(f"Error: {error_msg}")
-            self.fileGenerationFailed.emit(error_msg)
+        Any snapshot still held by the scheduler or pending when the thread
+        stops is generated on the calling thread, so the last edit is never
+        lost on exit.
+        """
+        self.compile_scheduler.flush()
+        self._thread.quit()
+        self._thread.wait()
+        self._worker.process_pending()
+        self._worker.close_journals()
 
-    def _build_main_typ_content(
-        self,
-        title: str,
-        authors: list,
-        affiliations: list,
-        sections: list,
-        running_head: str,
-        author_notes: str,
-        course: str,
-        instructor: str,
-        due_date: str,
-        abstract: str,
-        keywords: str,
-        font_family: str,
-        font_size: int,
-        paper_size: str,
-        region: str,
-        language: str,
-        implicit_intro: bool,
-        abstract_as_desc: bool,
-    ) -> str:
+    def _submit(self, dirty: Optional[set], path: Optional[list] = None, value=None):
         """
-        Builds the complete main.typ file content.
+        Hands the current model to the compile scheduler for generation.
 
         Args:
-            Same as generate_main_typ
+            dirty: The set of render targets affected by the change (MAIN_TARGET
+                and/or ("section", id) tuples), or None to regenerate everything.
+            path: The path of the changed value in the form data, recorded in the
+                form data journal. None saves the full form data instead.
+            value: The new value stored at path.
+        """
+        if not self.project_path:
+            error_msg = "Project path not set. Cannot generate main.typ."
+            print(f"Error: {error_msg}")
+            self.fileGenerationFailed.emit(error_msg)
+            return
 
-        Returns:
-            The complete main.typ file content as a string.
-        """
-        lines = []
-
-        # Import statement
-        lines.append('#import "@preview/versatile-apa:7.1.5": *')
-        lines.append("")
-
-
-
-        # Document title
-        lines.append("// Document titles should be formatted in title case")
-        lines.append(f"#let doc-title = [{self._escape_typst(title)}]")
-        lines.append("")
-
-        # versatile-apa setup
-        lines.append("#show: versatile-apa.with(")
-        lines.append("  title: doc-title,")
-        lines.append("")
-
-        # Authors and affiliations
-        if authors and affiliations:
-            lines.extend(self._build_authors_section(authors, affiliations))
-
-        # Student-specific fields
-        if course or instructor or due_date:
-            lines.append("  // Student-specific fields")
-            if course:
-                lines.append(f"  course: [{self._escape_typst(course)}],")
-            if instructor:
-                lines.append(f"  instructor: [{self._escape_typst(instructor)}],")
-            if due_date:
-                lines.append(f"  due-date: [{self._escape_typst(due_date)}],")
-            else:
-                lines.append("  due-date: datetime.today().display(),")
-            lines.append("")
-
-        # Professional-specific fields
-        if running_head or author_notes:
-            lines.append("  // Professional-specific fields")
-            if running_head:
-                lines.append(f"  running-head: [{self._escape_typst(running_head)}],")
-            if author_notes:
-                lines.extend(self._build_author_notes_section(author_notes, authors))
-            lines.append("")
-
-        # Abstract and keywords
-        if abstract or keywords:
-            if abstract:
-                lines.append(f"  abstract: [{self._escape_typst(abstract)}],")
-            if keywords:
-                keywords_list = self._build_keywords_list(keywords)
-                lines.append(f"  keywords: {keywords_list},")
-            lines.append("")
-
-        # Common fields (formatting options)
-        lines.append("  // Common fields")
-        lines.append(f'  font-family: "{font_family}",')
-        lines.append(f"  font-size: {font_size}pt,")
-        lines.append(f'  region: "{region}",')
-        lines.append(f'  language: "{language}",')
-        lines.append(f'  paper-size: "{paper_size}",')
-        lines.append("  implicit-introduction-heading: false,")
-        lines.append(f"  abstract-as-description: {str(abstract_as_desc).lower()},")
-        lines.append(")")
-        lines.append("")
-
-        # Outlines section
-        lines.append("// Document outlines")
-        lines.append("#outline()")
-        lines.append("#pagebreak()")
-        lines.append('#outline(target: figure.where(kind: table), title: [Tables])')
-        lines.append("#pagebreak()")
-        lines.append('#outline(target: figure.where(kind: image), title: [Figures])')
-        lines.append("#pagebreak()")
-        lines.append('#outline(target: figure.where(kind: math.equation), title: [Equations])')
-        lines.append("#pagebreak()")
-        lines.append('#outline(target: figure.where(kind: raw), title: [Listings])')
-        lines.append("#pagebreak()")
-        lines.append("")
-
-        # Document content
-        lines.append("// Main document content")
-        
-        # Include sections
-        for section in sections:
-            sec_id = section.get("id")
-            level = int(section.get("level", 1))
-            if sec_id and level == 1:
-                lines.append(f'#include "sections/{sec_id}.typ"')
-        lines.append("")
-
-        # Bibliography
-        lines.append("#pagebreak()")
-        lines.append("#bibliography(")
-        lines.append('  "bibliography/ref.bib",')
-        lines.append('  style: "csl/apa.csl",')
-        lines.append("  full: true,")
-        lines.append("  title: auto,")
-        lines.append(")")
-
-        return "\n".join(lines)
-
-    def _build_authors_section(self, authors: list, affiliations: list) -> list:
-        """
-        Builds the authors and affiliations section.
+        self.compile_scheduler.submit({
+            "project_path": self.project_path,
+            "form_data": self._document,
+            "dirty": dirty,
+            "ops": None if path is None else [{"path": path, "value": value}],
+        })
 
-        Args:
-            authors: List of author dictionaries
-            affiliations: List of affiliation dictionaries
+        font_family = self._document.get("font_family", "")
+        if font_family != self._font_family:
+            self._font_family = font_family
+            self.fontFamilyChanged.emit(font_family)
 
-        Returns:
-            List of lines for the authors section
-        """
-        lines = []
-        lines.append("  // Authors and affiliations")
-        lines.append("  authors: (")
-
-        for author in authors:
-            name = author.get("name", "")
-            affiliation_ids = author.get("affiliationIds", [])
-
-            # Skips authors without a name or without any affiliations
-            # (APA template requires at least one affiliation per author)
-            if name and affiliation_ids:
-                lines.append("    (")
-                lines.append(f"      name: [{self._escape_typst(name)}],")
-
-                # Maps affiliation IDs to AF-N format
-                af_ids = []
-                for aff_id in affiliation_ids:
-                    # Finds the index of this affiliation in the list
-                    for idx, aff in enumerate(affiliations):
-                        if aff.get("id") == aff_id:
-                            af_ids.append(f'"AF-{idx + 1}"')
-                            break
-                if af_ids:
-                    lines.append(f"      affiliations: ({', '.join(af_ids)}),")
-
-                lines.append("    ),")
-
-        lines.append("  ),")
-
-        lines.append("  affiliations: (")
-        for idx, affiliation in enumerate(affiliations):
-            name = affiliation.get("name", "")
-            if name:
-                lines.append("    (")
-                lines.append(f'      id: "AF-{idx + 1}",')
-                lines.append(f"      name: [{self._escape_typst(name)}],")
-                lines.append("    ),")
-        lines.append("  ),")
-        lines.append("")
-
-        return lines
-
-    def _build_author_notes_section(self, author_notes: str, authors: list) -> list:
-        """
-        Builds the author notes section with ORCID iDs.
+    def _set_list_item_field(self, list_key: str, index: int, key: str, value):
+        """
+        Patches one field of an item of a top-level list (authors, affiliations).
 
         Args:
-            author_notes: The author notes text
-            authors: List of author dictionaries (may contain ORCID iDs)
-
-        Returns:
-            List of lines for the author notes section
+            list_key: The form data key of the list.
+            index: The index of the item.
+            key: The item key to set.
+            value: The new value of the field.
         """
-        lines = []
-        lines.append("  author-notes: [")
-
-        # Adds ORCID iDs for authors who have them
-        for author in authors:
-            name = author.get("name", "")
-            orcid = author.get("orcid", "")
-            if name and orcid:
-                lines.append(f"    #include-orcid([{self._escape_typst(name)}], \"{orcid}\")")
-                lines.append("")
-
-        # Adds the author notes text
-        if author_notes:
-            lines.append(f"    {self._escape_typst(author_notes)}")
+        items = list(self._document[list_key])
+        if not 0 <= index < len(items):
+            print(f"Warning: Cannot patch unknown {list_key} entry {index}.")
+            return
 
-        lines.append("  ],")
+        item = dict(items[index])
+        if item.get(key) == value:
+            return
+        item[key] = value
+        items[index] = item
 
-        return lines
+        document = dict(self._document)
+        document[list_key] = items
+        self._document = document
+        self._submit({MAIN_TARGET}, [list_key, index, key], value)
 
-    def _build_keywords_list(self, keywords: str) -> str:
+    def _find_section(self, section_id: str) -> tuple:
         """
-        Converts comma-separated keywords string to Typst array format.
+        Finds a section and the level 1 section whose file contains it.
 
         Args:
-            keywords: Comma-separated keywords string
+            section_id: The id of the section.
 
         Returns:
-            Typst array format string (e.g., ("keyword1", "keyword2"))
+            A tuple (index, owner id), or (None, None) if the section is unknown.
         """
-        if not keywords:
-            return "()"
-
-        # Splits by comma and strips whitespace
-        keyword_list = [kw.strip() for kw in keywords.split(",") if kw.strip()]
-
-        if not keyword_list:
-            return "()"
-
-        # Formats as Typst array
-        formatted_keywords = ", ".join(f'"{self._escape_typst(kw)}"' for kw in keyword_list)
-        return f"({formatted_keywords})"
-
-    def _escape_typst(self, text: str) -> str:
+        owner_id = None
+        for index, section in enumerate(self._document["sections"]):
+            if int(section.get("level", 1)) == 1:
+                owner_id = section.get("id")
+            if section.get("id") == section_id:
+                return index, owner_id
+        return None, None
+
+    def _on_files_written(self, touched: int, skipped: int):
         """
-        Escapes special characters for Typst markup.
+        Records the write statistics reported by the worker.
 
         Args:
-            text: The text to escape
-
-        Returns:
-            The escaped text safe for use in Typst
+            touched: Number of files written by the last generation.
+            skipped: Number of files skipped because they were unchanged.
         """
-        if not text:
-            return ""
-
-        # Escapes characters that have special meaning in Typst
-        # Note: This is a basic implementation. May need to be expanded.
-        text = text.replace("\\", "\\\\")  # Backslash must be first
-        text = text.replace("[", "\\[")
-        text = text.replace("]", "\\]")
-        text = text.replace("#", "\\#")
-        text = text.replace("$", "\\$")
-
-        return text
\ No newline at end of file
+        self.files_touched = touched
+        self.files_skipped = skipped
+        self.filesWritten.emit(touched, skipped)
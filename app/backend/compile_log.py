@@ -0,0 +1,125 @@
+"""
+Keeps a bounded log of the Typst watch process output.
+
+A watch session can stay open for a whole workday and print a report on
+every compile. The CompileLog keeps only the most recent lines, limited both
+by count and by size, so its memory use stays flat however long the process
+runs. Every record gets a sequence number that keeps increasing as old
+records are dropped, so a reader can ask for everything after the last
+record it has seen.
+"""
+
+import itertools
+import time
+from collections import deque
+
+
+class CompileLog:
+    """
+    A ring buffer of log records, bounded by record count and total size.
+
+    Each record is a dictionary with its sequence number ("seq"), the time it
+    was added ("time", seconds since the epoch), the stream it came from
+    ("stream", "stdout" or "stderr") and its text ("text").
+    """
+
+    def __init__(self, max_records: int = 5000, max_bytes: int = 1024 * 1024, max_line_length: int = 4096):
+        """
+        Initializes the CompileLog.
+
+        Args:
+            max_records: Number of records kept at most.
+            max_bytes: Total UTF-8 size of the kept texts at most.
+            max_line_length: Texts longer than this are truncated.
+        """
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_line_length = max_line_length
+
+        self._records = deque()
+        self._bytes = 0
+        self._next_seq = 1
+
+    def append(self, stream: str, text: str) -> dict:
+        """
+        Adds a record, dropping the oldest ones if the log is full.
+
+        Args:
+            stream: The stream the text came from.
+            text: One line of output.
+
+        Returns:
+            The new record.
+        """
+        if len(text) > self.max_line_length:
+            text = text[:self.max_line_length] + "…"
+
+        record = {"seq": self._next_seq, "time": time.time(), "stream": stream, "text": text}
+        self._next_seq += 1
+        self._records.append(record)
+        self._bytes += self._size(record)
+
+        while len(self._records) > self.max_records or (self._bytes > self.max_bytes and len(self._records) > 1):
+            self._bytes -= self._size(self._records.popleft())
+
+        return record
+
+    def clear(self):
+        """Removes every record. Sequence numbers keep increasing."""
+        self._records.clear()
+        self._bytes = 0
+
+    def get_range(self, start: int, count: int) -> list:
+        """
+        Gets records by position among the records still kept.
+
+        Args:
+            start: Position of the first record (0 is the oldest kept record).
+            count: Number of records to return at most.
+
+        Returns:
+            The list of records.
+        """
+        start = max(0, start)
+        count = max(0, count)
+        return list(itertools.islice(self._records, start, start + count))
+
+    def get_since(self, seq: int, limit: int = 0) -> list:
+        """
+        Gets the records added after a sequence number.
+
+        If records after seq were already dropped, the result starts with the
+        oldest record still kept; the gap shows in the sequence numbers.
+
+        Args:
+            seq: The last sequence number the caller has seen (0 for none).
+            limit: Number of records to return at most (0 for no limit).
+
+        Returns:
+            The list of records, oldest first.
+        """
+        if not self._records:
+            return []
+        start = max(0, seq + 1 - self._records[0]["seq"])
+        stop = None if limit <= 0 else start + limit
+        return list(itertools.islice(self._records, start, stop))
+
+    def bounds(self) -> dict:
+        """
+        Describes the records currently kept.
+
+        Returns:
+            A dictionary with the first and last sequence numbers (0 when the
+            log is empty), the record count and the total text size in bytes.
+        """
+        return {
+            "first": self._records[0]["seq"] if self._records else 0,
+            "last": self._next_seq - 1 if self._records else 0,
+            "count": len(self._records),
+            "bytes": self._bytes,
+        }
+
+    @staticmethod
+    def _size(record: dict) -> int:
+        """Returns the size a record counts toward max_bytes."""
+        return len(record["text"].encode("utf-8"))
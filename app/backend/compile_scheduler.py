@@ -0,0 +1,186 @@
+"""
+Paces document generation according to how long Typst takes to compile.
+
+Every generation that changes a source makes Typst watch recompile the
+document. When compiles take longer than the pause between two keystrokes,
+writing every edit queues compiles behind each other and the preview falls
+further and further behind. The CompileScheduler sits between the form
+handler and the generation worker: it holds back snapshots for a quiet
+period derived from the measured compile durations, and while a compile is
+running it only keeps the latest snapshot, releasing it once the compile
+finishes. Small documents compile in a few milliseconds, so their quiet
+period is close to zero and edits still appear instantly.
+"""
+
+import statistics
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from .generation_worker import merge_snapshots
+
+
+class CompileScheduler(QObject):
+    """
+    Decides when form snapshots are handed to the generation worker.
+
+    Snapshots submitted within the quiet period of each other are merged and
+    released together. The quiet period is a fraction of the median of the
+    recent compile durations, clamped to a configurable range. A snapshot is
+    never held longer than max_hold, so the preview keeps updating during
+    continuous typing even if compiles never finish in between.
+    """
+
+    # Signal emitted when the quiet period changes.
+    quietPeriodChanged = Signal(int)  # Emits the quiet period in milliseconds
+
+    def __init__(self, release: Callable[[dict], None], min_quiet: int = 0, max_quiet: int = 1000,
+                 quiet_factor: float = 0.5, max_hold: int = 3000, history: int = 8, parent=None):
+        """
+        Initializes the CompileScheduler.
+
+        Args:
+            release: Callable receiving the snapshots to generate.
+            min_quiet: Shortest quiet period in milliseconds.
+            max_quiet: Longest quiet period in milliseconds.
+            quiet_factor: Quiet period as a fraction of the typical compile time.
+            max_hold: Longest time in milliseconds a snapshot is held back.
+            history: Number of recent compile durations taken into account.
+            parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self._release = release
+        self.min_quiet = min_quiet
+        self.max_quiet = max_quiet
+        self.quiet_factor = quiet_factor
+        self.max_hold = max_hold
+
+        self._durations = deque(maxlen=history)
+        self._quiet_period = min_quiet
+
+        # The snapshot waiting to be released and when it was first held.
+        self._pending: Optional[dict] = None
+        self._held_since = 0.0
+
+        # Whether Typst is compiling, as reported by the process manager, and
+        # whether the waiting snapshot is only held until that compile ends.
+        self._compiling = False
+        self._awaiting_compile = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def submit(self, snapshot: dict):
+        """
+        Queues a snapshot, merging it with the one already waiting.
+
+        Args:
+            snapshot: The form snapshot (see GenerationWorker.submit).
+        """
+        if self._pending is not None and self._pending["project_path"] != snapshot["project_path"]:
+            # Snapshots of different projects cannot be merged.
+            self.flush()
+
+        if self._pending is None:
+            self._pending = snapshot
+            self._held_since = time.monotonic()
+        else:
+            self._pending = merge_snapshots(self._pending, snapshot)
+
+        # A new edit starts a new quiet period.
+        self._awaiting_compile = False
+
+        if self._quiet_period <= 0 and not self._compiling:
+            self.flush()
+            return
+
+        self._timer.start(self._remaining(self._quiet_period))
+
+    @Slot()
+    def flush(self):
+        """Releases the waiting snapshot immediately, if there is one."""
+        self._timer.stop()
+        self._awaiting_compile = False
+        snapshot = self._pending
+        self._pending = None
+        if snapshot is not None:
+            self._release(snapshot)
+
+    @Slot()
+    def on_compile_started(self):
+        """Records that Typst started compiling."""
+        self._compiling = True
+
+    @Slot(bool, float)
+    def on_compile_finished(self, success: bool, duration_ms: float):
+        """
+        Records a finished compile and releases the waiting snapshot if due.
+
+        Args:
+            success: Whether the compile succeeded.
+            duration_ms: How long the compile took, in milliseconds.
+        """
+        self._compiling = False
+        if duration_ms > 0:
+            self._durations.append(duration_ms)
+            self._update_quiet_period()
+
+        # A snapshot whose quiet period ran out during the compile was waiting
+        # for it to finish.
+        if self._awaiting_compile:
+            self.flush()
+
+    @Slot()
+    def reset(self):
+        """Forgets the compile state, e.g., when the Typst process stops."""
+        self._compiling = False
+        if self._awaiting_compile:
+            self.flush()
+
+    @Slot(result=int)
+    def get_quiet_period(self):
+        """
+        Gets the current quiet period.
+
+        Returns:
+            The quiet period in milliseconds.
+        """
+        return self._quiet_period
+
+    def _on_timeout(self):
+        """Releases the waiting snapshot unless a compile is still running."""
+        if self._pending is None:
+            return
+        if self._compiling:
+            remaining = self._remaining(self.max_hold)
+            if remaining > 0:
+                # Waits for on_compile_finished, but never past max_hold.
+                self._awaiting_compile = True
+                self._timer.start(remaining)
+                return
+        self.flush()
+
+    def _remaining(self, delay: int) -> int:
+        """
+        Caps a delay so the waiting snapshot is not held past max_hold.
+
+        Args:
+            delay: The requested delay in milliseconds.
+
+        Returns:
+            The delay to use, in milliseconds.
+        """
+        held = (time.monotonic() - self._held_since) * 1000
+        return max(0, min(delay, int(self.max_hold - held)))
+
+    def _update_quiet_period(self):
+        """Derives the quiet period from the recent compile durations."""
+        typical = statistics.median(self._durations)
+        quiet = int(typical * self.quiet_factor)
+        quiet = max(self.min_quiet, min(self.max_quiet, quiet))
+        if quiet != self._quiet_period:
+            self._quiet_period = quiet
+            self.quietPeriodChanged.emit(quiet)
@@ -0,0 +1,155 @@
+"""
+Tracks the compile state of the Typst watch process.
+
+Typst watch reports the start and the outcome of every compile on stderr.
+CompileStatus turns these reports into an explicit state machine:
+
+    idle ──► compiling ──► succeeded
+                 ▲    └──► failed
+                 └───────────┘ (next compile)
+
+It also keeps the durations of the recent compiles of each project, so the
+typical compile latency (p50, p95 and max) can be shown and the UI can tell
+a preview that is being updated from one that is current.
+"""
+
+import math
+from collections import deque
+from typing import Optional
+
+IDLE = "idle"
+COMPILING = "compiling"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """
+    Returns a percentile of sorted values using the nearest-rank method.
+
+    Args:
+        sorted_values: The values, sorted in ascending order.
+        fraction: The percentile as a fraction (e.g., 0.95).
+
+    Returns:
+        The percentile, or 0.0 if there are no values.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class CompileStatus:
+    """
+    State machine and rolling duration history of the watch process' compiles.
+
+    start() and finish() return whether the state changed, so the owner only
+    notifies the UI about real transitions.
+    """
+
+    def __init__(self, history: int = 100):
+        """
+        Initializes the CompileStatus.
+
+        Args:
+            history: Number of recent compile durations kept per project.
+        """
+        self.history = history
+        self.state = IDLE
+        self.project_path: Optional[str] = None
+
+        # Duration of the latest finished compile in milliseconds.
+        self.last_duration = 0.0
+
+        # Recent compile durations of each project, and the number of failed
+        # compiles among them.
+        self._durations: dict[str, deque] = {}
+        self._failures: dict[str, int] = {}
+
+        # The (state, last duration) of the projects switched away from.
+        self._states: dict[str, tuple] = {}
+
+    def set_project(self, project_path: Optional[str]):
+        """
+        Switches to another project.
+
+        The state and history of the previous project are kept, so switching
+        back to a project whose watch process kept running restores them.
+
+        Args:
+            project_path: The project whose compiles are reported from now on.
+        """
+        self._states[self.project_path or ""] = (self.state, self.last_duration)
+        self.project_path = project_path
+        self.state, self.last_duration = self._states.get(project_path or "", (IDLE, 0.0))
+
+    def start(self) -> bool:
+        """
+        Records that a compile started.
+
+        Returns:
+            True if the state changed.
+        """
+        if self.state == COMPILING:
+            return False
+        self.state = COMPILING
+        return True
+
+    def finish(self, success: bool, duration_ms: float) -> bool:
+        """
+        Records the outcome of a compile.
+
+        Args:
+            success: Whether the compile succeeded.
+            duration_ms: How long the compile took, in milliseconds.
+
+        Returns:
+            True if the state changed.
+        """
+        previous = self.state
+        self.state = SUCCEEDED if success else FAILED
+        self.last_duration = duration_ms
+
+        key = self.project_path or ""
+        durations = self._durations.get(key)
+        if durations is None:
+            durations = self._durations[key] = deque(maxlen=self.history)
+        durations.append(duration_ms)
+        if not success:
+            self._failures[key] = self._failures.get(key, 0) + 1
+
+        return self.state != previous
+
+    def reset(self) -> bool:
+        """
+        Returns to the idle state, e.g., when the watch process stops.
+
+        Returns:
+            True if the state changed.
+        """
+        previous = self.state
+        self.state = IDLE
+        return self.state != previous
+
+    def stats(self) -> dict:
+        """
+        Summarizes the compiles of the current project.
+
+        Returns:
+            A dictionary with the state, the number of compiles in the history
+            ("count"), the failed compiles ever recorded ("failures"), and the
+            latest, median, 95th percentile and maximum durations in
+            milliseconds ("last", "p50", "p95", "max").
+        """
+        key = self.project_path or ""
+        durations = sorted(self._durations.get(key, ()))
+        return {
+            "state": self.state,
+            "count": len(durations),
+            "failures": self._failures.get(key, 0),
+            "last": self.last_duration,
+            "p50": percentile(durations, 0.5),
+            "p95": percentile(durations, 0.95),
+            "max": durations[-1] if durations else 0.0,
+        }
@@ -0,0 +1,189 @@
+"""
+Caches export artifacts by a digest of every compile input.
+
+Exporting a project that has not changed since its last export does not
+need another compile. The ExportCache computes a digest of everything a
+compile reads: main.typ, the section files, the bibliography, the assets,
+the CSL style, the font folders and the Typst executable itself (standing in
+for its version), along with the font arguments Typst is started with. Each
+export folder records the digest of the inputs its artifact was compiled
+from, so an export whose digest matches is served without running Typst.
+
+File contents are hashed once and remembered by (size, modification time),
+so computing the digest of a project only hashes the files that changed.
+System fonts are not part of the digest.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+# Project files and folders read by a compile.
+INPUT_ENTRIES = ("main.typ", "sections", "bibliography", "assets", "csl")
+
+# File in an export folder holding the input digest of its artifact.
+MANIFEST_NAME = ".input-digest"
+
+
+class ExportCache:
+    """
+    Computes input digests and validates cached export artifacts.
+
+    Thread-safe, so digests can be computed off the GUI thread.
+    """
+
+    def __init__(self, executable_resolver: Callable[[], Optional[str]],
+                 font_dirs: Optional[Callable[[Path], list]] = None):
+        """
+        Initializes the ExportCache.
+
+        Args:
+            executable_resolver: Callable returning the Typst executable path.
+            font_dirs: Optional callable returning the font folders a project
+                is compiled with.
+        """
+        self._resolve_executable = executable_resolver
+        self._font_dirs = font_dirs
+
+        # Maps each file path to (size, mtime_ns, content digest).
+        self._lock = threading.Lock()
+        self._file_digests: dict[str, tuple] = {}
+
+    def input_digest(self, project: Path, extra: str = "") -> Optional[str]:
+        """
+        Computes the digest of every input of a project's compile.
+
+        Args:
+            project: The project directory.
+            extra: Other settings the artifact depends on (e.g., arguments).
+
+        Returns:
+            A hex digest, or None if the project has no main.typ.
+        """
+        project = Path(project)
+        if not (project / "main.typ").is_file():
+            return None
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self._executable_fingerprint().encode("utf-8"))
+        digest.update(f"\0{extra}\0".encode("utf-8"))
+
+        roots = [(entry, project / entry) for entry in INPUT_ENTRIES]
+        if self._font_dirs:
+            roots += [(f"<font-dir:{index}>", Path(path)) for index, path in enumerate(self._font_dirs(project))]
+
+        for label, root in roots:
+            for relative, path in self._list_files(root):
+                content_digest = self._file_digest(path)
+                if content_digest is None:
+                    continue
+                digest.update(f"{label}/{relative}\0".encode("utf-8"))
+                digest.update(content_digest)
+
+        return digest.hexdigest()
+
+    def lookup(self, output_dir: Path, digest: str, export_format: str) -> Optional[list]:
+        """
+        Gets the artifact of an export folder if it was compiled from the inputs.
+
+        Args:
+            output_dir: The export folder.
+            digest: The current input digest.
+            export_format: The file extension of the artifact.
+
+        Returns:
+            The artifact files in page order, or None on a miss.
+        """
+        try:
+            recorded = (output_dir / MANIFEST_NAME).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        if recorded != digest:
+            return None
+
+        artifacts = sorted(output_dir.glob(f"*.{export_format}"))
+        return artifacts or None
+
+    def store(self, output_dir: Path, digest: str):
+        """
+        Records the input digest of a freshly compiled export folder.
+
+        Args:
+            output_dir: The export folder.
+            digest: The input digest the artifact was compiled from.
+        """
+        try:
+            (output_dir / MANIFEST_NAME).write_text(digest, encoding="utf-8")
+        except OSError as e:
+            print(f"Warning: Failed to record export cache entry: {e}")
+
+    def _executable_fingerprint(self) -> str:
+        """Identifies the Typst executable (and so its version)."""
+        executable = self._resolve_executable()
+        if not executable:
+            return ""
+        try:
+            stat = Path(executable).stat()
+        except OSError:
+            return executable
+        return f"{Path(executable).name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _list_files(self, root: Path) -> list:
+        """
+        Lists the files under a file or folder, sorted by relative path.
+
+        Hidden files (e.g., temporary files being written) are skipped.
+
+        Args:
+            root: A file or folder.
+
+        Returns:
+            A list of (relative path, Path) tuples.
+        """
+        if root.is_file():
+            return [("", root)]
+        if not root.is_dir():
+            return []
+
+        files = []
+        for path in root.rglob("*"):
+            relative = path.relative_to(root)
+            if any(part.startswith(".") for part in relative.parts) or not path.is_file():
+                continue
+            files.append((relative.as_posix(), path))
+        files.sort()
+        return files
+
+    def _file_digest(self, path: Path) -> Optional[bytes]:
+        """
+        Returns the content digest of a file, hashing it only if it changed.
+
+        Args:
+            path: The file.
+
+        Returns:
+            The digest, or None if the file cannot be read.
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+
+        key = str(path)
+        with self._lock:
+            known = self._file_digests.get(key)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+
+        with self._lock:
+            self._file_digests[key] = (stat.st_size, stat.st_mtime_ns, digest.digest())
+        return digest.digest()
@@ -0,0 +1,750 @@
+"""
+Exports projects in batches with a bounded pool of Typst processes.
+
+This module provides the ExportEngine, which takes a list of export jobs
+(project, format, options) and compiles them with `typst compile`, running
+at most one process per CPU core at a time. Jobs that would produce the same
+artifact (same project, format and compile options) share a single compile,
+whatever their destinations are.
+
+A job is a dictionary:
+
+    {
+        "project": "/path/to/project",
+        "format": "pdf",            # "pdf", "png" or "svg"
+        "options": {
+            "destination": "/path/to/folder",   # Optional
+            "ppi": 144,                         # PNG only
+            "pages": "1-3,5",                   # Optional page selection
+        },
+    }
+
+PDFs are copied to <destination>/<project name>.pdf. PNG and SVG pages are
+copied to a <destination>/<project name>/ folder, replacing the pages of that
+format a previous export left there. Without a destination the artifacts
+stay in the project's output/export/ folder. Jobs of one batch whose
+projects share a folder name cannot be delivered to the same place; the
+later ones fail instead of overwriting the others.
+
+With an ExportCache, every export folder remembers the digest of the inputs
+it was compiled from, and a job whose inputs did not change since is served
+from that folder without compiling. The digests are computed on a worker
+thread, once per compile: a new compile waits there until its digest tells
+whether it is served from the cache or queued.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QProcess, QProcessEnvironment, QRunnable, QThreadPool, QTimer, Signal, Slot
+
+from .export_cache import MANIFEST_NAME, ExportCache
+
+# Supported export formats.
+FORMATS = ("pdf", "png", "svg")
+
+# Options that change the compiled artifact, and so the compile key. Other
+# options (e.g., the destination) only affect where it is copied.
+COMPILE_OPTIONS = ("ppi", "pages")
+
+# Job states reported through jobProgress.
+QUEUED = "queued"
+COMPILING = "compiling"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+def compile_key(project: str, export_format: str, options: dict) -> tuple:
+    """
+    Returns the key identifying the artifact a job produces.
+
+    Args:
+        project: The project directory.
+        export_format: The export format.
+        options: The job options.
+
+    Returns:
+        A hashable key; jobs with equal keys share one compile.
+    """
+    relevant = {name: options[name] for name in COMPILE_OPTIONS if options.get(name) not in (None, "")}
+    return (str(Path(project).resolve()), export_format, json.dumps(relevant, sort_keys=True))
+
+
+def compile_arguments(export_format: str, options: dict, output_dir: Path) -> list:
+    """
+    Builds the typst compile arguments for a job.
+
+    Args:
+        export_format: The export format.
+        options: The job options.
+        output_dir: The folder the artifact is written to.
+
+    Returns:
+        The list of command line arguments.
+    """
+    if export_format == "pdf":
+        arguments = ["compile", "main.typ", str(output_dir / "main.pdf")]
+    else:
+        # {0p} is replaced by Typst with the zero-padded page number
+        arguments = ["compile", "main.typ", str(output_dir / f"p{{0p}}.{export_format}")]
+        if export_format == "png":
+            arguments += ["--ppi", str(options.get("ppi", 144))]
+
+    if options.get("pages"):
+        arguments += ["--pages", str(options["pages"])]
+    return arguments
+
+
+class _DigestJob(QRunnable):
+    """Runs a digest function on the worker of the engine."""
+
+    def __init__(self, function: Callable[[], None]):
+        super().__init__()
+        self._function = function
+
+    def run(self):
+        self._function()
+
+
+class ExportEngine(QObject):
+    """
+    Runs export jobs on a pool of typst compile processes.
+
+    submit() returns a batch id. Each job reports its state through
+    jobProgress and its result through jobFinished; once every job of the
+    batch is done, batchFinished delivers the aggregated result. All signals
+    are emitted on the thread that owns the engine (the GUI thread).
+    """
+
+    # Signal emitted when a job changes state.
+    jobProgress = Signal(int, int, str)  # Emits (batch id, job index, state)
+
+    # Signal emitted when a job finished, failed or was cancelled.
+    jobFinished = Signal(int, dict)  # Emits (batch id, job result)
+
+    # Signal emitted when every job of a batch is finished.
+    batchFinished = Signal(int, dict)  # Emits (batch id, batch result)
+
+    # Signal emitted by the digest worker when the input digest of a task is
+    # known; handled on the GUI thread
+    _digested = Signal(object, object, bool)  # Emits (task, digest or None, cache hit)
+
+    # Signal emitted by the digest worker when the inputs of a compiled task
+    # did not change during its compile; handled on the GUI thread
+    _unchanged = Signal(object, object)  # Emits (task, export folder)
+
+    def __init__(self, executable_resolver: Callable[[], Optional[str]], max_parallel: Optional[int] = None,
+                 cache: Optional[ExportCache] = None,
+                 environment: Optional[Callable[[], QProcessEnvironment]] = None,
+                 arguments: Optional[Callable[[Path], list]] = None, parent=None):
+        """
+        Initializes the ExportEngine.
+
+        Args:
+            executable_resolver: Callable returning the Typst executable path,
+                or None if it cannot be found.
+            max_parallel: Maximum number of concurrent compiles. Defaults to
+                the number of CPU cores.
+            cache: Optional cache of compiled artifacts.
+            environment: Optional callable returning the environment of the
+                compile processes.
+            arguments: Optional callable returning extra compile arguments
+                for a project (e.g., font options).
+            parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self._resolve_executable = executable_resolver
+        self.max_parallel = max(1, max_parallel or os.cpu_count() or 1)
+        self.cache = cache
+        self._environment = environment
+        self._extra_arguments = arguments
+
+        self._next_batch_id = 1
+        self._batches: dict[int, dict] = {}
+
+        # Unfinished compiles (queued, running, or killed and not exited yet),
+        # the queued ones in order, the queued ones by key, which later jobs
+        # of the same key join, and the number of running processes.
+        self._tasks: list[dict] = []
+        self._queue: deque[dict] = deque()
+        self._queued: dict[tuple, dict] = {}
+        self._running = 0
+
+        # Bumped every time a compile starts writing into an export folder,
+        # so results about a folder computed off the GUI thread can tell
+        # whether it was rewritten since.
+        self._generations: dict[str, int] = {}
+
+        # Computes input digests off the GUI thread, one at a time, since
+        # they mostly read files
+        self._digest_pool = QThreadPool(self)
+        self._digest_pool.setMaxThreadCount(1)
+        self._digested.connect(self._on_digested)
+        self._unchanged.connect(self._on_unchanged)
+
+    @Slot(list, result=int)
+    def submit(self, jobs: list) -> int:
+        """
+        Queues a batch of export jobs.
+
+        Args:
+            jobs: List of job dictionaries (see the module docstring).
+
+        Returns:
+            The id of the batch.
+        """
+        batch_id = self._next_batch_id
+        self._next_batch_id += 1
+        self._batches[batch_id] = {
+            "jobs": [dict(job) for job in jobs],
+            "results": {},
+            "started": time.monotonic(),
+            "queued": False,
+        }
+
+        # Queues the jobs once control returns to the event loop, so every
+        # signal of the batch arrives after the caller got its id.
+        QTimer.singleShot(0, self, lambda: self._queue_batch(batch_id))
+        return batch_id
+
+    def _queue_batch(self, batch_id: int):
+        """
+        Validates the jobs of a batch and queues their compiles.
+
+        Args:
+            batch_id: The batch to queue.
+        """
+        batch = self._batches.get(batch_id)
+        if batch is None or batch["queued"]:
+            return
+        batch["queued"] = True
+
+        if not batch["jobs"]:
+            self._finish_batch(batch_id)
+            return
+
+        new_tasks = []
+        # Maps each delivery target of the batch to the project delivered there
+        targets: dict[Path, Path] = {}
+        for index, job in enumerate(batch["jobs"]):
+            error = self._validate(job)
+            target = self._target(job) if not error else None
+            if target is not None:
+                project = Path(job["project"]).resolve()
+                if targets.setdefault(target, project) != project:
+                    error = f"Another project named '{project.name}' is exported to {target.parent}."
+            if error:
+                self._finish_job(batch_id, index, FAILED, error)
+                continue
+
+            options = job.get("options") or {}
+            key = compile_key(job["project"], job["format"], options)
+            # A running compile may have read older inputs, so only a queued
+            # one is joined.
+            task = self._queued.get(key)
+            if task is None:
+                task = {
+                    "key": key,
+                    "project": Path(job["project"]),
+                    "format": job["format"],
+                    "options": options,
+                    "jobs": [],
+                    "process": None,
+                    "started": 0.0,
+                    "arguments": self._extra_arguments(Path(job["project"])) if self._extra_arguments else [],
+                    "digest": None,
+                    "generation": 0,
+                }
+                self._tasks.append(task)
+                self._queued[key] = task
+                new_tasks.append(task)
+            task["jobs"].append((batch_id, index))
+            self.jobProgress.emit(batch_id, index, QUEUED)
+
+        for task in new_tasks:
+            if self.cache is None:
+                self._queue.append(task)
+            else:
+                # Queued once its digest tells that it is not cached; a hit
+                # only counts if the folder was not rewritten meanwhile
+                task["generation"] = self._generation(self._output_dir(task))
+                self._digest_pool.start(_DigestJob(lambda task=task: self._digest_task(task)))
+
+        self._start_next()
+
+    @Slot(int)
+    def cancel(self, batch_id: int):
+        """
+        Cancels the jobs of a batch that are not finished yet.
+
+        A compile shared with another batch keeps running for that batch.
+
+        Args:
+            batch_id: The id returned by submit().
+        """
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return
+        if not batch["queued"]:
+            batch["queued"] = True
+            for index in range(len(batch["jobs"])):
+                self._finish_job(batch_id, index, CANCELLED, "Export cancelled.")
+            if not batch["jobs"]:
+                self._finish_batch(batch_id)
+            return
+
+        for task in list(self._tasks):
+            cancelled = [job for job in task["jobs"] if job[0] == batch_id]
+            if not cancelled:
+                continue
+            task["jobs"] = [job for job in task["jobs"] if job[0] != batch_id]
+            if not task["jobs"]:
+                self._abort_task(task)
+            for _, index in cancelled:
+                self._finish_job(batch_id, index, CANCELLED, "Export cancelled.")
+
+    @Slot()
+    def cancel_all(self):
+        """Cancels every unfinished job."""
+        # Digests not started yet are not needed anymore
+        self._digest_pool.clear()
+        for batch_id in list(self._batches):
+            self.cancel(batch_id)
+
+    @Slot(result=bool)
+    def is_busy(self):
+        """
+        Checks if any job is queued or running.
+
+        Returns:
+            True if the engine has unfinished jobs.
+        """
+        return bool(self._tasks)
+
+    def _validate(self, job: dict) -> Optional[str]:
+        """
+        Checks a job before it is queued.
+
+        Args:
+            job: The job dictionary.
+
+        Returns:
+            An error message, or None if the job is valid.
+        """
+        project = job.get("project")
+        if not project:
+            return "Project path not set."
+        if job.get("format") not in FORMATS:
+            return f"Unsupported export format: {job.get('format')}"
+        if not (Path(project) / "main.typ").is_file():
+            return f"main.typ not found in {project}."
+
+        destination = (job.get("options") or {}).get("destination")
+        if destination and not Path(destination).is_dir():
+            return "Destination is not a valid folder."
+        return None
+
+    def _start_next(self):
+        """
+        Starts queued compiles while processes are available.
+
+        A compile waits while another one of the same key (e.g., one that
+        started before its jobs were submitted) still uses its export folder.
+        """
+        while self._queue and self._running < self.max_parallel:
+            busy = {task["key"] for task in self._tasks if task["process"] is not None}
+            task = next((task for task in self._queue if task["key"] not in busy), None)
+            if task is None:
+                return
+            self._dequeue(task)
+            self._start_task(task)
+
+    def _dequeue(self, task: dict):
+        """
+        Removes a task from the queue.
+
+        Args:
+            task: A queued task.
+        """
+        self._queue = deque(queued for queued in self._queue if queued is not task)
+        if self._queued.get(task["key"]) is task:
+            del self._queued[task["key"]]
+
+    def _forget_task(self, task: dict):
+        """
+        Drops a task from the unfinished ones.
+
+        Args:
+            task: The task.
+        """
+        self._tasks = [unfinished for unfinished in self._tasks if unfinished is not task]
+
+    def _release_process(self, task: dict):
+        """
+        Frees the process slot of a task whose process exited.
+
+        Args:
+            task: The task.
+        """
+        if task["process"] is not None:
+            task["process"].deleteLater()
+            task["process"] = None
+            self._running -= 1
+
+    def _start_task(self, task: dict):
+        """
+        Starts the typst compile process of a task.
+
+        Args:
+            task: The task to compile.
+        """
+        executable_path = self._resolve_executable()
+        if not executable_path:
+            self._complete_task(task, False, "Typst executable not found.")
+            return
+
+        output_dir = self._output_dir(task)
+        task["generation"] = self._generation(output_dir) + 1
+        self._generations[str(output_dir)] = task["generation"]
+        try:
+            # Unlabels the folder first, so it is never a hit while rewritten,
+            # then removes the pages of a previous export, which may have had more
+            (output_dir / MANIFEST_NAME).unlink(missing_ok=True)
+            if output_dir.exists():
+                shutil.rmtree(output_dir)
+            output_dir.mkdir(parents=True)
+        except OSError as e:
+            self._complete_task(task, False, f"Failed to prepare the export folder: {e}")
+            return
+
+        process = QProcess()
+        process.setWorkingDirectory(str(task["project"]))
+        if self._environment:
+            process.setProcessEnvironment(self._environment())
+        process.finished.connect(lambda exit_code, exit_status: self._on_process_finished(task, exit_code, exit_status))
+        process.errorOccurred.connect(lambda error: self._on_process_error(task, error))
+        task["process"] = process
+        task["started"] = time.monotonic()
+        self._running += 1
+
+        for batch_id, index in task["jobs"]:
+            self.jobProgress.emit(batch_id, index, COMPILING)
+
+        arguments = compile_arguments(task["format"], task["options"], output_dir) + task["arguments"]
+        process.start(executable_path, arguments)
+
+    def _digest_task(self, task: dict):
+        """
+        Computes a task's input digest and looks up its artifact.
+
+        Runs on the digest worker; the result is handled by _on_digested().
+
+        Args:
+            task: The new task.
+        """
+        digest = self._input_digest(task)
+        hit = digest is not None and self.cache.lookup(self._output_dir(task), digest, task["format"]) is not None
+        self._digested.emit(task, digest, hit)
+
+    def _on_digested(self, task: dict, digest: Optional[str], hit: bool):
+        """
+        Serves a task from the cache, or queues its compile, once its digest is known.
+
+        Args:
+            task: The task.
+            digest: Its input digest, or None.
+            hit: Whether its export folder holds an artifact of that digest.
+        """
+        if task.get("aborted"):
+            return
+        task["digest"] = digest
+        # The folder may have been rewritten since it was looked up, or still
+        # be written by a compile of the same key, which was started earlier
+        output_dir = self._output_dir(task)
+        if task["generation"] != self._generation(output_dir) or self._folder_busy(output_dir):
+            hit = False
+        if hit:
+            self._dequeue(task)
+            self._complete_task(task, True, "", cached=True)
+            return
+        self._queue.append(task)
+        self._start_next()
+
+    def _store_digest(self, task: dict, output_dir: Path):
+        """
+        Records the digest of a compiled artifact if its inputs did not change.
+
+        Inputs changed during the compile may or may not be part of the
+        artifact, so it is only recorded if the digest is still the same.
+        Runs on the digest worker; the record is written by _on_unchanged().
+
+        Args:
+            task: The finished task.
+            output_dir: Its export folder.
+        """
+        if self._input_digest(task) == task["digest"]:
+            self._unchanged.emit(task, output_dir)
+
+    def _on_unchanged(self, task: dict, output_dir: Path):
+        """
+        Records the digest of a compiled artifact if its folder still holds it.
+
+        A later compile of the same key may have started rewriting the
+        folder while the digest was checked.
+
+        Args:
+            task: The finished task.
+            output_dir: Its export folder.
+        """
+        if task["generation"] == self._generation(output_dir):
+            self.cache.store(output_dir, task["digest"])
+
+    def _generation(self, output_dir: Path) -> int:
+        """
+        Returns how many compiles started writing into an export folder.
+
+        Args:
+            output_dir: The export folder.
+        """
+        return self._generations.get(str(output_dir), 0)
+
+    def _folder_busy(self, output_dir: Path) -> bool:
+        """
+        Checks if a compile process is writing into an export folder.
+
+        Args:
+            output_dir: The export folder.
+        """
+        return any(task["process"] is not None and self._output_dir(task) == output_dir for task in self._tasks)
+
+    def _input_digest(self, task: dict) -> Optional[str]:
+        """
+        Computes the digest of a task's inputs and compile arguments.
+
+        Args:
+            task: The task.
+        """
+        return self.cache.input_digest(task["project"], "\0".join(task["arguments"]))
+
+    def _output_dir(self, task: dict) -> Path:
+        """
+        Returns the folder a task's artifact is compiled to.
+
+        Args:
+            task: The task.
+        """
+        options_digest = hashlib.blake2b(task["key"][2].encode("utf-8"), digest_size=4).hexdigest()
+        return task["project"] / "output" / "export" / f"{task['format']}-{options_digest}"
+
+    def _on_process_finished(self, task: dict, exit_code: int, exit_status):
+        """
+        Handles the end of a compile process.
+
+        Args:
+            task: The task whose process finished.
+            exit_code: The exit code of the process.
+            exit_status: The exit status (normal or crashed).
+        """
+        if task.get("aborted"):
+            self._release_process(task)
+            self._forget_task(task)
+            self._start_next()
+            return
+
+        if exit_status == QProcess.ExitStatus.NormalExit and exit_code == 0:
+            self._complete_task(task, True, "")
+        else:
+            error_output = task["process"].readAllStandardError().data().decode("utf-8", errors="replace")
+            self._complete_task(task, False, f"{task['format'].upper()} export failed.\n\nError:\n{error_output}")
+
+    def _on_process_error(self, task: dict, error):
+        """
+        Handles a compile process that could not be started.
+
+        Args:
+            task: The task whose process failed.
+            error: The QProcess.ProcessError enum value.
+        """
+        if error != QProcess.ProcessError.FailedToStart:
+            return
+        if task.get("aborted"):
+            self._release_process(task)
+            self._forget_task(task)
+            self._start_next()
+        else:
+            self._complete_task(task, False, "Failed to start Typst.")
+
+    def _abort_task(self, task: dict):
+        """
+        Drops a task nobody waits for anymore, killing its process.
+
+        The process is not waited for: the task keeps its process slot, and
+        its export folder, until the process exited (see
+        _on_process_finished()).
+
+        Args:
+            task: The task to abort.
+        """
+        task["aborted"] = True
+        if task["process"] is None:
+            self._dequeue(task)
+            self._forget_task(task)
+            return
+        task["process"].kill()
+
+    def _complete_task(self, task: dict, success: bool, error: str, cached: bool = False):
+        """
+        Distributes the artifact of a finished compile to its jobs.
+
+        Args:
+            task: The finished task.
+            success: Whether the compile succeeded.
+            error: The error message if it failed.
+            cached: Whether the artifact was served from the cache.
+        """
+        self._forget_task(task)
+        compile_ms = (time.monotonic() - task["started"]) * 1000 if task["started"] else 0.0
+        self._release_process(task)
+
+        artifacts = []
+        if success:
+            output_dir = self._output_dir(task)
+            artifacts = sorted(output_dir.glob(f"*.{task['format']}"))
+            if not artifacts:
+                success = False
+                error = f"Typst reported success, but no {task['format'].upper()} file was found."
+            elif not cached and task["digest"]:
+                self._digest_pool.start(_DigestJob(lambda: self._store_digest(task, output_dir)))
+
+        for batch_id, index in task["jobs"]:
+            if not success:
+                self._finish_job(batch_id, index, FAILED, error, compile_ms=compile_ms)
+                continue
+            try:
+                outputs = self._deliver(self._batches[batch_id]["jobs"][index], artifacts)
+            except OSError as e:
+                self._finish_job(batch_id, index, FAILED, f"Failed to copy the export: {e}", compile_ms=compile_ms)
+                continue
+            self._finish_job(batch_id, index, DONE, "", outputs=outputs, compile_ms=compile_ms, cached=cached)
+
+        self._start_next()
+
+    def _deliver(self, job: dict, artifacts: list) -> list:
+        """
+        Copies a compiled artifact to a job's destination.
+
+        Args:
+            job: The job dictionary.
+            artifacts: The compiled files, in page order.
+
+        Returns:
+            The paths of the delivered files.
+
+        Raises:
+            OSError: If the files cannot be copied.
+        """
+        target = self._target(job)
+        if target is None:
+            return [str(path) for path in artifacts]
+
+        if job["format"] == "pdf":
+            shutil.copyfile(artifacts[0], target)
+            return [str(target)]
+
+        target.mkdir(exist_ok=True)
+        delivered = []
+        for path in artifacts:
+            shutil.copyfile(path, target / path.name)
+            delivered.append(str(target / path.name))
+
+        # Pages of a previous export of a longer document
+        names = {path.name for path in artifacts}
+        for stale in target.glob(f"p*.{job['format']}"):
+            if stale.name not in names:
+                stale.unlink()
+        return delivered
+
+    @staticmethod
+    def _target(job: dict) -> Optional[Path]:
+        """
+        Returns where a job's artifact is delivered.
+
+        Args:
+            job: A valid job dictionary.
+
+        Returns:
+            The PDF file or the folder of the pages, or None if the job has
+            no destination.
+        """
+        destination = (job.get("options") or {}).get("destination")
+        if not destination:
+            return None
+        name = Path(job["project"]).resolve().name
+        if job["format"] == "pdf":
+            return Path(destination).resolve() / f"{name}.pdf"
+        return Path(destination).resolve() / name
+
+    def _finish_job(self, batch_id: int, index: int, state: str, error: str, outputs: Optional[list] = None,
+                    compile_ms: float = 0.0, cached: bool = False):
+        """
+        Records the result of a job and finishes its batch if it was the last.
+
+        Args:
+            batch_id: The batch of the job.
+            index: The index of the job in its batch.
+            state: DONE, FAILED or CANCELLED.
+            error: The error message, if any.
+            outputs: The delivered files.
+            compile_ms: How long the (possibly shared) compile took.
+            cached: Whether the artifact was served from the cache.
+        """
+        batch = self._batches.get(batch_id)
+        if batch is None or index in batch["results"]:
+            return
+
+        job = batch["jobs"][index]
+        result = {
+            "index": index,
+            "project": str(job.get("project", "")),
+            "format": job.get("format", ""),
+            "state": state,
+            "success": state == DONE,
+            "message": error,
+            "outputs": outputs or [],
+            "compile_ms": compile_ms,
+            "cached": cached,
+            "elapsed_ms": (time.monotonic() - batch["started"]) * 1000,
+        }
+        batch["results"][index] = result
+
+        self.jobProgress.emit(batch_id, index, state)
+        self.jobFinished.emit(batch_id, result)
+
+        if len(batch["results"]) == len(batch["jobs"]):
+            self._finish_batch(batch_id)
+
+    def _finish_batch(self, batch_id: int):
+        """
+        Emits the aggregated result of a batch.
+
+        Args:
+            batch_id: The finished batch.
+        """
+        batch = self._batches.pop(batch_id)
+        results = [batch["results"][index] for index in range(len(batch["jobs"]))]
+        self.batchFinished.emit(batch_id, {
+            "batch": batch_id,
+            "total": len(results),
+            "succeeded": sum(1 for result in results if result["state"] == DONE),
+            "failed": sum(1 for result in results if result["state"] == FAILED),
+            "cancelled": sum(1 for result in results if result["state"] == CANCELLED),
+            "elapsed_ms": (time.monotonic() - batch["started"]) * 1000,
+            "jobs": results,
+        })
@@ -0,0 +1,258 @@
+"""
+Restricts the fonts Typst loads to the ones a project uses.
+
+Every Typst process scans all system fonts when it starts, which takes
+hundreds of milliseconds on machines with thousands of installed fonts. Most
+projects only use a font Typst embeds (e.g., Libertinus Serif) or one shipped
+with Ergo in app/fonts/. For those projects the FontSet starts Typst with the
+bundled font folder and --ignore-system-fonts, skipping the scan entirely.
+
+Which families are available without system fonts is found once by probe(),
+which runs `typst fonts` with and without system fonts. Both runs are timed,
+so the time saved per Typst start can be shown. Until the probe finished, or
+if system fonts are enabled in the settings, Typst starts with system fonts.
+"""
+
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QProcess, QProcessEnvironment, Signal, Slot
+
+from .form_journal import FormJournal
+
+# Folder of a project holding its own fonts.
+PROJECT_FONTS_DIR = "fonts"
+
+
+def declared_families(project: Path) -> list:
+    """
+    Reads the font families a project declares in its form data.
+
+    Args:
+        project: The project directory.
+
+    Returns:
+        The list of family names, empty if the project declares none.
+    """
+    json_path = Path(project) / "form_data.json"
+    if not json_path.exists() and not FormJournal.journal_path_for(json_path).exists():
+        return []
+    try:
+        data = FormJournal.load(json_path)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read the fonts of '{project}': {e}")
+        return []
+
+    family = data.get("font_family") if isinstance(data, dict) else None
+    return [family] if family else []
+
+
+class FontSet(QObject):
+    """
+    Builds the font arguments of Typst processes and measures font scanning.
+    """
+
+    # Signal emitted when probe() finished.
+    fontScanMeasured = Signal(dict)  # Emits the scan statistics (see get_scan_stats)
+
+    def __init__(self, executable_resolver: Callable[[], Optional[str]],
+                 environment: Optional[Callable[[], QProcessEnvironment]] = None,
+                 bundled_dir: Optional[Path] = None, parent=None):
+        """
+        Initializes the FontSet.
+
+        Args:
+            executable_resolver: Callable returning the Typst executable path.
+            environment: Optional callable returning the environment of the
+                probe processes.
+            bundled_dir: Folder of fonts shipped with the application.
+                Defaults to app/fonts/.
+            parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self._resolve_executable = executable_resolver
+        self._environment = environment
+        self.bundled_dir = bundled_dir or Path(__file__).resolve().parent.parent / "fonts"
+
+        # Whether every Typst process should load the system fonts (opt-out).
+        self.use_system_fonts = False
+
+        # Families available without system fonts (lowercase), or None before
+        # the probe finished.
+        self._families: Optional[set] = None
+
+        # Duration of `typst fonts` without and with system fonts.
+        self._restricted_ms = 0.0
+        self._system_ms = 0.0
+
+        self._probe_process: Optional[QProcess] = None
+
+    def font_dirs(self, project: Path) -> list:
+        """
+        Returns the font folders passed to Typst for a project.
+
+        Args:
+            project: The project directory.
+
+        Returns:
+            The list of existing font folders.
+        """
+        folders = [Path(project) / PROJECT_FONTS_DIR, self.bundled_dir]
+        return [folder for folder in folders if folder.is_dir()]
+
+    def arguments(self, project: Path, families: Optional[list] = None) -> list:
+        """
+        Builds the font arguments of a Typst process for a project.
+
+        Args:
+            project: The project directory.
+            families: The families the project uses. Read from the project's
+                form data if omitted.
+
+        Returns:
+            The list of command line arguments.
+        """
+        arguments = []
+        for folder in self.font_dirs(project):
+            arguments += ["--font-path", str(folder)]
+
+        if families is None:
+            families = declared_families(project)
+        if self.can_skip_system_fonts(families):
+            arguments.append("--ignore-system-fonts")
+        return arguments
+
+    def can_skip_system_fonts(self, families: list) -> bool:
+        """
+        Checks if Typst can be started without scanning the system fonts.
+
+        Fonts in the project's own font folder are not known to the probe, so
+        projects using them keep the system fonts.
+
+        Args:
+            families: The families the project uses.
+
+        Returns:
+            True if every family is embedded in Typst or bundled with Ergo.
+        """
+        if self.use_system_fonts or self._families is None or not families:
+            return False
+        return all(family.lower() in self._families for family in families)
+
+    @Slot()
+    def probe(self):
+        """
+        Lists the fonts available without system fonts and times the scans.
+
+        Runs in the background; fontScanMeasured is emitted when both scans
+        finished.
+        """
+        if self._probe_process is not None:
+            return
+        self._run_scan(system_fonts=False)
+
+    @Slot(result=dict)
+    def get_scan_stats(self):
+        """
+        Gets the result of the font probe.
+
+        Returns:
+            A dictionary with whether the probe finished ("probed"), the
+            number of families available without system fonts ("families"),
+            and how long Typst took to list the fonts without and with system
+            fonts and the difference, in milliseconds ("restricted_ms",
+            "system_ms", "saved_ms").
+        """
+        return {
+            "probed": self._families is not None,
+            "families": len(self._families or ()),
+            "restricted_ms": self._restricted_ms,
+            "system_ms": self._system_ms,
+            "saved_ms": max(0.0, self._system_ms - self._restricted_ms),
+        }
+
+    @Slot()
+    def cancel(self):
+        """Stops a running probe, e.g., when the application quits."""
+        process = self._probe_process
+        if process is None:
+            return
+        self._probe_process = None
+        process.kill()
+        process.waitForFinished(1000)
+        process.deleteLater()
+
+    def _run_scan(self, system_fonts: bool):
+        """
+        Starts one `typst fonts` run of the probe.
+
+        Args:
+            system_fonts: Whether Typst loads the system fonts in this run.
+        """
+        executable_path = self._resolve_executable()
+        if not executable_path:
+            return
+
+        arguments = ["fonts"]
+        if self.bundled_dir.is_dir():
+            arguments += ["--font-path", str(self.bundled_dir)]
+        if not system_fonts:
+            arguments.append("--ignore-system-fonts")
+
+        process = QProcess(self)
+        if self._environment:
+            process.setProcessEnvironment(self._environment())
+        started = time.monotonic()
+        process.finished.connect(
+            lambda exit_code, exit_status: self._on_scan_finished(process, system_fonts, exit_code, started)
+        )
+        process.errorOccurred.connect(lambda error: self._on_scan_error(process, error))
+        self._probe_process = process
+        process.start(executable_path, arguments)
+
+    def _on_scan_finished(self, process: QProcess, system_fonts: bool, exit_code: int, started: float):
+        """
+        Records the result of a probe run and starts the next one.
+
+        Args:
+            process: The finished process.
+            system_fonts: Whether the run loaded the system fonts.
+            exit_code: The exit code of the process.
+            started: When the process was started (time.monotonic()).
+        """
+        if process is not self._probe_process:
+            return
+        self._probe_process = None
+        elapsed_ms = (time.monotonic() - started) * 1000
+        output = process.readAllStandardOutput().data().decode("utf-8", errors="replace")
+        process.deleteLater()
+
+        if exit_code != 0:
+            print("Warning: Could not list the fonts available to Typst.")
+            return
+
+        if not system_fonts:
+            self._restricted_ms = elapsed_ms
+            self._families = {line.strip().lower() for line in output.splitlines() if line.strip()}
+            self._run_scan(system_fonts=True)
+            return
+
+        self._system_ms = elapsed_ms
+        stats = self.get_scan_stats()
+        print(f"Typst font scan: {stats['restricted_ms']:.0f} ms without system fonts, "
+              f"{stats['system_ms']:.0f} ms with them ({stats['families']} families available without)")
+        self.fontScanMeasured.emit(stats)
+
+    def _on_scan_error(self, process: QProcess, error):
+        """
+        Handles a probe process that could not be started.
+
+        Args:
+            process: The failed process.
+            error: The QProcess.ProcessError enum value.
+        """
+        if error == QProcess.ProcessError.FailedToStart and process is self._probe_process:
+            self._probe_process = None
+            process.deleteLater()
+            print("Warning: Failed to start Typst to list its fonts.")
@@ -0,0 +1,308 @@
+"""
+Persists form data as a snapshot plus an append-only change journal.
+
+Rewriting the whole form_data.json on every edit makes the largest write of
+each edit cycle proportional to the size of the document. This module keeps
+form_data.json as a periodically compacted snapshot and records each edit as
+one line in form_data.journal next to it, so an edit only writes the size of
+the change. Loading replays the journal on top of the snapshot.
+
+Journal records are "set" operations: a path into the document and the new
+value stored there. Replaying a journal on a snapshot that already contains
+some of its records gives the same result, so a crash between writing a new
+snapshot and truncating the journal is harmless.
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def apply_op(document: dict, path: list, value):
+    """
+    Applies a journal operation to a document in place.
+
+    Path elements index dictionaries by key. Lists are indexed by position
+    when the element is an integer, or by the item's "id" when it is a string
+    (sections are addressed by id). Operations whose target no longer exists
+    are ignored.
+
+    Args:
+        document: The document to modify.
+        path: The list of keys leading to the value. An empty path replaces
+            the whole document.
+        value: The value to store.
+    """
+    if not path:
+        document.clear()
+        document.update(value)
+        return
+
+    container = document
+    for element in path[:-1]:
+        container = _lookup(container, element)
+        if container is None:
+            return
+
+    last = path[-1]
+    if isinstance(container, dict):
+        container[last] = value
+    elif isinstance(container, list):
+        index = _list_index(container, last)
+        if index is not None:
+            container[index] = value
+
+
+def merge_ops(earlier: list, later: list) -> list:
+    """
+    Concatenates two operation lists, dropping operations made obsolete.
+
+    An operation is obsolete when a later one sets the same path or one of
+    its parents, since replaying it could never affect the result.
+
+    Args:
+        earlier: The older operations.
+        later: The newer operations.
+
+    Returns:
+        The merged list of operations.
+    """
+    merged = list(earlier)
+    for op in later:
+        path = op["path"]
+        merged = [old for old in merged if old["path"][:len(path)] != path]
+        merged.append(op)
+    return merged
+
+
+def _lookup(container, element):
+    """
+    Returns the child of a container for a path element, or None.
+
+    Args:
+        container: A dictionary or list.
+        element: The path element (key, position or item id).
+    """
+    if isinstance(container, dict):
+        return container.get(element)
+    if isinstance(container, list):
+        index = _list_index(container, element)
+        return container[index] if index is not None else None
+    return None
+
+
+def _list_index(items: list, element):
+    """
+    Resolves a path element to a list position, or None if it is unknown.
+
+    Args:
+        items: The list to index.
+        element: A position (int) or an item id (str).
+    """
+    if isinstance(element, int):
+        return element if 0 <= element < len(items) else None
+    for index, item in enumerate(items):
+        if isinstance(item, dict) and item.get("id") == element:
+            return index
+    return None
+
+
+class FormJournal:
+    """
+    Writes form data edits to an append-only journal with periodic compaction.
+
+    Appends are flushed to the operating system immediately, so they survive
+    an application crash, but are only fsync'ed in batches (at most once per
+    sync interval, and on compaction or close), so typing does not wait on the
+    disk. Once the journal grows past its size limits, compact() folds it into
+    a new snapshot written atomically.
+    """
+
+    def __init__(self, snapshot_path: Path, max_records: int = 500, max_bytes: int = 256 * 1024,
+                 sync_interval: float = 1.0):
+        """
+        Initializes the FormJournal.
+
+        Args:
+            snapshot_path: Path to the form_data.json snapshot.
+            max_records: Number of journal records that triggers compaction.
+            max_bytes: Journal size in bytes that triggers compaction.
+            sync_interval: Minimum number of seconds between two fsyncs.
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = self.journal_path_for(snapshot_path)
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.sync_interval = sync_interval
+
+        self._file = None
+        self._records = 0
+        self._bytes = 0
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+
+        # A journal left over from a previous session counts toward compaction.
+        self._bytes = self._trim_incomplete_record()
+
+    def _trim_incomplete_record(self) -> int:
+        """
+        Cuts a partially written last record off the journal, if any.
+
+        New records are appended after the existing ones, so a torn record left
+        by a crash would otherwise corrupt the first record of this session.
+
+        Returns:
+            The size of the journal in bytes after trimming.
+        """
+        try:
+            with open(self.journal_path, "rb+") as f:
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                if end != len(data):
+                    f.truncate(end)
+                return end
+        except OSError:
+            return 0
+
+    @staticmethod
+    def journal_path_for(snapshot_path: Path) -> Path:
+        """
+        Returns the journal path belonging to a snapshot path.
+
+        Args:
+            snapshot_path: Path to the form_data.json snapshot.
+        """
+        return snapshot_path.with_suffix(".journal")
+
+    @classmethod
+    def load(cls, snapshot_path: Path) -> dict:
+        """
+        Loads the snapshot and replays the journal on top of it.
+
+        A truncated or corrupt last record (e.g., from a crash in the middle of
+        an append) ends the replay.
+
+        Args:
+            snapshot_path: Path to the form_data.json snapshot.
+
+        Returns:
+            The recovered form data, or an empty dict if neither file exists.
+
+        Raises:
+            OSError: If the snapshot exists but cannot be read.
+            json.JSONDecodeError: If the snapshot is not valid JSON.
+        """
+        document = {}
+        if snapshot_path.exists():
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                document = json.load(f)
+
+        journal_path = cls.journal_path_for(snapshot_path)
+        try:
+            with open(journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"Warning: Ignoring incomplete record in {journal_path.name}.")
+                        break
+                    apply_op(document, record["path"], record["value"])
+        except FileNotFoundError:
+            pass
+
+        return document
+
+    def append(self, ops: list):
+        """
+        Appends operations to the journal.
+
+        Args:
+            ops: List of {"path": [...], "value": ...} operations.
+
+        Raises:
+            OSError: If the journal cannot be written.
+        """
+        if not ops:
+            return
+
+        if self._file is None:
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+
+        data = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops)
+        self._file.write(data)
+        self._file.flush()
+
+        self._records += len(ops)
+        self._bytes += len(data.encode("utf-8"))
+        self._unsynced = True
+
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def needs_compaction(self) -> bool:
+        """Returns True if the journal has grown past its size limits."""
+        return self._records >= self.max_records or self._bytes >= self.max_bytes
+
+    def is_empty(self) -> bool:
+        """Returns True if the journal holds no records."""
+        return self._bytes == 0
+
+    def has_unsynced_data(self) -> bool:
+        """Returns True if appended records have not been fsync'ed yet."""
+        return self._unsynced
+
+    def sync(self):
+        """Forces appended records to disk."""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+
+    def compact(self, document: dict):
+        """
+        Writes the full document as the new snapshot and empties the journal.
+
+        The snapshot is written to a temporary file, synced and renamed over
+        form_data.json before the journal is truncated.
+
+        Args:
+            document: The complete, current form data.
+
+        Raises:
+            OSError: If the snapshot cannot be written.
+        """
+        data = json.dumps(document, indent=2, ensure_ascii=False).encode("utf-8")
+
+        fd, temp_name = tempfile.mkstemp(
+            dir=self.snapshot_path.parent, prefix=f".{self.snapshot_path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_name, 0o644)
+            os.replace(temp_name, self.snapshot_path)
+        except OSError:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # Truncates the journal now that the snapshot contains every record.
+        open(self.journal_path, "w", encoding="utf-8").close()
+
+        self._records = 0
+        self._bytes = 0
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Syncs and closes the journal file."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,402 @@
+"""
+Runs document generation on a dedicated worker thread.
+
+This module provides the GenerationWorker, which receives snapshots of the
+form state from the GUI thread, renders them through a callable supplied by
+the form handler and writes the resulting files. Snapshots that arrive while
+a generation is running replace each other, so only the latest one is
+generated once the worker becomes free.
+
+Files are never written in place. Every changed file is first written to a
+temporary file next to it, and the whole batch is then published with
+atomic renames, so Typst watch never reads a half-written source and sees a
+single consistent change set per edit.
+
+Form data is persisted through a FormJournal: edits are appended to the
+project's journal and folded into form_data.json in the background once the
+journal grows large enough.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
+
+from .form_journal import FormJournal, merge_ops
+
+
+def merge_snapshots(previous: dict, snapshot: dict) -> dict:
+    """
+    Merges a newer form snapshot into an older one for the same project.
+
+    The newer snapshot's form data wins. The render targets and journal
+    operations of both are merged, so the changes of the older snapshot are
+    still rendered and persisted.
+
+    Args:
+        previous: The older snapshot.
+        snapshot: The newer snapshot.
+
+    Returns:
+        A new snapshot covering both.
+    """
+    return dict(
+        snapshot,
+        dirty=_merge_dirty(previous.get("dirty"), snapshot.get("dirty")),
+        ops=_merge_ops(previous.get("ops"), snapshot.get("ops")),
+    )
+
+
+def _merge_dirty(first: Optional[set], second: Optional[set]) -> Optional[set]:
+    """
+    Merges the render targets of two snapshots.
+
+    Args:
+        first: The dirty set of the older snapshot (None means everything).
+        second: The dirty set of the newer snapshot (None means everything).
+
+    Returns:
+        The union of both sets, or None if either covers everything.
+    """
+    if first is None or second is None:
+        return None
+    return first | second
+
+
+def _merge_ops(first: Optional[list], second: Optional[list]) -> Optional[list]:
+    """
+    Merges the journal operations of two snapshots.
+
+    Args:
+        first: The operations of the older snapshot (None means full save).
+        second: The operations of the newer snapshot (None means full save).
+
+    Returns:
+        The merged operations, or None if either requires a full save.
+    """
+    if first is None or second is None:
+        return None
+    return merge_ops(first, second)
+
+
+class GenerationWorker(QObject):
+    """
+    Generates project files from form snapshots off the GUI thread.
+
+    The worker is meant to be moved to a QThread. submit() may be called from
+    any thread; the actual rendering and writing happens in process_pending()
+    on the worker's own thread. Its signals are delivered to receivers on the
+    GUI thread through queued connections.
+    """
+
+    # Signal emitted when the file is successfully generated/updated.
+    fileGenerated = Signal(str)  # Emits the file path
+
+    # Signal emitted when file generation fails.
+    fileGenerationFailed = Signal(str)  # Emits the error message
+
+    # Signal emitted after each generation with the write statistics.
+    filesWritten = Signal(int, int)  # Emits (files touched, files skipped)
+
+    # Internal signal used to wake the worker thread up.
+    _wake = Signal()
+
+    def __init__(self, render: Callable[[dict], dict], parent=None):
+        """
+        Initializes the GenerationWorker.
+
+        Args:
+            render: Callable turning a snapshot into the files to write. It must
+                return a dictionary with "sources" (list of (Path, str)) and
+                "main" (the main.typ Path).
+            parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self._render = render
+
+        # The latest snapshot waiting to be generated for each project, in
+        # submission order, guarded by the lock. Keyed by project so switching
+        # projects never drops the last edit of the previous one.
+        self._lock = threading.Lock()
+        self._pending: dict[Path, dict] = {}
+        self._scheduled = False
+
+        # Maps each generated file path to the digest of its last known content,
+        # so unchanged files are not rewritten (and not recompiled by Typst watch).
+        # Only touched from the worker thread.
+        self._file_digests: dict[str, bytes] = {}
+        self._project_path: Optional[Path] = None
+
+        # Write statistics of the generation in progress.
+        self._files_touched = 0
+        self._files_skipped = 0
+
+        # Open form data journals and the latest form data of each project, so
+        # a journal can be compacted when its project is closed.
+        self._journals: dict[Path, FormJournal] = {}
+        self._documents: dict[Path, dict] = {}
+        self._sync_scheduled = False
+
+        self._wake.connect(self.process_pending)
+
+    def submit(self, snapshot: dict):
+        """
+        Queues a snapshot for generation, replacing any older pending one.
+
+        Safe to call from any thread. The snapshot must not be modified by the
+        caller afterwards. When it replaces a pending snapshot, the render
+        targets and journal operations of both are merged, so the changes of
+        the dropped snapshot are still rendered and persisted.
+
+        Args:
+            snapshot: Dictionary with the "project_path", the "form_data", an
+                optional "dirty" set of render targets and an optional "ops"
+                list of journal operations. None for either means everything:
+                all files are rendered and the full form data is saved.
+        """
+        with self._lock:
+            previous = self._pending.pop(snapshot["project_path"], None)
+            if previous is not None:
+                snapshot = merge_snapshots(previous, snapshot)
+            self._pending[snapshot["project_path"]] = snapshot
+            if self._scheduled:
+                # The worker is already going to pick up the latest snapshot.
+                return
+            self._scheduled = True
+
+        self._wake.emit()
+
+    @Slot()
+    def process_pending(self):
+        """Generates the latest pending snapshot until none is left."""
+        finished = False
+        try:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._scheduled = False
+                        finished = True
+                        break
+                    project_path = next(iter(self._pending))
+                    snapshot = self._pending.pop(project_path)
+
+                self._generate(snapshot)
+        finally:
+            if not finished:
+                # Whatever went wrong, the next submit() must wake the worker
+                with self._lock:
+                    self._scheduled = False
+
+        # Journals are fsync'ed in batches; makes sure the tail of a burst of
+        # edits reaches the disk once typing pauses.
+        if not self._sync_scheduled and QThread.currentThread() is self.thread():
+            if any(journal.has_unsynced_data() for journal in self._journals.values()):
+                self._sync_scheduled = True
+                QTimer.singleShot(1000, self, self._sync_journals)
+
+    @Slot()
+    def close_journals(self):
+        """
+        Compacts and closes the journal of every project.
+
+        Must only be called while the worker thread is not running (e.g., on
+        shutdown) or from the worker thread itself.
+        """
+        for project_path in list(self._journals):
+            self._close_journal(project_path)
+
+    def _sync_journals(self):
+        """Fsyncs every journal that has unsynced records."""
+        self._sync_scheduled = False
+        for journal in self._journals.values():
+            try:
+                journal.sync()
+            except OSError as e:
+                print(f"Warning: Failed to sync form data journal: {e}")
+
+    def _close_journal(self, project_path: Path):
+        """
+        Compacts and closes the journal of a project.
+
+        Args:
+            project_path: The project whose journal is closed.
+        """
+        journal = self._journals.pop(project_path)
+        document = self._documents.pop(project_path, None)
+        try:
+            if document is not None and not journal.is_empty():
+                journal.compact(document)
+            journal.close()
+        except OSError as e:
+            print(f"Warning: Failed to save form data: {e}")
+
+    def _generate(self, snapshot: dict):
+        """
+        Renders a snapshot and writes the files whose content changed.
+
+        Args:
+            snapshot: The form snapshot to generate.
+        """
+        project_path = snapshot["project_path"]
+        if project_path != self._project_path:
+            # Digests are only meaningful for the project they were taken from,
+            # and the journals of other projects can be folded into their
+            # snapshots now.
+            self._file_digests.clear()
+            self._project_path = project_path
+            for other_path in [path for path in self._journals if path != project_path]:
+                self._close_journal(other_path)
+
+        self._files_touched = 0
+        self._files_skipped = 0
+
+        try:
+            # Saves the form data first: it is the user's work, while the Typst
+            # sources can always be generated again.
+            self._persist(snapshot)
+
+            rendered = self._render(snapshot)
+
+            # Creates each output directory once per generation.
+            for directory in {path.parent for path, _ in rendered["sources"]}:
+                directory.mkdir(parents=True, exist_ok=True)
+
+            # Stages every changed source before publishing any of them. The
+            # renderer lists main.typ last, so it is replaced after the
+            # sections it includes.
+            staged = []
+            try:
+                for path, content in rendered["sources"]:
+                    entry = self._stage_if_changed(path, content)
+                    if entry:
+                        staged.append(entry)
+            except OSError:
+                self._discard(staged)
+                raise
+            self._publish(staged)
+
+            self.filesWritten.emit(self._files_touched, self._files_skipped)
+            self.fileGenerated.emit(str(rendered["main"]))
+
+        except OSError as e:
+            error_msg = f"Failed to write main.typ: {e}"
+            print(f"Error: {error_msg}")
+            self.fileGenerationFailed.emit(error_msg)
+
+        except Exception as e:
+            # E.g., malformed form data the renderer cannot handle
+            error_msg = f"Failed to generate the document: {e!r}"
+            print(f"Error: {error_msg}")
+            self.fileGenerationFailed.emit(error_msg)
+
+    def _persist(self, snapshot: dict):
+        """
+        Saves the form data of a snapshot through the project's journal.
+
+        Patches are appended to the journal. Full-state updates, and journals
+        that grew past their limits, are compacted into form_data.json.
+
+        Args:
+            snapshot: The form snapshot being generated.
+        """
+        project_path = snapshot["project_path"]
+        journal = self._journals.get(project_path)
+        if journal is None:
+            journal = FormJournal(project_path / "form_data.json")
+            self._journals[project_path] = journal
+        self._documents[project_path] = snapshot["form_data"]
+
+        try:
+            ops = snapshot.get("ops")
+            if ops is not None:
+                journal.append(ops)
+            if ops is None or journal.needs_compaction():
+                journal.compact(snapshot["form_data"])
+        except OSError as e:
+            print(f"Warning: Failed to save form data: {e}")
+
+    def _stage_if_changed(self, path: Path, content: str) -> Optional[tuple]:
+        """
+        Writes a generated file to a temporary sibling if its content changed.
+
+        The digest of every published file is remembered. The first time a path
+        is seen, the file on disk is read once to seed its digest, so reopening
+        a project does not rewrite files that are already up to date.
+
+        Args:
+            path: The destination file path.
+            content: The complete file content.
+
+        Returns:
+            A (temporary path, destination path, digest) tuple for _publish, or
+            None if the file is unchanged and was skipped.
+        """
+        data = content.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        key = str(path)
+
+        known_digest = self._file_digests.get(key)
+        if known_digest is None:
+            try:
+                known_digest = hashlib.blake2b(path.read_bytes(), digest_size=16).digest()
+            except OSError:
+                known_digest = None
+
+        if known_digest == digest:
+            self._file_digests[key] = digest
+            self._files_skipped += 1
+            return None
+
+        # The temporary file lives in the same directory so the final rename
+        # stays on one filesystem and is atomic. Its hidden, non-.typ name keeps
+        # it out of Typst's dependency set.
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # mkstemp creates owner-only files; keeps the permissions the
+            # destination already had (or the usual ones for a new file).
+            try:
+                mode = path.stat().st_mode & 0o777
+            except OSError:
+                mode = 0o644
+            os.chmod(temp_name, mode)
+        except OSError:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+        return Path(temp_name), path, digest
+
+    def _publish(self, staged: list):
+        """
+        Atomically replaces the destination files with their staged versions.
+
+        Args:
+            staged: List of tuples returned by _stage_if_changed, in the order
+                the files should become visible.
+        """
+        for index, (temp_path, path, digest) in enumerate(staged):
+            try:
+                os.replace(temp_path, path)
+            except OSError:
+                self._discard(staged[index:])
+                raise
+            self._file_digests[str(path)] = digest
+            self._files_touched += 1
+
+    def _discard(self, staged: list):
+        """
+        Removes staged temporary files that will not be published.
+
+        Args:
+            staged: List of tuples returned by _stage_if_changed.
+        """
+        for temp_path, _, _ in staged:
+            try:
+                temp_path.unlink(missing_ok=True)
+            except OSError:
+                pass
@@ -4,12 +4,73 @@ Monitors the output directory for generated SVG files from Typst.
 This module provides functionality to watch the output folder for new or updated
 SVG files and emit signals when changes are detected. It maintains a sorted list
 of page SVGs that can be displayed in the preview panel.
+
+The preview is refreshed by the compiles themselves: the ProcessManager
+reports when the watch process of a project starts and finishes compiling,
+and every finished compile triggers exactly one scan, once all pages have
+been written. A scan diffs one batched listing of the directory against the
+previous one; pages whose file changed are read once, and only those whose
+content digest differs are reloaded by the preview. Listing the directory is
+cheap and stays on the GUI thread, while the changed pages are read and
+digested on a reader thread, which posts their revisions back. The bytes it
+read stay pinned in the page cache until the renderer parsed them. The pages
+are kept in a PageModel, which reports only the rows that changed to the
+page view.
+
+File system events are only a fallback, e.g., for a watch process that does
+not report its compiles. A single watch on the output directory reports
+pages being created or deleted (events arriving during a compile are left to
+its completion). Typst rewrites existing pages in place, which does not touch
+the directory, so an adaptive poll catches rewrites nobody reported: it runs
+quickly after activity and backs off to a few seconds when nothing changes,
+so a rewrite is never shown much later than that.
+
+In the PDF preview mode, Typst writes the whole document to
+output/preview.pdf instead. Every new revision of the file is parsed once to
+learn its page count, and one URL per page of it is emitted; PdfPageItem
+renders those pages.
 """
 
+import hashlib
+import os
+import re
+import time
 from pathlib import Path
 from typing import Optional
 
-from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, QUrl, Signal, Slot
+from PySide6.QtCore import Property, QFileSystemWatcher, QObject, QRunnable, QThreadPool, QTimer, QUrl, Signal, Slot
+
+from .page_cache import page_cache
+from .page_model import PageModel
+from .pdf_documents import pdf_documents
+
+# Page files written by Typst watch, e.g. "p12-30.svg" for page 12 of 30
+# ("p12.svg" for output written without the page count).
+_PAGE_PATTERN = re.compile(r"^p(\d+)(?:-(\d+))?\.svg$")
+
+# Preview formats: one SVG file per page, or one PDF for the whole document
+PREVIEW_FORMATS = ("svg", "pdf")
+
+# File Typst watch writes in the PDF preview mode
+PREVIEW_PDF = "preview.pdf"
+
+# Size of the root element of a Typst SVG page, e.g.
+# <svg ... viewBox="0 0 612 792" width="612pt" height="792pt">
+_SVG_VIEWBOX_PATTERN = re.compile(
+    rb"""<svg\b[^>]*?\bviewBox=["']\s*[-\d.]+[\s,]+[-\d.]+[\s,]+([\d.]+)[\s,]+([\d.]+)\s*["']"""
+)
+
+
+class _ReadJob(QRunnable):
+    """Reads the changed pages of a scan on the reader thread."""
+
+    def __init__(self, monitor: "OutputMonitor", scan: dict):
+        super().__init__()
+        self._monitor = monitor
+        self._scan = scan
+
+    def run(self):
+        self._monitor._read(self._scan)
 
 
 class OutputMonitor(QObject):
@@ -17,40 +78,80 @@ class OutputMonitor(QObject):
     Monitors the output directory for SVG file changes.
 
     This class watches the output folder where Typst generates SVG files
-    (p1.svg, p2.svg, etc.) and maintains a sorted list of available pages.
-    It emits signals when the file list changes so the UI can update.
+    (p1-3.svg, p2-3.svg, etc.) and maintains a sorted list of available pages
+    in its page model, which the UI uses as the model of its page view.
     """
 
-    # Signal emitted when the list of output files changes.
-    # Emits a list of absolute file paths in sorted order.
-    filesChanged = Signal(list)
-
     # Signal emitted when a specific page changes (for auto-scrolling).
     # Emits the index of the page (0-based).
     activePageChanged = Signal(int)
 
+    # Signal emitted by the reader thread with the pages a scan read;
+    # delivered on the GUI thread
+    _pagesRead = Signal(object)
+
+    # Bounds of the adaptive poll interval in milliseconds
+    MIN_POLL_INTERVAL = 250
+    MAX_POLL_INTERVAL = 4000
+
+    # Time in milliseconds after which a compile whose end was never
+    # reported stops holding back scans
+    COMPILE_TIMEOUT = 60000
+
     def __init__(self, parent=None):
         """Initializes the OutputMonitor."""
         super().__init__(parent)
         self.project_path: Optional[Path] = None
         self.output_path: Optional[Path] = None
+        self.preview_format = "svg"
         self.watcher = QFileSystemWatcher()
-        self.file_timestamps = {}  # Maps file path to (mtime, cache_buster_timestamp)
+
+        # The pages shown by the preview
+        self.page_model = PageModel(self)
+
+        # Pages of the latest scan in page order, and the state of each page
+        # file: path -> (size, mtime_ns, revision). The revision is a digest of
+        # the page's content, followed by the page's width and height. In the
+        # PDF preview mode, every page is the PDF file, whose revision is a
+        # digest of the whole file, and the sizes of its pages are kept apart.
+        self._files: list[str] = []
+        self._page_states: dict[str, tuple] = {}
+        self._pdf_page_sizes: list[tuple] = []
+
+        # Work done by the monitor, see get_stats()
+        self._counters = {"scans": 0, "stats": 0, "events": 0, "polls": 0, "changes": 0, "compiles": 0,
+                          "reads": 0, "pruned": 0}
+
+        # Changed pages are read on a thread of their own, one scan at a
+        # time. Scans asked for while one is reading are merged into one
+        # (force, prune) scan that runs once it is done. Forgetting the pages
+        # bumps the generation, which drops the results of older scans.
+        self._reader = QThreadPool(self)
+        self._reader.setMaxThreadCount(1)
+        self._reading = False
+        self._pending_scan: Optional[tuple[bool, bool]] = None
+        self._generation = 0
+        self._pagesRead.connect(self._on_pages_read)
+
+        # When the compile of the monitored project that is writing pages
+        # started (time.monotonic()), or None
+        self._compiling_since: Optional[float] = None
 
         # Connects the file system watcher to our handler
         self.watcher.directoryChanged.connect(self._on_directory_changed)
-        self.watcher.fileChanged.connect(self._on_file_changed)
 
-        # Debounce timer to aggregate rapid file changes
+        # Debounce timer to aggregate rapid directory events
         self.debounce_timer = QTimer()
         self.debounce_timer.setSingleShot(True)
         self.debounce_timer.setInterval(200)  # Wait 200ms for batch updates to settle
         self.debounce_timer.timeout.connect(self._scan_and_emit)
 
-        # Polling timer as fallback when QFileSystemWatcher doesn't detect changes
+        # Adaptive poll finding pages rewritten in place. The interval doubles
+        # after every poll that finds no change.
+        self._poll_interval = self.MIN_POLL_INTERVAL
         self.poll_timer = QTimer()
-        self.poll_timer.setInterval(500)  # Poll less frequently since we watch files directly
-        self.poll_timer.timeout.connect(self._check_for_changes)
+        self.poll_timer.setSingleShot(True)
+        self.poll_timer.timeout.connect(self._poll)
 
     @Slot(str)
     def set_project_path(self, project_path: str):
@@ -61,13 +162,9 @@ class OutputMonitor(QObject):
             project_path: The absolute path to the project directory.
         """
         # Stops watching previous paths
-        if self.watcher.directories():
-            self.watcher.removePaths(self.watcher.directories())
-        if self.watcher.files():
-            self.watcher.removePaths(self.watcher.files())
-        
-        # Stop any existing polling timers before starting a new one
-        self.poll_timer.stop()
+        self.stop_monitoring()
+        self._forget_pages()
+        self._compiling_since = None
 
         self.project_path = Path(project_path)
         self.output_path = self.project_path / "output"
@@ -80,11 +177,27 @@ class OutputMonitor(QObject):
         # Starts watching the output directory
         self.watcher.addPath(str(self.output_path))
 
-        # Performs initial scan to populate the file list and watch existing files
-        self._scan_and_emit()
+        # Performs initial scan to populate the file list
+        self._scan_and_emit(force=True)
 
-        # Starts the polling timer as fallback
-        self.poll_timer.start()
+        # Starts the polling fallback
+        self.notify_activity()
+
+    @Slot(str)
+    def set_preview_format(self, preview_format: str):
+        """
+        Sets which files the watch process writes the preview to.
+
+        Args:
+            preview_format: "svg" for one file per page, or "pdf".
+        """
+        if preview_format not in PREVIEW_FORMATS or preview_format == self.preview_format:
+            return
+        self.preview_format = preview_format
+        self._forget_pages()
+        if self.output_path:
+            self._scan_and_emit(force=True)
+            self.notify_activity()
 
     @Slot()
     def stop_monitoring(self):
@@ -93,12 +206,62 @@ class OutputMonitor(QObject):
         self.debounce_timer.stop()
 
         watched_dirs = self.watcher.directories()
-        watched_files = self.watcher.files()
-
         if watched_dirs:
             self.watcher.removePaths(watched_dirs)
-        if watched_files:
-            self.watcher.removePaths(watched_files)
+
+    @Slot()
+    def shutdown(self):
+        """Stops monitoring and waits for the reader thread to finish."""
+        self.stop_monitoring()
+        self._generation += 1
+        self._pending_scan = None
+        self._reader.waitForDone()
+
+    @Slot()
+    def notify_activity(self):
+        """
+        Polls quickly again, e.g., because pages were created.
+
+        The poll interval backs off again once the output stops changing.
+        """
+        if not self.output_path:
+            return
+        self._poll_interval = self.MIN_POLL_INTERVAL
+        self.poll_timer.start(self._poll_interval)
+
+    @Slot(str)
+    def on_compile_started(self, project_path: str):
+        """
+        Holds back file system events while a compile writes the pages.
+
+        Args:
+            project_path: The project being compiled.
+        """
+        if not self._is_monitored(project_path):
+            return
+        self._compiling_since = time.monotonic()
+        self.debounce_timer.stop()
+
+    @Slot(str, bool)
+    def on_compile_finished(self, project_path: str, success: bool):
+        """
+        Scans the output once a compile of the monitored project finished.
+
+        Args:
+            project_path: The project that was compiled.
+            success: Whether the compile succeeded.
+        """
+        if not self._is_monitored(project_path):
+            return
+        self._compiling_since = None
+        self._counters["compiles"] += 1
+        self.debounce_timer.stop()
+        self._scan_and_emit(prune=True)
+
+    @Property(QObject, constant=True)
+    def pages(self):
+        """Gets the page model of the preview."""
+        return self.page_model
 
     @Slot(result=list)
     def get_output_files(self):
@@ -106,16 +269,40 @@ class OutputMonitor(QObject):
         Gets the current list of output SVG files.
 
         Returns:
-            A sorted list of absolute file paths (as strings) for all SVG files
-            in the output directory, ordered by page number (p1, p2, p3, ...).
+            A sorted list of file:// URLs for all SVG pages in the output
+            directory, ordered by page number (p1, p2, p3, ...), each with
+            the revision of its content. Pages left over from a compile with
+            another page count are not included. Pages not read yet are
+            missing; the page model gets them once they are.
         """
         if not self.output_path or not self.output_path.exists():
             return []
 
-        files = self._get_sorted_svg_files()
-        # Converts Path objects to file:// URLs for QML Image with per-file cache busting
-        urls, _ = self._build_urls_with_cache_busting(files)
-        return urls
+        if not self._files:
+            self._scan_and_emit()
+        return self.page_model.urls()
+
+    @Slot(result=dict)
+    def get_stats(self):
+        """
+        Gets counters of the work done by the monitor.
+
+        Returns:
+            A dictionary with the number of directory scans ("scans"), files
+            stat'ed ("stats"), directory events handled ("events"), polls
+            ("polls"), scans that found changes ("changes"), finished
+            compiles reported ("compiles"), page files read ("reads") and
+            stale page files deleted ("pruned"), the
+            current poll interval in milliseconds ("poll_interval"), the
+            number of pages ("pages"), the page cache statistics ("cache") and
+            the updates of the page model ("model").
+        """
+        stats = dict(self._counters)
+        stats["poll_interval"] = self._poll_interval
+        stats["pages"] = len(self._files)
+        stats["cache"] = page_cache.stats()
+        stats["model"] = self.page_model.stats()
+        return stats
 
     def _on_directory_changed(self, path: str):
         """
@@ -124,147 +311,391 @@ class OutputMonitor(QObject):
         Args:
             path: The path of the directory that changed.
         """
+        self._counters["events"] += 1
+        if self._is_compiling():
+            # The end of the compile triggers the scan.
+            return
         self.debounce_timer.start()
 
-    def _on_file_changed(self, path: str):
+        # Pages being created means Typst is writing; rewrites may follow.
+        self.notify_activity()
+
+    def _is_monitored(self, project_path: str) -> bool:
         """
-        Handles file change events.
+        Checks if a project is the one whose output is monitored.
 
         Args:
-            path: The path of the file that changed.
+            project_path: The project directory.
         """
-        self.debounce_timer.start()
+        if not self.project_path or not project_path:
+            return False
+        return Path(project_path).resolve() == self.project_path.resolve()
 
-    def _check_for_changes(self):
+    def _is_compiling(self) -> bool:
         """
-        Polls for file changes (fallback for when QFileSystemWatcher doesn't work).
+        Checks if a compile of the monitored project is writing pages.
 
-        Checks modification times of all files and triggers scan if any changed.
+        A compile whose end was never reported (e.g., because the process was
+        killed) stops counting after COMPILE_TIMEOUT.
         """
-        if not self.output_path or not self.output_path.exists():
+        if self._compiling_since is None:
+            return False
+        return (time.monotonic() - self._compiling_since) * 1000 < self.COMPILE_TIMEOUT
+
+    def _poll(self):
+        """Scans for pages rewritten in place and adapts the poll interval."""
+        if self._is_compiling():
+            # Half-written pages are not scanned.
+            self.poll_timer.start(self._poll_interval)
             return
 
-        files = self._get_sorted_svg_files()
-
-        # Checks if any file modification times changed
-        for file_path in files:
-            file_key = str(file_path)
-            try:
-                current_mtime = file_path.stat().st_mtime
-
-                if file_key in self.file_timestamps:
-                    stored_mtime, _ = self.file_timestamps[file_key]
-                    if current_mtime != stored_mtime:
-                        # File changed - trigger scan
-                        self.debounce_timer.start()
-                        return
-            except OSError:
-                pass
-
-
+        self._counters["polls"] += 1
+        if self._scan_and_emit():
+            self._poll_interval = self.MIN_POLL_INTERVAL
+        else:
+            self._poll_interval = min(self._poll_interval * 2, self.MAX_POLL_INTERVAL)
+        self.poll_timer.start(self._poll_interval)
 
+    def _scan_and_emit(self, force: bool = False, prune: bool = False) -> bool:
+        """
+        Scans the output directory and updates the page model if it changed.
 
-    def _scan_and_emit(self):
-        """Scans the output directory and emits the updated file list."""
-        files = self._get_sorted_svg_files()
+        Changed SVG pages are handed to the reader thread, and the page model
+        is updated once they are read (see _on_pages_read()). While a scan is
+        reading, further scans are merged into one that runs after it.
 
-        if files:
-            # Ensure all output files are being watched directly
-            current_watched = set(self.watcher.files())
-            for file_path in files:
-                path_str = str(file_path)
-                if path_str not in current_watched:
-                    self.watcher.addPath(path_str)
+        Args:
+            force: Updates the page model even if nothing changed.
+            prune: Deletes stale page files (see _list_pages()).
 
-            # Builds URLs with per-file cache busting (only changed files get new timestamps)
-            file_urls, changed_index = self._build_urls_with_cache_busting(files)
-            self.filesChanged.emit(file_urls)
+        Returns:
+            True if any page was added, removed or modified, as far as known
+            without reading pages.
+        """
+        if not self.output_path:
+            return False
+        if self.preview_format == "pdf":
+            changed, changed_index = self._scan_pdf()
+            if changed or force:
+                self.page_model.set_pages(self._page_rows())
+            return changed
+
+        if self._reading:
+            pending_force, pending_prune = self._pending_scan or (False, False)
+            self._pending_scan = (force or pending_force, prune or pending_prune)
+            return False
+
+        pages = self._list_pages(prune)
+        unread = []
+        for _, path, size, mtime_ns in pages:
+            previous = self._page_states.get(path)
+            if previous is None or previous[:2] != (size, mtime_ns):
+                unread.append(path)
+        if not unread:
+            return self._apply(pages, {}, force)
+
+        self._reading = True
+        scan = {"generation": self._generation, "pages": pages, "unread": unread, "force": force}
+        self._reader.start(_ReadJob(self, scan))
+        return False
+
+    def _list_pages(self, prune: bool = False) -> list[tuple]:
+        """
+        Lists the current page files in one pass.
 
-            if changed_index != -1:
-                self.activePageChanged.emit(changed_index)
-        else:
-            self.filesChanged.emit([])
+        The current pages are the newest complete set of one compile (see
+        _select_total()). Pruning is only asked for by the scan after a
+        finished compile, when that compile's pages are complete: the files
+        of other page counts written before them are stale and are deleted.
+        Files written after them may belong to a compile in progress and are
+        kept.
 
-    def _get_sorted_svg_files(self) -> list[Path]:
-        """
-        Gets a sorted list of SVG files from the output directory.
+        Args:
+            prune: Deletes stale page files.
 
         Returns:
-            A list of Path objects for SVG files, sorted by page number.
+            The (page, path, size, mtime_ns) tuples of the current pages, in
+            page order.
         """
-        if not self.output_path or not self.output_path.exists():
-            return []
+        self._counters["scans"] += 1
+
+        # Page files grouped by the page count in their name (None for files
+        # named without one)
+        groups: dict[Optional[int], list] = {}
+        try:
+            with os.scandir(self.output_path) as entries:
+                for entry in entries:
+                    match = _PAGE_PATTERN.match(entry.name)
+                    if not match:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    self._counters["stats"] += 1
+                    total = int(match.group(2)) if match.group(2) else None
+                    groups.setdefault(total, []).append(
+                        (int(match.group(1)), entry.path, stat.st_size, stat.st_mtime_ns)
+                    )
+        except OSError:
+            pass
+
+        total, complete = self._select_total(groups)
+        pages = sorted(groups.pop(total, []))
+        if prune and complete:
+            written = max(mtime_ns for _, _, _, mtime_ns in pages)
+            self._prune([page for stale in groups.values() for page in stale if page[3] <= written])
+        return pages
+
+    def _read(self, scan: dict):
+        """
+        Reads and digests the changed pages of a scan on the reader thread.
 
-        # Finds all SVG files matching the pattern p*.svg
-        svg_files = list(self.output_path.glob("p*.svg"))
+        The digest is the page's revision, used as the URL's cache buster,
+        so only pages whose bytes actually changed reload in QML. The bytes
+        are pinned in the page cache under their revision, so the renderer
+        parses exactly the bytes the revision was computed from.
 
-        # Sorts by extracting the page number from the filename
-        def get_page_number(path: Path) -> int:
-            """Extracts the page number from a filename like 'p1.svg'."""
+        Args:
+            scan: The scan, whose "unread" page files are read. Their states
+                are added to it as "states".
+        """
+        states = {}
+        for path in scan["unread"]:
             try:
-                # Removes 'p' prefix and '.svg' suffix, then converts to int
-                name = path.stem  # Gets filename without extension (e.g., "p1")
-                if name.startswith('p'):
-                    return int(name[1:])  # Removes 'p' and converts to int
-                return 0
-            except (ValueError, IndexError):
-                return 0
+                with open(path, "rb") as f:
+                    stat = os.fstat(f.fileno())
+                    data = f.read()
+            except OSError:
+                continue
+            revision = hashlib.blake2b(data, digest_size=8).hexdigest()
+            page_cache.put(revision, data, pin=True)
+            states[path] = (stat.st_size, stat.st_mtime_ns, revision) + self._svg_size(data)
+        scan["states"] = states
+        self._pagesRead.emit(scan)
+
+    def _on_pages_read(self, scan: dict):
+        """
+        Applies the pages read by the reader thread, then runs the scans
+        asked for meanwhile.
 
-        svg_files.sort(key=get_page_number)
-        return svg_files
+        Args:
+            scan: The scan, with the states of the pages read.
+        """
+        self._reading = False
+        if scan["generation"] == self._generation:
+            self._counters["reads"] += len(scan["states"])
+            if self._apply(scan["pages"], scan["states"], scan["force"]) and self.poll_timer.isActive():
+                self.notify_activity()
+        else:
+            # The pages were forgotten meanwhile
+            shown = {state[2] for state in self._page_states.values()}
+            for state in scan["states"].values():
+                if state[2] not in shown:
+                    page_cache.discard(state[2])
+
+        if self._pending_scan is not None:
+            force, prune = self._pending_scan
+            self._pending_scan = None
+            self._scan_and_emit(force, prune)
+
+    def _apply(self, pages: list[tuple], read: dict, force: bool) -> bool:
+        """
+        Diffs the pages of a scan with the previous scan and updates the
+        page model if they changed.
+
+        Args:
+            pages: The (page, path, size, mtime_ns) tuples of the pages.
+            read: The states of the pages read by the scan, by path. The
+                other pages are unchanged since the previous scan.
+            force: Updates the page model even if nothing changed.
 
-    def _build_urls_with_cache_busting(self, files: list[Path]) -> tuple[list[str], int]:
+        Returns:
+            True if any page was added, removed or modified.
+        """
+        page_states = {}
+        for _, path, _, _ in pages:
+            state = read.get(path, self._page_states.get(path))
+            if state is not None:
+                page_states[path] = state
+
+        # Pages are compared by position: a page whose file was renamed
+        # because the page count changed, but whose content is the same, is
+        # not a change.
+        files = [path for _, path, _, _ in pages if path in page_states]
+        previous_revisions = [self._page_states[path][2] for path in self._files]
+        first_changed_index = -1
+        for index, path in enumerate(files):
+            revision = page_states[path][2]
+            if index >= len(previous_revisions) or previous_revisions[index] != revision:
+                if index < len(previous_revisions):
+                    print(f"OutputMonitor: File modified - {Path(path).name}")
+                first_changed_index = index
+                break
+        changed = first_changed_index != -1 or files != self._files
+
+        # Drops the cached bytes of revisions no page shows anymore, and
+        # unpins the ones read again that were already handed to the renderer
+        current = {state[2] for state in page_states.values()}
+        previous = {state[2] for state in self._page_states.values()}
+        for revision in previous - current:
+            page_cache.discard(revision)
+        for state in read.values():
+            if state[2] in previous:
+                page_cache.unpin(state[2])
+
+        self._files = files
+        self._page_states = page_states
+        if changed:
+            self._counters["changes"] += 1
+        if changed or force:
+            self.page_model.set_pages(self._page_rows())
+        if first_changed_index != -1:
+            self.activePageChanged.emit(first_changed_index)
+        return changed
+
+    @staticmethod
+    def _select_total(groups: dict) -> tuple[Optional[int], bool]:
         """
-        Builds file:// URLs with per-file cache busting timestamps.
+        Picks the page count of the current output.
 
-        Only files that have been modified get new timestamps, so only those
-        images will reload in QML. Unchanged files keep their old timestamps
-        and won't reload.
+        Every compile writes its pages named with its page count, so the
+        current pages are the newest group that has all of its pages. A group
+        of files named without a page count is complete if its pages are
+        numbered without gaps.
 
         Args:
-            files: List of Path objects for SVG files
+            groups: Maps each page count to its (page, path, size, mtime_ns)
+                tuples.
 
         Returns:
             Tuple containing:
-            - List of file:// URLs with cache-busting query parameters
-            - Index of the first file that changed (or -1 if none changed)
+            - The page count of the current pages (None for files named
+              without one)
+            - Whether that group is complete
         """
-        import time
+        def is_complete(total, pages):
+            numbers = {page for page, _, _, _ in pages}
+            return numbers == set(range(1, (total or len(pages)) + 1))
 
-        urls = []
-        current_time = int(time.time() * 1000)  # Millisecond timestamp
-        last_changed_index = -1
+        def newest(item):
+            return max(mtime_ns for _, _, _, mtime_ns in item[1])
 
-        for idx, file_path in enumerate(files):
-            file_key = str(file_path)
+        complete = [item for item in groups.items() if is_complete(*item)]
+        if complete:
+            return max(complete, key=newest)[0], True
+        if groups:
+            return max(groups.items(), key=newest)[0], False
+        return None, False
 
+    def _prune(self, stale: list):
+        """
+        Deletes page files left over from compiles with another page count.
+
+        Args:
+            stale: The (page, path, size, mtime_ns) tuples of the files.
+        """
+        for _, path, _, _ in stale:
             try:
-                # Gets the current modification time of the file
-                current_mtime = file_path.stat().st_mtime
-
-                if file_key in self.file_timestamps:
-                    stored_mtime, cache_buster = self.file_timestamps[file_key]
-
-                    # Only updates cache buster if file was actually modified
-                    if current_mtime != stored_mtime:
-                        print(f"OutputMonitor: File modified - {file_path.name}")
-                        cache_buster = current_time
-                        self.file_timestamps[file_key] = (current_mtime, cache_buster)
-                        last_changed_index = idx
-                else:
-                    # New file - initialize with current time
-                    cache_buster = current_time
-                    self.file_timestamps[file_key] = (current_mtime, cache_buster)
-                    last_changed_index = idx
-
-                # Builds URL with the file's specific cache buster
-                base_url = QUrl.fromLocalFile(file_key).toString()
-                url = f"{base_url}?t={cache_buster}"
-                urls.append(url)
+                os.remove(path)
+                self._counters["pruned"] += 1
+            except OSError as e:
+                print(f"Warning: Could not remove stale page {Path(path).name}: {e}")
 
-            except OSError:
-                # Fallback: use current time as cache buster
-                base_url = QUrl.fromLocalFile(file_key).toString()
-                urls.append(f"{base_url}?t={current_time}")
+    def _scan_pdf(self) -> tuple[bool, int]:
+        """
+        Checks the preview PDF for a new revision.
+
+        A new revision is parsed once, and its page count becomes the list
+        of pages. A file that cannot be parsed (e.g., because Typst is still
+        writing it) is not taken; the next scan tries again.
 
-        return urls, last_changed_index
\ No newline at end of file
+        Returns:
+            Tuple containing:
+            - Whether a new revision of the PDF was found, or it was removed
+            - -1, as a compile changes the file of every page
+        """
+        self._counters["scans"] += 1
+        path = str(self.output_path / PREVIEW_PDF)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            changed = bool(self._files)
+            self._forget_pages()
+            return changed, -1
+        self._counters["stats"] += 1
+
+        previous = self._page_states.get(path)
+        if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+            return False, -1
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return False, -1
+        self._counters["reads"] += 1
+        revision = hashlib.blake2b(data, digest_size=8).hexdigest()
+        if previous is not None and previous[2] == revision:
+            self._page_states[path] = (stat.st_size, stat.st_mtime_ns, revision)
+            return False, -1
+
+        document = pdf_documents.load(revision, data)
+        if document is None:
+            return False, -1
+        self._forget_pages()
+        self._files = [path] * document.pageCount()
+        self._page_states = {path: (stat.st_size, stat.st_mtime_ns, revision)}
+        self._pdf_page_sizes = []
+        for page in range(document.pageCount()):
+            size = document.pagePointSize(page)
+            self._pdf_page_sizes.append((size.width(), size.height()))
+        self._counters["changes"] += 1
+        return True, -1
+
+    def _forget_pages(self):
+        """Drops the pages of the latest scan, their cached content and the scans in progress."""
+        self._generation += 1
+        self._pending_scan = None
+        for state in self._page_states.values():
+            page_cache.discard(state[2])
+            pdf_documents.discard(state[2])
+        self._files = []
+        self._page_states = {}
+        self._pdf_page_sizes = []
+
+    def _page_rows(self) -> list[tuple]:
+        """
+        Builds the rows of the page model.
+
+        Returns:
+            (url, revision, width, height) tuples. The file:// URL carries the
+            revision in a "rev" query parameter, and the page index ("page")
+            in the PDF preview mode.
+        """
+        rows = []
+        for index, path in enumerate(self._files):
+            state = self._page_states[path]
+            url = f"{QUrl.fromLocalFile(path).toString()}?rev={state[2]}"
+            if self.preview_format == "pdf":
+                url += f"&page={index}"
+                width, height = self._pdf_page_sizes[index]
+            else:
+                width, height = state[3:5]
+            rows.append((url, state[2], width, height))
+        return rows
+
+    @staticmethod
+    def _svg_size(data: bytes) -> tuple:
+        """
+        Reads the natural size of an SVG page from its root element.
+
+        Args:
+            data: The SVG file's bytes.
+
+        Returns:
+            A (width, height) tuple, (0.0, 0.0) if the size is not found.
+        """
+        match = _SVG_VIEWBOX_PATTERN.search(data, 0, 4096)
+        if not match:
+            return 0.0, 0.0
+        return float(match.group(1)), float(match.group(2))
@@ -0,0 +1,230 @@
+"""
+Provides the Typst packages used by the templates without network waits.
+
+Generated documents import Typst packages (e.g., @preview/versatile-apa).
+Typst downloads a package the first time it is imported, so the first
+compile on a fresh machine stalls on the network. The PackageCache points
+every Typst process Ergo starts at the cache folder the typst command line
+uses (TYPST_PACKAGE_CACHE_PATH if set, otherwise Typst's default cache
+location), so packages the user already downloaded are reused, and
+prefetch() fills it in the background with the packages the templates
+declare in their template.json, once at startup.
+
+No packages are shipped with the application: a machine that never had
+network access cannot compile documents importing them.
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QProcess, QProcessEnvironment, QStandardPaths, Signal, Slot
+
+# A package specification, e.g., "@preview/versatile-apa:7.1.5".
+_SPEC_PATTERN = re.compile(r"^@([a-z0-9_-]+)/([a-zA-Z0-9_-]+):(\d+\.\d+\.\d+)$")
+
+
+def parse_package_spec(spec: str) -> Optional[tuple]:
+    """
+    Splits a package specification into its parts.
+
+    Args:
+        spec: The specification, e.g., "@preview/versatile-apa:7.1.5".
+
+    Returns:
+        A (namespace, name, version) tuple, or None if the spec is invalid.
+    """
+    match = _SPEC_PATTERN.match(spec.strip())
+    return match.groups() if match else None
+
+
+def default_cache_dir() -> Path:
+    """
+    Returns the package cache folder the typst command line uses.
+
+    This is TYPST_PACKAGE_CACHE_PATH if it is set, and otherwise the
+    "typst/packages" folder in the platform's cache location (the local
+    application data folder on Windows).
+    """
+    configured = os.environ.get("TYPST_PACKAGE_CACHE_PATH")
+    if configured:
+        return Path(configured)
+    if sys.platform == "win32":
+        location = QStandardPaths.StandardLocation.GenericDataLocation
+    else:
+        location = QStandardPaths.StandardLocation.GenericCacheLocation
+    return Path(QStandardPaths.writableLocation(location)) / "typst" / "packages"
+
+
+class PackageCache(QObject):
+    """
+    Owns the package cache folder passed to Typst and prefetches missing packages.
+    """
+
+    # Signal emitted when a prefetch finished.
+    prefetchFinished = Signal(bool)  # Emits whether every package is available
+
+    def __init__(self, executable_resolver: Callable[[], Optional[str]], cache_dir: Optional[Path] = None,
+                 parent=None):
+        """
+        Initializes the PackageCache.
+
+        Args:
+            executable_resolver: Callable returning the Typst executable path.
+            cache_dir: Folder downloaded packages are stored in. Defaults to
+                the cache folder of the typst command line (see
+                default_cache_dir()).
+            parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self._resolve_executable = executable_resolver
+        self.cache_dir = cache_dir or default_cache_dir()
+
+        # The running prefetch and its temporary folder.
+        self._process: Optional[QProcess] = None
+        self._stub_dir: Optional[str] = None
+
+    def environment(self) -> QProcessEnvironment:
+        """
+        Returns the environment Typst processes are started with.
+
+        Returns:
+            The system environment with the package cache folder set.
+        """
+        environment = QProcessEnvironment.systemEnvironment()
+        environment.insert("TYPST_PACKAGE_CACHE_PATH", str(self.cache_dir))
+        return environment
+
+    def is_available(self, spec: str) -> bool:
+        """
+        Checks if a package is already downloaded.
+
+        Args:
+            spec: The package specification.
+
+        Returns:
+            True if Typst can use the package without downloading it.
+        """
+        parts = parse_package_spec(spec)
+        if parts is None:
+            return False
+        return (self.cache_dir / Path(*parts) / "typst.toml").is_file()
+
+    def missing(self, specs: list) -> list:
+        """
+        Filters the packages that still have to be downloaded.
+
+        Args:
+            specs: Package specifications.
+
+        Returns:
+            The valid specifications that are not available, without duplicates.
+        """
+        missing = []
+        for spec in specs:
+            if spec in missing:
+                continue
+            if parse_package_spec(spec) is None:
+                print(f"Warning: Ignoring invalid Typst package '{spec}'.")
+            elif not self.is_available(spec):
+                missing.append(spec)
+        return missing
+
+    @Slot(list)
+    def prefetch(self, specs: list):
+        """
+        Downloads the missing packages in the background.
+
+        Typst has no command to only download packages, so a stub document
+        importing them is compiled into a temporary folder.
+
+        Args:
+            specs: Package specifications, e.g., from the templates.
+        """
+        if self._process is not None:
+            return
+
+        missing = self.missing(specs)
+        if not missing:
+            self.prefetchFinished.emit(True)
+            return
+
+        executable_path = self._resolve_executable()
+        if not executable_path:
+            self.prefetchFinished.emit(False)
+            return
+
+        self._stub_dir = tempfile.mkdtemp(prefix="ergo-prefetch-")
+        stub = "".join(f'#import "{spec}"\n' for spec in missing)
+        (Path(self._stub_dir) / "main.typ").write_text(stub, encoding="utf-8")
+
+        print(f"Prefetching Typst packages: {', '.join(missing)}")
+        process = QProcess(self)
+        process.setWorkingDirectory(self._stub_dir)
+        process.setProcessEnvironment(self.environment())
+        process.finished.connect(lambda exit_code, exit_status: self._on_prefetch_finished(missing))
+        process.errorOccurred.connect(lambda error: self._on_prefetch_error(missing, error))
+        self._process = process
+        process.start(executable_path, ["compile", "main.typ", "main.pdf"])
+
+    @Slot(result=bool)
+    def is_prefetching(self):
+        """Returns True while a prefetch is running."""
+        return self._process is not None
+
+    @Slot()
+    def cancel(self):
+        """Stops a running prefetch, e.g., when the application quits."""
+        if self._process is None:
+            return
+        process = self._process
+        self._process = None
+        process.kill()
+        process.waitForFinished(1000)
+        self._cleanup(process)
+
+    def _on_prefetch_finished(self, specs: list):
+        """
+        Reports the outcome of a prefetch.
+
+        Args:
+            specs: The packages that were fetched.
+        """
+        process = self._process
+        if process is None:
+            return
+        self._process = None
+
+        missing = self.missing(specs)
+        if missing:
+            error_output = process.readAllStandardError().data().decode("utf-8", errors="replace")
+            print(f"Warning: Could not prefetch Typst packages {', '.join(missing)}:\n{error_output}")
+        self._cleanup(process)
+        self.prefetchFinished.emit(not missing)
+
+    def _on_prefetch_error(self, specs: list, error):
+        """
+        Handles a prefetch process that could not be started.
+
+        Args:
+            specs: The packages that were fetched.
+            error: The QProcess.ProcessError enum value.
+        """
+        if error == QProcess.ProcessError.FailedToStart:
+            self._on_prefetch_finished(specs)
+
+    def _cleanup(self, process: QProcess):
+        """
+        Releases a finished prefetch process and its temporary folder.
+
+        Args:
+            process: The finished process.
+        """
+        process.deleteLater()
+        if self._stub_dir:
+            shutil.rmtree(self._stub_dir, ignore_errors=True)
+            self._stub_dir = None
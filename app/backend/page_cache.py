@@ -0,0 +1,149 @@
+"""
+Shares the bytes of the preview pages between the monitor and the renderer.
+
+The OutputMonitor reads every new or changed page file once, off the GUI
+thread, to compute its content digest (the page's revision). The bytes it
+read are kept here, keyed by revision, and pinned: they are not evicted
+until the render pool parsed them (or the monitor discards the revision), so
+the renderer parses exactly the bytes the revision was computed from,
+without reading the file again. Parsed pages are unpinned and kept as long
+as the size bound allows; the least recently used are dropped first and are
+read from disk again if needed.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class PageCache:
+    """
+    A size-bounded LRU cache of page contents, keyed by revision.
+
+    Thread-safe, so pages can be rendered off the GUI thread.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initializes the PageCache.
+
+        Args:
+            max_bytes: Total size of the cached pages at most.
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pages: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        # Revisions not parsed yet, and their total size, which does not
+        # count toward max_bytes
+        self._pinned: set[str] = set()
+        self._pinned_bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def put(self, revision: str, data: bytes, pin: bool = False):
+        """
+        Stores the content of a page revision.
+
+        Args:
+            revision: The content digest of the page.
+            data: The page file's bytes.
+            pin: Keeps the bytes until unpin() or discard().
+        """
+        with self._lock:
+            self._remove(revision)
+            self._pages[revision] = data
+            self._bytes += len(data)
+            if pin:
+                self._pinned.add(revision)
+                self._pinned_bytes += len(data)
+            self._evict()
+
+    def unpin(self, revision: str):
+        """
+        Lets a revision be evicted again, e.g., because it was parsed.
+
+        Args:
+            revision: The content digest of the page.
+        """
+        with self._lock:
+            if revision in self._pinned:
+                self._pinned.discard(revision)
+                self._pinned_bytes -= len(self._pages[revision])
+                self._evict()
+
+    def get(self, revision: str) -> Optional[bytes]:
+        """
+        Gets the content of a page revision.
+
+        Args:
+            revision: The content digest of the page.
+
+        Returns:
+            The bytes, or None if the revision is not cached.
+        """
+        with self._lock:
+            data = self._pages.get(revision)
+            if data is None:
+                self._misses += 1
+                return None
+            self._pages.move_to_end(revision)
+            self._hits += 1
+            return data
+
+    def discard(self, revision: str):
+        """
+        Drops a revision, e.g., because its page no longer exists.
+
+        Args:
+            revision: The content digest of the page.
+        """
+        with self._lock:
+            self._remove(revision)
+
+    def clear(self):
+        """Drops every page."""
+        with self._lock:
+            self._pages.clear()
+            self._bytes = 0
+            self._pinned.clear()
+            self._pinned_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Describes the cache.
+
+        Returns:
+            A dictionary with the number of cached pages ("pages"), their
+            total size ("bytes"), the number of pinned pages ("pinned") and
+            the lookups that found or missed a page ("hits", "misses").
+        """
+        with self._lock:
+            return {"pages": len(self._pages), "bytes": self._bytes, "pinned": len(self._pinned),
+                    "hits": self._hits, "misses": self._misses}
+
+    def _remove(self, revision: str):
+        """Removes a revision, with the lock held."""
+        data = self._pages.pop(revision, None)
+        if data is None:
+            return
+        self._bytes -= len(data)
+        if revision in self._pinned:
+            self._pinned.discard(revision)
+            self._pinned_bytes -= len(data)
+
+    def _evict(self):
+        """Drops the least recently used unpinned pages over the bound, with the lock held."""
+        excess = self._bytes - self._pinned_bytes - self.max_bytes
+        if excess <= 0:
+            return
+        for revision in [revision for revision in self._pages if revision not in self._pinned]:
+            if excess <= 0 or len(self._pages) <= 1:
+                break
+            size = len(self._pages.pop(revision))
+            self._bytes -= size
+            excess -= size
+
+
+# The cache shared by the OutputMonitor and every SvgItem
+page_cache = PageCache()
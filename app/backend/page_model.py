@@ -0,0 +1,169 @@
+"""
+List model of the preview pages.
+
+The OutputMonitor keeps the pages of the latest scan in a PageModel, which
+the preview's page view uses as its model. Every scan hands the model the
+complete page list; the model compares it with the rows it has and only
+reports the differences (changed rows, rows appended or removed at the end),
+so QML only updates the delegates of the pages that changed instead of
+recreating every page. A page whose file was renamed with the same content
+only gets its new URL.
+"""
+
+from PySide6.QtCore import Property, QAbstractListModel, QByteArray, QModelIndex, Qt, Signal, Slot
+
+
+class PageModel(QAbstractListModel):
+    """
+    One row per preview page, in page order.
+
+    Roles:
+        url: The file:// URL of the page, with its revision.
+        revision: The content digest of the page.
+        pageWidth, pageHeight: The natural size of the page in points, or 0
+            if unknown. (Named so they do not shadow a delegate's own width
+            and height.)
+    """
+
+    UrlRole = Qt.ItemDataRole.UserRole + 1
+    RevisionRole = Qt.ItemDataRole.UserRole + 2
+    WidthRole = Qt.ItemDataRole.UserRole + 3
+    HeightRole = Qt.ItemDataRole.UserRole + 4
+
+    # Columns of a row tuple, by role
+    _COLUMNS = {UrlRole: 0, RevisionRole: 1, WidthRole: 2, HeightRole: 3}
+
+    # Signal emitted when the number of pages changes
+    countChanged = Signal()
+
+    def __init__(self, parent=None):
+        """Initializes an empty PageModel."""
+        super().__init__(parent)
+        # (url, revision, width, height) tuples
+        self._rows: list[tuple] = []
+
+        # Rows reported as changed, renamed, inserted and removed since
+        # creation
+        self._counters = {"updates": 0, "changed": 0, "renamed": 0, "inserted": 0, "removed": 0}
+
+    def rowCount(self, parent=QModelIndex()):
+        """Returns the number of pages."""
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        """
+        Returns a role of a page.
+
+        Args:
+            index: The index of the page.
+            role: One of the roles of the model (DisplayRole gives the URL).
+        """
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            role = self.UrlRole
+        column = self._COLUMNS.get(role)
+        return None if column is None else self._rows[index.row()][column]
+
+    def roleNames(self):
+        """Returns the role names used by QML delegates."""
+        return {
+            self.UrlRole: QByteArray(b"url"),
+            self.RevisionRole: QByteArray(b"revision"),
+            self.WidthRole: QByteArray(b"pageWidth"),
+            self.HeightRole: QByteArray(b"pageHeight"),
+        }
+
+    @Property(int, notify=countChanged)
+    def count(self):
+        """Gets the number of pages."""
+        return len(self._rows)
+
+    @Slot(int, result=str)
+    def url_at(self, row: int) -> str:
+        """
+        Gets the URL of a page.
+
+        Args:
+            row: The page index.
+
+        Returns:
+            The URL, or an empty string for an invalid index.
+        """
+        return self._rows[row][0] if 0 <= row < len(self._rows) else ""
+
+    def urls(self) -> list[str]:
+        """Returns the URLs of every page, in page order."""
+        return [row[0] for row in self._rows]
+
+    def set_pages(self, rows: list[tuple]):
+        """
+        Replaces the pages, reporting only the differences.
+
+        Rows present before and after are compared by position. Runs of rows
+        whose content (revision or size) changed are reported with one
+        dataChanged each; runs of rows whose URL alone changed, e.g., because
+        the page files were renamed when the page count changed, are reported
+        for the url role only, so delegates keep their content. Rows beyond
+        the old or new end are inserted or removed.
+
+        Args:
+            rows: (url, revision, width, height) tuples in page order.
+        """
+        old_count = len(self._rows)
+        common = min(old_count, len(rows))
+        self._counters["updates"] += 1
+
+        # Runs of changed rows: (first row, kind), where the kind is
+        # "content" or "url"
+        start, run_kind = None, None
+        for row in range(common + 1):
+            kind = None
+            if row < common and self._rows[row] != rows[row]:
+                kind = "content" if self._rows[row][1:] != rows[row][1:] else "url"
+                self._rows[row] = rows[row]
+                self._counters["changed" if kind == "content" else "renamed"] += 1
+            if start is not None and kind != run_kind:
+                self._emit_changed(start, row - 1, run_kind)
+                start = None
+            if kind is not None and start is None:
+                start, run_kind = row, kind
+
+        if len(rows) > old_count:
+            self.beginInsertRows(QModelIndex(), old_count, len(rows) - 1)
+            self._rows.extend(rows[old_count:])
+            self.endInsertRows()
+            self._counters["inserted"] += len(rows) - old_count
+        elif len(rows) < old_count:
+            self.beginRemoveRows(QModelIndex(), len(rows), old_count - 1)
+            del self._rows[len(rows):]
+            self.endRemoveRows()
+            self._counters["removed"] += old_count - len(rows)
+
+        if len(rows) != old_count:
+            self.countChanged.emit()
+
+    def _emit_changed(self, first: int, last: int, kind: str):
+        """
+        Reports a run of changed rows.
+
+        Args:
+            first: The first row of the run.
+            last: The last row of the run.
+            kind: "content" for every role, or "url" for the url role only.
+        """
+        roles = [self.UrlRole] if kind == "url" else []
+        self.dataChanged.emit(self.index(first), self.index(last), roles)
+
+    def stats(self) -> dict:
+        """
+        Describes the updates of the model.
+
+        Returns:
+            A dictionary with the number of page lists set ("updates") and the
+            rows reported as changed, renamed (URL only), inserted and
+            removed ("changed", "renamed", "inserted", "removed").
+        """
+        return dict(self._counters)
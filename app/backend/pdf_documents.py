@@ -0,0 +1,147 @@
+"""
+Shares the parsed preview PDF between the monitor and the page renderers.
+
+In the PDF preview mode, Typst watch writes the whole document to one PDF.
+The OutputMonitor reads every new revision of that file once to learn its
+page count; the parsed document is kept here, keyed by revision, so every
+PdfPageItem renders its page from the same document instead of parsing the
+file again. Each document has its own page renderer, which renders pages on
+a background thread. Only the few newest revisions are kept.
+"""
+
+from collections import OrderedDict
+from typing import Optional
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+from PySide6.QtPdf import QPdfDocument, QPdfPageRenderer
+
+
+class PdfDocuments:
+    """
+    A small LRU cache of parsed PDF documents, keyed by revision.
+
+    Documents are QObjects living on the GUI thread, so the cache is only
+    used from there.
+    """
+
+    def __init__(self, max_documents: int = 2):
+        """
+        Initializes the PdfDocuments.
+
+        Args:
+            max_documents: Number of revisions kept at most.
+        """
+        self.max_documents = max_documents
+        # revision -> [document, buffer holding its bytes, renderer or None]
+        self._documents: OrderedDict[str, list] = OrderedDict()
+
+    def load(self, revision: str, data: bytes) -> Optional[QPdfDocument]:
+        """
+        Parses a revision of the PDF and keeps it.
+
+        Args:
+            revision: The content digest of the file.
+            data: The file's bytes.
+
+        Returns:
+            The document, or None if the bytes are not a valid PDF (e.g.,
+            because the file is still being written).
+        """
+        if revision in self._documents:
+            return self.get(revision)
+
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        document = QPdfDocument()
+        document.load(buffer)
+        if document.status() != QPdfDocument.Status.Ready:
+            document.close()
+            return None
+
+        self._documents[revision] = [document, buffer, None]
+        while len(self._documents) > self.max_documents:
+            self.discard(next(iter(self._documents)))
+        return document
+
+    def get(self, revision: str) -> Optional[QPdfDocument]:
+        """
+        Gets a parsed revision.
+
+        Args:
+            revision: The content digest of the file.
+
+        Returns:
+            The document, or None if the revision is not kept.
+        """
+        entry = self._documents.get(revision)
+        if entry is None:
+            return None
+        self._documents.move_to_end(revision)
+        return entry[0]
+
+    def open(self, revision: str, path: str) -> Optional[QPdfDocument]:
+        """
+        Gets a parsed revision, reading the file if it is not kept.
+
+        Args:
+            revision: The content digest of the file.
+            path: The PDF file.
+
+        Returns:
+            The document, or None if the file could not be read or parsed.
+        """
+        document = self.get(revision)
+        if document is not None:
+            return document
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return self.load(revision, data)
+
+    def renderer(self, revision: str) -> Optional[QPdfPageRenderer]:
+        """
+        Gets the page renderer of a parsed revision.
+
+        Args:
+            revision: The content digest of the file.
+
+        Returns:
+            The renderer, or None if the revision is not kept.
+        """
+        entry = self._documents.get(revision)
+        if entry is None:
+            return None
+        if entry[2] is None:
+            renderer = QPdfPageRenderer()
+            renderer.setRenderMode(QPdfPageRenderer.RenderMode.MultiThreaded)
+            renderer.setDocument(entry[0])
+            entry[2] = renderer
+        return entry[2]
+
+    def discard(self, revision: str):
+        """
+        Drops a revision, e.g., because a newer one replaced it.
+
+        Args:
+            revision: The content digest of the file.
+        """
+        entry = self._documents.pop(revision, None)
+        if entry is None:
+            return
+        document, buffer, renderer = entry
+        if renderer is not None:
+            # Deleting the renderer waits for the page it is rendering, so
+            # the document is not closed under it.
+            renderer.setDocument(None)
+            del renderer, entry
+        document.close()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+
+# The documents shared by the OutputMonitor and every PdfPageItem
+pdf_documents = PdfDocuments()
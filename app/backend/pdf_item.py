@@ -0,0 +1,284 @@
+"""
+Custom QML item rendering one page of the preview PDF.
+
+In the PDF preview mode, the page URLs from the OutputMonitor point to the
+preview PDF and carry its revision and the page index
+("?rev=<digest>&page=<n>"). The PdfPageItem takes the parsed document of
+that revision from the shared PdfDocuments cache and has the page rasterized
+by the document's page renderer, off the GUI thread.
+
+Pages are rendered a few at a time through the PdfRenderQueue, which always
+picks the waiting page closest to the visible part of the window next, so
+the pages on screen appear first after a compile, however long the
+document is. An item keeps showing its previous raster until the new one
+arrives.
+"""
+
+import weakref
+from typing import Optional
+
+from PySide6.QtCore import Property, QObject, QRectF, QSize, QTimer, QUrl, QUrlQuery, Signal
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtPdf import QPdfDocumentRenderOptions
+from PySide6.QtQuick import QQuickPaintedItem
+
+from .pdf_documents import pdf_documents
+
+
+class PdfRenderQueue(QObject):
+    """
+    Schedules page renders, visible pages first.
+
+    Only a few renders are in flight at a time, so a page scrolled into view
+    does not wait behind every other page of the document.
+    """
+
+    def __init__(self, max_in_flight: int = 2, parent=None):
+        """
+        Initializes the PdfRenderQueue.
+
+        Args:
+            max_in_flight: Number of pages rendered at the same time at most.
+            parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.max_in_flight = max_in_flight
+
+        # Items waiting for a render, and the renders in flight:
+        # (renderer id, request id) -> (renderer, item, requested render_key)
+        # The renderer and item are weak references; a renderer is deleted
+        # with its document, which drops its renders.
+        self._waiting: "weakref.WeakSet[PdfPageItem]" = weakref.WeakSet()
+        self._in_flight: dict[tuple, tuple] = {}
+        self._connected: "weakref.WeakSet" = weakref.WeakSet()
+
+        # Dispatches a frame after the latest request, once the pages of a
+        # new page list have been laid out
+        self._dispatch_timer = QTimer(self)
+        self._dispatch_timer.setSingleShot(True)
+        self._dispatch_timer.setInterval(16)
+        self._dispatch_timer.timeout.connect(self._dispatch)
+
+    def request(self, item: "PdfPageItem"):
+        """
+        Queues a render of an item's page at its current size.
+
+        Args:
+            item: The item to render.
+        """
+        self._waiting.add(item)
+        self._dispatch_timer.start()
+
+    def _dispatch(self):
+        """Starts the renders of the waiting pages closest to the view."""
+        for request, entry in list(self._in_flight.items()):
+            if entry[0]() is None:
+                del self._in_flight[request]
+
+        while len(self._in_flight) < self.max_in_flight and self._waiting:
+            item = min(self._waiting, key=self._distance_to_view)
+            self._waiting.discard(item)
+
+            try:
+                key = item.render_key()
+            except RuntimeError:
+                # The QML item was destroyed.
+                continue
+            renderer = pdf_documents.renderer(key[0]) if key else None
+            if renderer is None:
+                continue
+            if renderer not in self._connected:
+                renderer.pageRendered.connect(self._on_page_rendered)
+                self._connected.add(renderer)
+
+            request_id = renderer.requestPage(key[1], key[2], QPdfDocumentRenderOptions())
+            self._in_flight[(id(renderer), request_id)] = (weakref.ref(renderer), weakref.ref(item), key)
+
+    @staticmethod
+    def _distance_to_view(item: "PdfPageItem") -> float:
+        """
+        Gets the scheduling priority of an item, lowest first.
+
+        Args:
+            item: A waiting item.
+        """
+        try:
+            return item.distance_to_view()
+        except RuntimeError:
+            return float("-inf")
+
+    def _on_page_rendered(self, page: int, size: QSize, image: QImage, options, request_id: int):
+        """
+        Hands a rendered page to its item and starts the next render.
+
+        Args:
+            page: The page index.
+            size: The requested image size.
+            image: The rendered page.
+            options: The render options.
+            request_id: The id returned by requestPage().
+        """
+        entry = self._in_flight.pop((id(self.sender()), request_id), None)
+        if entry is not None:
+            item = entry[1]()
+            if item is not None:
+                try:
+                    item.set_image(entry[2], image)
+                except RuntimeError:
+                    pass
+        self._dispatch()
+
+
+# The queue shared by every PdfPageItem
+_render_queue: Optional[PdfRenderQueue] = None
+
+
+def render_queue() -> PdfRenderQueue:
+    """Returns the queue shared by every PdfPageItem, creating it once."""
+    global _render_queue
+    if _render_queue is None:
+        _render_queue = PdfRenderQueue()
+    return _render_queue
+
+
+class PdfPageItem(QQuickPaintedItem):
+    """
+    A QML item that shows one page of the preview PDF.
+
+    The page is rasterized at the item's size in device pixels and redrawn
+    scaled until a raster of the new size arrives.
+
+    Attributes:
+        source (str): The URL of the PDF with its revision and page index.
+    """
+
+    # Signal emitted when the source property changes
+    sourceChanged = Signal()
+
+    def __init__(self, parent=None):
+        """Initializes the PdfPageItem."""
+        super().__init__(parent)
+        self._source = ""
+        self._path = ""
+        self._revision = ""
+        self._page = -1
+
+        # The latest raster and the key (revision, page, size) it was
+        # rendered for
+        self._image: Optional[QImage] = None
+        self._image_key: Optional[tuple] = None
+
+        self.setAntialiasing(True)
+        self.widthChanged.connect(self._request_render)
+        self.heightChanged.connect(self._request_render)
+        self.visibleChanged.connect(self._request_render)
+
+    def paint(self, painter: QPainter):
+        """
+        Paints the latest raster of the page.
+
+        Args:
+            painter: The QPainter used for drawing.
+        """
+        if self._image is not None:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawImage(self.boundingRect(), self._image)
+
+    @Property(str, notify=sourceChanged)
+    def source(self):
+        """Gets the source URL of the page."""
+        return self._source
+
+    @source.setter
+    def source(self, value):
+        """
+        Sets the source URL of the page.
+
+        Args:
+            value: The new source URL.
+        """
+        if self._source == value:
+            return
+
+        self._source = value
+        self.sourceChanged.emit()
+        self._load_page()
+
+    def render_key(self) -> Optional[tuple]:
+        """
+        Describes the raster the item needs now.
+
+        Returns:
+            A (revision, page index, size in device pixels) tuple, or None if
+            the item has nothing to render.
+        """
+        if not self._revision or self._page < 0 or self.width() <= 0 or self.height() <= 0:
+            return None
+        window = self.window()
+        ratio = window.devicePixelRatio() if window else 1.0
+        return self._revision, self._page, QSize(round(self.width() * ratio), round(self.height() * ratio))
+
+    def distance_to_view(self) -> float:
+        """
+        Measures how far the item is from the visible part of its window.
+
+        Returns:
+            0 for an item on screen, otherwise the distance in pixels; hidden
+            items come last.
+        """
+        window = self.window()
+        if window is None or not self.isVisible():
+            return float("inf")
+        rect = self.mapRectToScene(self.boundingRect())
+        view = QRectF(0, 0, window.width(), window.height())
+        if rect.intersects(view):
+            return 0.0
+        return max(view.top() - rect.bottom(), rect.top() - view.bottom(),
+                   view.left() - rect.right(), rect.left() - view.right())
+
+    def set_image(self, key: tuple, image: QImage):
+        """
+        Shows a rendered raster, unless the item moved on to another one.
+
+        Args:
+            key: The render_key() the raster was requested for.
+            image: The rendered page.
+        """
+        current = self.render_key()
+        if current is None or current[:2] != key[:2]:
+            return
+        self._image = image
+        self._image_key = key
+        self.update()
+
+    def _load_page(self):
+        """Opens the revision of the PDF named by the source URL."""
+        qurl = QUrl(self._source)
+        query = QUrlQuery(qurl)
+        self._path = qurl.toLocalFile()
+        self._revision = query.queryItemValue("rev")
+        try:
+            self._page = int(query.queryItemValue("page"))
+        except ValueError:
+            self._page = -1
+
+        if not self._path or not self._revision or self._page < 0:
+            return
+
+        document = pdf_documents.open(self._revision, self._path)
+        if document is None or self._page >= document.pageCount():
+            print(f"PdfPageItem: Failed to load page {self._page + 1} from {self._path}")
+            return
+
+        # The natural size of the page, in points
+        size = document.pagePointSize(self._page)
+        self.setImplicitWidth(size.width())
+        self.setImplicitHeight(size.height())
+        self._request_render()
+
+    def _request_render(self):
+        """Queues a render if the current raster does not match the item."""
+        key = self.render_key()
+        if key is None or key == self._image_key:
+            return
+        render_queue().request(self)
@@ -7,20 +7,47 @@ are detected.
 """
 import sys
 import platform
-import shutil
+import re
+import time
 from pathlib import Path
+from typing import Optional
 
-from PySide6.QtCore import QObject, QProcess, QUrl, Signal, Slot
+from PySide6.QtCore import QObject, QProcess, QTimer, QUrl, Signal, Slot
+
+from .compile_log import CompileLog
+from .compile_status import CompileStatus
+from .export_cache import ExportCache
+from .export_engine import ExportEngine
+from .font_set import FontSet
+from .output_monitor import PREVIEW_FORMATS, PREVIEW_PDF
+from .package_cache import PackageCache
+from .watch_pool import WatchMember, WatchPool
+
+# Status lines printed by typst watch, e.g. "[12:00:00] compiling ..." and
+# "[12:00:00] compiled successfully in 12.34ms".
+_COMPILING_PATTERN = re.compile(r"\bcompiling \.\.\.")
+_COMPILED_PATTERN = re.compile(
+    r"\bcompiled (successfully|with warnings|with errors)(?: in ([\d.]+)\s*(µs|us|ms|s)\b)?"
+)
+_ANSI_PATTERN = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+# Factors converting Typst's duration units to milliseconds.
+_DURATION_UNITS_MS = {"µs": 0.001, "us": 0.001, "ms": 1.0, "s": 1000.0}
 
 
 class ProcessManager(QObject):
     """
-    Manages the Typst watch background process.
+    Manages the Typst watch background processes.
 
     This class handles the logic for finding the correct platform-specific
     Typst executable, starting it in watch mode, stopping it, and capturing
     its output. The watch mode continuously monitors main.typ and regenerates
-    the PDF to output/p{n}.pdf on any changes.
+    the SVG pages to output/p{n}-{total}.svg on any changes (or the whole
+    document to output/preview.pdf in the PDF preview mode).
+
+    Watch processes of recently used projects are kept in a WatchPool, so
+    switching back to one of them does not need a cold start. Only the
+    process of the current project is active; signals only report on it.
     """
 
     # Signal emitted when the process outputs to stdout
@@ -38,18 +65,111 @@ class ProcessManager(QObject):
     # Signal for PDF export completion
     pdfExportFinished = Signal(bool, str)  # success: bool, message: str
 
-    def __init__(self, parent=None):
-        """Initializes the ProcessManager and its internal QProcess instance."""
+    # Signals for batch exports, see ExportEngine
+    exportJobProgress = Signal(int, int, str)  # batch id, job index, state
+    exportJobFinished = Signal(int, dict)  # batch id, job result
+    exportBatchFinished = Signal(int, dict)  # batch id, batch result
+
+    # Signal emitted when the watch process starts compiling
+    compileStarted = Signal()
+
+    # Signal emitted when the watch process finishes compiling
+    compileFinished = Signal(bool, float)  # success: bool, duration in ms: float
+
+    # Signals emitted with the project of the compile, so consumers of the
+    # output (e.g., the OutputMonitor) can tell which project it belongs to
+    projectCompileStarted = Signal(str)  # project path
+    projectCompileFinished = Signal(str, bool)  # project path, success
+
+    # Signal emitted with the diagnostics of the latest compile
+    diagnosticsChanged = Signal(list)  # list of diagnostic dictionaries
+
+    # Signal emitted when the compile state changes
+    compileStateChanged = Signal(str)  # "idle", "compiling", "succeeded" or "failed"
+
+    # Signal emitted when a compile finished, with the updated statistics
+    compileStatsChanged = Signal(dict)  # See get_compile_stats()
+
+    # Signal emitted when the font probe finished or the active project's
+    # font set changed
+    fontStatsChanged = Signal(dict)  # See get_font_stats()
+
+    # Signal emitted when the preview format of the current project changed
+    previewFormatChanged = Signal(str)  # "svg" or "pdf"
+
+    # Signal emitted when lines were added to the compile log
+    logAppended = Signal(int)  # Emits the sequence number of the newest record
+
+    # Interval in milliseconds at which output and diagnostics are delivered
+    OUTPUT_INTERVAL = 250
+
+    def __init__(self, max_watch_processes: int = 3, parent=None):
+        """
+        Initializes the ProcessManager and its pool of watch processes.
+
+        Args:
+            max_watch_processes: Number of watch processes kept warm, including
+                the one of the active project
+            parent: Optional parent QObject
+        """
         super().__init__(parent)
-        self.process = QProcess()
         self.project_path = None
 
-        # Connects process signals to handlers
-        self.process.readyReadStandardOutput.connect(self._handle_stdout)
-        self.process.readyReadStandardError.connect(self._handle_stderr)
-        self.process.started.connect(self._handle_started)
-        self.process.finished.connect(self._handle_finished)
-        self.process.errorOccurred.connect(self._handle_error)
+        # Whether the watch process writes one SVG per page or one PDF
+        self.preview_format = "svg"
+
+        # Watch processes of recently used projects, and the active one
+        self._pool = WatchPool(max_watch_processes)
+        self._active: Optional[WatchMember] = None
+
+        # When the current compile started (time.monotonic()), or None
+        self._compile_started_at = None
+
+        # Compile state machine and per-project compile durations
+        self.compile_status = CompileStatus()
+
+        # Output of the active process waiting to be delivered. Output is
+        # batched so a document with hundreds of warnings does not flood the
+        # UI with signals.
+        self._diagnostics_changed = False
+        self._pending_stdout = []
+        self._pending_stderr = []
+        self._output_timer = QTimer(self)
+        self._output_timer.setSingleShot(True)
+        self._output_timer.setInterval(self.OUTPUT_INTERVAL)
+        self._output_timer.timeout.connect(self._deliver_output)
+
+        # The output of the watch process, kept within fixed limits and paged
+        # by the output panel through the get_log_* slots
+        self.compile_log = CompileLog()
+        self._log_notified_seq = 0
+
+        # Package cache shared by every Typst process. A watch requested while
+        # the packages of the templates are prefetched starts once they are
+        # there, instead of downloading them a second time.
+        self.package_cache = PackageCache(self._get_typst_executable_path, parent=self)
+        self.package_cache.prefetchFinished.connect(self._on_prefetch_finished)
+        self._watch_after_prefetch = False
+
+        # Font arguments of every Typst process, restricted to the fonts a
+        # project uses where possible. Font families reported by the form are
+        # kept by project path, so they do not have to be read from disk.
+        self.font_set = FontSet(self._get_typst_executable_path, environment=self.package_cache.environment,
+                                parent=self)
+        self.font_set.fontScanMeasured.connect(lambda _: self.fontStatsChanged.emit(self.get_font_stats()))
+        self._font_families: dict[str, list] = {}
+
+        # Runs exports on a pool of typst compile processes, separate from the
+        # watch processes. Unchanged projects are served from the export cache.
+        self.export_cache = ExportCache(self._get_typst_executable_path, font_dirs=self.font_set.font_dirs)
+        self.export_engine = ExportEngine(self._get_typst_executable_path, cache=self.export_cache,
+                                          environment=self.package_cache.environment,
+                                          arguments=self._font_arguments, parent=self)
+        self.export_engine.jobProgress.connect(self.exportJobProgress)
+        self.export_engine.jobFinished.connect(self.exportJobFinished)
+        self.export_engine.batchFinished.connect(self.exportBatchFinished)
+        self.export_engine.batchFinished.connect(self._on_export_batch_finished)
+        self._pdf_export_batches = set()
 
     def _get_typst_executable_path(self):
         """
@@ -99,72 +219,348 @@ class ProcessManager(QObject):
         self.project_path = project_path
         print(f"ProcessManager: Project path set to '{project_path}'")
 
+        self.compile_status.set_project(project_path)
+        self.compileStateChanged.emit(self.compile_status.state)
+        self.compileStatsChanged.emit(self.compile_status.stats())
+
     @Slot()
     def start_typst_watch(self):
         """
         Starts the Typst watch process for the current project.
 
-        The process watches main.typ and automatically regenerates the PDF
-        to output/p{n}.pdf whenever changes are detected.
+        The process watches main.typ and automatically regenerates the SVG
+        pages in output/p{n}-{total}.svg, or output/preview.pdf in the PDF
+        preview mode, whenever changes are detected. If
+        the project still has a warm process in the pool, that process is
+        resumed instead of starting a new one. The process of the previously
+        active project is paused and kept in the pool. While the template
+        packages are being prefetched, the start waits for the prefetch.
         """
+        if not self.project_path:
+            print("Error: Cannot start Typst watch - project path not set.")
+            return
+
+        if self.package_cache.is_prefetching():
+            print("Typst watch waits for the package prefetch to finish.")
+            self._watch_after_prefetch = True
+            return
+
         # Prevents attempting to start a process that is already active.
-        if self.process.state() != QProcess.ProcessState.NotRunning:
+        if self._active and self._active.project_path == self.project_path and self._active.is_running():
             print("Warning: Typst watch process is already running.")
             return
 
-        if not self.project_path:
-            print("Error: Cannot start Typst watch - project path not set.")
+        # Output of the previous project is delivered before switching.
+        self._deliver_output()
+        self._compile_started_at = None
+        if self._active:
+            self._active.pause()
+            self._active = None
+
+        arguments = self._watch_arguments(Path(self.project_path))
+
+        member = self._pool.get(self.project_path)
+        if member and member.is_running() and (member.arguments[:3] != arguments[:3]
+                                               or self._lacks_fonts(member, arguments)):
+            # The preview format or the font set changed since the process
+            # was started
+            self._pool.remove(member)
+            member.stop(wait=False)
+        elif member and member.is_running():
+            print(f"Resuming warm Typst watch process for '{self.project_path}'")
+            self._active = member
+            member.resume()
+            self._diagnostics_changed = True
+            self._deliver_output()
+            self.processStarted.emit()
+            self.fontStatsChanged.emit(self.get_font_stats())
             return
 
         executable_path = self._get_typst_executable_path()
         if not executable_path:
             return
 
-        # Sets the working directory to the project path
-        self.process.setWorkingDirectory(self.project_path)
+        process = QProcess()
+        member = WatchMember(self.project_path, process, arguments)
+
+        # Connects process signals to handlers bound to this member
+        process.readyReadStandardOutput.connect(lambda: self._handle_stdout(member))
+        process.readyReadStandardError.connect(lambda: self._handle_stderr(member))
+        process.started.connect(lambda: self._handle_started(member))
+        process.finished.connect(lambda exit_code, exit_status: self._handle_finished(member, exit_code, exit_status))
+        process.errorOccurred.connect(lambda error: self._handle_error(member, error))
 
-        # Arguments for typst watch: typst watch main.typ output/p{p}.svg
-        # {p} is replaced by Typst with the page number
-        arguments = ["watch", "main.typ", "output/p{p}.svg"]
+        # Sets the working directory to the project path and the package
+        # folders of the package cache
+        process.setWorkingDirectory(self.project_path)
+        process.setProcessEnvironment(self.package_cache.environment())
 
         print(f"Starting Typst watch process...")
         print(f"  Executable: {executable_path}")
         print(f"  Working directory: {self.project_path}")
         print(f"  Arguments: {arguments}")
 
-        self.process.start(executable_path, arguments)
+        self._active = member
+        if self.compile_status.reset():
+            self.compileStateChanged.emit(self.compile_status.state)
+        for evicted in self._pool.add(member):
+            print(f"Stopping idle Typst watch process for '{evicted.project_path}'")
+            evicted.stop(wait=False)
+
+        process.start(executable_path, arguments)
+        self.fontStatsChanged.emit(self.get_font_stats())
+
+    @Slot(str)
+    def set_font_family(self, font_family: str):
+        """
+        Updates the font family of the current project.
+
+        If the active watch process was started without the system fonts and
+        the new family needs them, the process is restarted.
+
+        Args:
+            font_family: The family name from the project's form
+        """
+        if not self.project_path:
+            return
+        self._font_families[str(Path(self.project_path).resolve())] = [font_family] if font_family else []
+
+        member = self._active
+        if not member or member.project_path != self.project_path or not member.is_running():
+            return
+        arguments = self._watch_arguments(Path(self.project_path))
+        if self._lacks_fonts(member, arguments):
+            print("Restarting Typst watch process for the new font set...")
+            self._active = None
+            self._pool.remove(member)
+            member.stop(wait=False)
+            self.start_typst_watch()
+
+    @Slot(str)
+    def set_preview_format(self, preview_format: str):
+        """
+        Sets whether the watch process writes SVG pages or one PDF.
+
+        If the active watch process of the current project writes the other
+        format, it is restarted.
+
+        Args:
+            preview_format: "svg" or "pdf"
+        """
+        if preview_format not in PREVIEW_FORMATS:
+            print(f"Warning: Unknown preview format '{preview_format}'.")
+            return
+        if preview_format == self.preview_format:
+            return
+        self.preview_format = preview_format
+        self.previewFormatChanged.emit(preview_format)
+
+        member = self._active
+        if not member or member.project_path != self.project_path or not member.is_running():
+            return
+        print(f"Restarting Typst watch process for the {preview_format.upper()} preview...")
+        self._active = None
+        self._pool.remove(member)
+        member.stop(wait=False)
+        self.start_typst_watch()
+
+    @Slot(result=str)
+    def get_preview_format(self):
+        """Returns the preview format, "svg" or "pdf"."""
+        return self.preview_format
+
+    @Slot(bool)
+    def set_use_system_fonts(self, enabled: bool):
+        """
+        Sets whether Typst always loads the system fonts.
+
+        Applies to Typst processes started from now on.
+
+        Args:
+            enabled: True to opt out of restricting projects to their fonts
+        """
+        self.font_set.use_system_fonts = enabled
+
+    @Slot(result=dict)
+    def get_font_stats(self):
+        """
+        Gets the font scan statistics and the font set of the active project.
+
+        Returns:
+            The statistics of FontSet.get_scan_stats(), plus whether the active
+            watch process skips the system fonts ("skipped")
+        """
+        stats = self.font_set.get_scan_stats()
+        stats["skipped"] = bool(self._active and "--ignore-system-fonts" in self._active.arguments)
+        return stats
+
+    def _watch_arguments(self, project: Path) -> list:
+        """
+        Builds the arguments of the watch process of a project.
+
+        Args:
+            project: The project directory
+        """
+        if self.preview_format == "pdf":
+            output = f"output/{PREVIEW_PDF}"
+        else:
+            # {p} is replaced by Typst with the page number and {t} with the
+            # page count, so the output monitor can tell stale pages from
+            # current ones
+            output = "output/p{p}-{t}.svg"
+        return ["watch", "main.typ", output] + self._font_arguments(project)
+
+    def _font_arguments(self, project: Path) -> list:
+        """
+        Builds the font arguments of a Typst process for a project.
+
+        Args:
+            project: The project directory
+        """
+        return self.font_set.arguments(project, self._font_families.get(str(project.resolve())))
+
+    @staticmethod
+    def _lacks_fonts(member: WatchMember, arguments: list) -> bool:
+        """
+        Checks if a watch process misses fonts its project needs now.
+
+        A process that loads more fonts than needed still renders correctly,
+        so it is kept rather than paying for a cold start.
+
+        Args:
+            member: The pool member
+            arguments: The arguments the process would be started with now
+        """
+        ignore = "--ignore-system-fonts"
+        if [a for a in member.arguments if a != ignore] != [a for a in arguments if a != ignore]:
+            return True
+        return ignore in member.arguments and ignore not in arguments
 
     @Slot()
     def stop_process(self):
-        """Stops the Typst watch process if it is running."""
-        # Checks if the process is active before attempting to terminate it.
-        if self.process.state() != QProcess.ProcessState.NotRunning:
-            print("Stopping Typst watch process...")
-            self.process.terminate()
-            
-            # A timeout is given to allow for a graceful shutdown. If the
-            # process does not terminate in time, it is forcefully killed.
-            if not self.process.waitForFinished(2000):  # 2-second timeout
-                print("Warning: Process did not terminate gracefully, killing...")
-                self.process.kill()
-                self.process.waitForFinished(1000)  # Wait for kill to complete
-        else:
+        """Stops every Typst watch process of the pool."""
+        self._watch_after_prefetch = False
+        members = [member for member in self._pool.members() if member.is_running()]
+        if not members:
             print("No Typst watch process is running.")
+            return
+
+        print("Stopping Typst watch process...")
+        for member in members:
+            member.stop(wait=True)
+
+    def _on_prefetch_finished(self, available: bool):
+        """
+        Starts the watch that waited for the package prefetch.
+
+        Args:
+            available: Whether every package could be fetched
+        """
+        if self._watch_after_prefetch:
+            self._watch_after_prefetch = False
+            self.start_typst_watch()
 
     @Slot(result=bool)
     def is_running(self):
         """
-        Checks if the Typst watch process is currently running.
+        Checks if the Typst watch process of the current project is running.
 
         Returns:
             True if the process is running, False otherwise.
         """
-        return self.process.state() != QProcess.ProcessState.NotRunning
+        return bool(self._active and self._active.is_running())
+
+    @Slot(int)
+    def set_watch_pool_limit(self, limit: int):
+        """
+        Sets how many watch processes are kept warm.
+
+        Args:
+            limit: Maximum number of watch processes, including the one of the
+                active project (at least 1)
+        """
+        for evicted in self._pool.set_limit(limit, keep=self._active):
+            print(f"Stopping idle Typst watch process for '{evicted.project_path}'")
+            evicted.stop(wait=False)
+
+    @Slot(result=list)
+    def get_diagnostics(self):
+        """
+        Gets the diagnostics of the latest compile.
+
+        Returns:
+            A list of dictionaries with the severity, file, line, column,
+            message and hints of each error or warning.
+        """
+        return list(self._active.diagnostics) if self._active else []
+
+    @Slot(result=str)
+    def get_compile_state(self):
+        """
+        Gets the state of the watch process' compiles.
+
+        Returns:
+            "idle", "compiling", "succeeded" or "failed".
+        """
+        return self.compile_status.state
+
+    @Slot(result=dict)
+    def get_compile_stats(self):
+        """
+        Gets the compile statistics of the current project.
+
+        Returns:
+            A dictionary with the state, the compile count, the failure count
+            and the last, p50, p95 and max durations in milliseconds.
+        """
+        return self.compile_status.stats()
+
+    @Slot(int, int, result=list)
+    def get_log_range(self, start: int, count: int):
+        """
+        Gets compile log records by position.
+
+        Args:
+            start: Position of the first record (0 is the oldest kept record)
+            count: Maximum number of records to return
+
+        Returns:
+            A list of dictionaries with the seq, time, stream and text of
+            each record.
+        """
+        return self.compile_log.get_range(start, count)
+
+    @Slot(int, int, result=list)
+    def get_log_since(self, seq: int, limit: int):
+        """
+        Gets the compile log records added after a sequence number.
+
+        Args:
+            seq: The last sequence number already fetched (0 for none)
+            limit: Maximum number of records to return (0 for no limit)
+
+        Returns:
+            A list of record dictionaries, oldest first.
+        """
+        return self.compile_log.get_since(seq, limit)
+
+    @Slot(result=dict)
+    def get_log_bounds(self):
+        """
+        Gets the range of records kept in the compile log.
+
+        Returns:
+            A dictionary with the first and last sequence numbers, the record
+            count and the total text size in bytes.
+        """
+        return self.compile_log.bounds()
 
     @Slot(str)
     def export_pdf(self, destination_folder_url: str):
         """
-        Asynchronously compiles the project to PDF and moves it to a destination.
+        Asynchronously compiles the project to PDF and copies it to a destination.
+
+        The result is reported through pdfExportFinished.
 
         Args:
             destination_folder_url: The file URL of the folder to save the PDF in.
@@ -173,11 +569,6 @@ class ProcessManager(QObject):
             self.pdfExportFinished.emit(False, "Project path not set.")
             return
 
-        executable_path = self._get_typst_executable_path()
-        if not executable_path:
-            self.pdfExportFinished.emit(False, "Typst executable not found.")
-            return
-
         try:
             dest_folder = Path(QUrl(destination_folder_url).toLocalFile())
             if not dest_folder.is_dir():
@@ -187,83 +578,246 @@ class ProcessManager(QObject):
             self.pdfExportFinished.emit(False, f"Invalid destination path: {e}")
             return
 
-        # Define source and final destination paths
-        output_dir = Path(self.project_path) / "output"
-        output_dir.mkdir(exist_ok=True)
-        source_pdf = output_dir / "main.pdf"
-        final_dest_pdf = dest_folder / f"{Path(self.project_path).name}.pdf"
+        batch_id = self.export_engine.submit([{
+            "project": self.project_path,
+            "format": "pdf",
+            "options": {"destination": str(dest_folder)},
+        }])
+        self._pdf_export_batches.add(batch_id)
 
-        # Use a new QProcess instance for export to not interfere with the watch process
-        export_process = QProcess()
-        export_process.setWorkingDirectory(self.project_path)
-        
-        # Arguments: typst compile main.typ output/main.pdf
-        arguments = ["compile", "main.typ", str(source_pdf)]
-
-        # This handler will be called when the export process finishes
-        def on_finished(exit_code, exit_status):
-            if exit_status == QProcess.ExitStatus.NormalExit and exit_code == 0:
-                # Check if PDF exists
-                if source_pdf.exists():
-                    try:
-                        # Move the file
-                        shutil.move(str(source_pdf), str(final_dest_pdf))
-                        self.pdfExportFinished.emit(True, f"Successfully exported to:\n{final_dest_pdf}")
-                    except Exception as e:
-                        self.pdfExportFinished.emit(False, f"Failed to move PDF: {e}")
-                else:
-                    self.pdfExportFinished.emit(False, "Typst reported success, but PDF file was not found.")
-            else:
-                error_output = export_process.readAllStandardError().data().decode('utf-8', errors='replace')
-                self.pdfExportFinished.emit(False, f"PDF export failed.\n\nError:\n{error_output}")
-            
-            export_process.deleteLater() # Clean up the process object
-
-        export_process.finished.connect(on_finished)
-        export_process.start(executable_path, arguments)
-
-    def _handle_stdout(self):
-        """Handles standard output from the Typst process."""
-        data = self.process.readAllStandardOutput()
-        output = bytes(data).decode('utf-8', errors='replace')
-        
-        if output.strip():
-            print(f"Typst output: {output.strip()}")
-            self.processOutput.emit(output)
-
-    def _handle_stderr(self):
-        """Handles standard error output from the Typst process."""
-        data = self.process.readAllStandardError()
-        error = bytes(data).decode('utf-8', errors='replace')
-        
-        if error.strip():
-            # Filters out routine watch status messages
-            error_text = error.strip()
-            if not error_text.startswith("watching ") and not error_text.startswith("writing to "):
-                print(f"Typst: {error_text}")
-            self.processError.emit(error)
-
-    def _handle_started(self):
-        """Handles the process started event."""
+    @Slot(list, result=int)
+    def export_batch(self, jobs: list):
+        """
+        Queues a batch of export jobs (see export_engine for the job format).
+
+        Progress and results are reported through exportJobProgress,
+        exportJobFinished and exportBatchFinished.
+
+        Args:
+            jobs: List of dictionaries with the project, format and options
+
+        Returns:
+            The id of the batch.
+        """
+        return self.export_engine.submit(jobs)
+
+    @Slot(int)
+    def cancel_export(self, batch_id: int):
+        """
+        Cancels the unfinished jobs of an export batch.
+
+        Args:
+            batch_id: The id returned by export_batch()
+        """
+        self.export_engine.cancel(batch_id)
+
+    def _on_export_batch_finished(self, batch_id: int, result: dict):
+        """
+        Reports the end of an export started by export_pdf().
+
+        Args:
+            batch_id: The finished batch
+            result: The aggregated batch result
+        """
+        if batch_id not in self._pdf_export_batches:
+            return
+        self._pdf_export_batches.discard(batch_id)
+
+        job = result["jobs"][0]
+        if job["success"]:
+            self.pdfExportFinished.emit(True, f"Successfully exported to:\n{job['outputs'][0]}")
+        else:
+            self.pdfExportFinished.emit(False, job["message"])
+
+    def _handle_stdout(self, member: WatchMember):
+        """
+        Handles standard output from a Typst watch process.
+
+        Args:
+            member: The pool member whose process produced the output
+        """
+        data = member.process.readAllStandardOutput()
+        lines = member.stdout_framer.feed(bytes(data))
+        if lines and member is self._active:
+            for line in lines:
+                self.compile_log.append("stdout", _ANSI_PATTERN.sub("", line))
+            self._pending_stdout.extend(lines)
+            self._schedule_output()
+
+    def _handle_stderr(self, member: WatchMember):
+        """
+        Handles standard error output from a Typst watch process.
+
+        Args:
+            member: The pool member whose process produced the output
+        """
+        data = member.process.readAllStandardError()
+        lines = member.stderr_framer.feed(bytes(data))
+        if lines:
+            self._handle_stderr_lines(member, lines)
+
+    def _handle_stderr_lines(self, member: WatchMember, lines: list):
+        """
+        Parses complete lines of standard error.
+
+        Diagnostics are tracked for every member. For the active one, compile
+        status changes are signaled immediately, since generation is paced by
+        them, while diagnostics and the raw text are delivered in batches.
+
+        Args:
+            member: The pool member whose process produced the lines
+            lines: The lines, without line terminators
+        """
+        active = member is self._active
+        for line in lines:
+            plain = _ANSI_PATTERN.sub("", line)
+
+            if _COMPILING_PATTERN.search(plain):
+                # A new compile replaces the diagnostics of the previous one
+                member.diagnostics_parser.finish()
+                member.diagnostics = []
+                self._diagnostics_changed |= active
+
+            record = member.diagnostics_parser.feed(plain)
+            if record:
+                member.diagnostics.append(record)
+                self._diagnostics_changed |= active
+
+            if active:
+                self.compile_log.append("stderr", plain)
+                self._parse_compile_status(plain)
+
+        if active:
+            self._pending_stderr.extend(lines)
+            self._schedule_output()
+
+    def _parse_compile_status(self, line: str):
+        """
+        Emits compileStarted and compileFinished for the watch status lines.
+
+        Args:
+            line: A line of the active watch process' standard error
+        """
+        if _COMPILING_PATTERN.search(line):
+            self._compile_started_at = time.monotonic()
+            self.compileStarted.emit()
+            self.projectCompileStarted.emit(self._active.project_path)
+            if self.compile_status.start():
+                self.compileStateChanged.emit(self.compile_status.state)
+            return
+
+        match = _COMPILED_PATTERN.search(line)
+        if not match:
+            return
+
+        outcome, value, unit = match.groups()
+        if value:
+            duration_ms = float(value) * _DURATION_UNITS_MS[unit]
+        elif self._compile_started_at is not None:
+            # Failed compiles do not report their duration
+            duration_ms = (time.monotonic() - self._compile_started_at) * 1000
+        else:
+            duration_ms = 0.0
+        self._compile_started_at = None
+        success = outcome != "with errors"
+        self.compileFinished.emit(success, duration_ms)
+        self.projectCompileFinished.emit(self._active.project_path, success)
+        if self.compile_status.finish(success, duration_ms):
+            self.compileStateChanged.emit(self.compile_status.state)
+        self.compileStatsChanged.emit(self.compile_status.stats())
+
+    def _schedule_output(self):
+        """Starts the delivery timer unless a delivery is already scheduled."""
+        if not self._output_timer.isActive():
+            self._output_timer.start()
+
+    def _deliver_output(self):
+        """Emits the output and diagnostics collected since the last delivery."""
+        self._output_timer.stop()
+
+        if self._pending_stdout:
+            output = "\n".join(self._pending_stdout)
+            self._pending_stdout = []
+            if output.strip():
+                print(f"Typst output: {output.strip()}")
+                self.processOutput.emit(output)
+
+        if self._pending_stderr:
+            error = "\n".join(self._pending_stderr)
+            self._pending_stderr = []
+            if error.strip():
+                # Filters out routine watch status messages
+                shown = [
+                    line for line in _ANSI_PATTERN.sub("", error).strip().splitlines()
+                    if not line.startswith("watching ") and not line.startswith("writing to ")
+                ]
+                if any(line.strip() for line in shown):
+                    print("Typst: " + "\n".join(shown).strip())
+                self.processError.emit(error)
+
+        if self._diagnostics_changed:
+            self._diagnostics_changed = False
+            self.diagnosticsChanged.emit(self.get_diagnostics())
+
+        last_seq = self.compile_log.bounds()["last"]
+        if last_seq > self._log_notified_seq:
+            self._log_notified_seq = last_seq
+            self.logAppended.emit(last_seq)
+
+    def _handle_started(self, member: WatchMember):
+        """
+        Handles the process started event.
+
+        Args:
+            member: The pool member whose process started
+        """
         print("Typst watch process started successfully.")
-        self.processStarted.emit()
+        if member is self._active:
+            self.processStarted.emit()
 
-    def _handle_finished(self, exit_code, exit_status):
+    def _handle_finished(self, member: WatchMember, exit_code, exit_status):
         """
         Handles the process finished event.
 
         Args:
+            member: The pool member whose process exited
             exit_code: The exit code of the process
             exit_status: The exit status (normal or crashed)
         """
         print(f"Typst watch process finished. Exit code: {exit_code}, Status: {exit_status}")
+        self._pool.remove(member)
+        member.process.deleteLater()
+
+        if member is not self._active:
+            return
+        if self._compile_started_at is not None:
+            # A compile interrupted by a crash or a kill never reports its end
+            self.projectCompileFinished.emit(member.project_path, False)
+        self._compile_started_at = None
+
+        # Delivers whatever output is left, including an unterminated last line
+        for line in member.stdout_framer.flush():
+            self.compile_log.append("stdout", _ANSI_PATTERN.sub("", line))
+            self._pending_stdout.append(line)
+        remaining = member.stderr_framer.flush()
+        if remaining:
+            self._handle_stderr_lines(member, remaining)
+        record = member.diagnostics_parser.finish()
+        if record:
+            member.diagnostics.append(record)
+            self._diagnostics_changed = True
+        self._deliver_output()
+
+        if self.compile_status.reset():
+            self.compileStateChanged.emit(self.compile_status.state)
         self.processStopped.emit()
 
-    def _handle_error(self, error):
+    def _handle_error(self, member: WatchMember, error):
         """
         Handles process errors.
 
         Args:
+            member: The pool member whose process failed
             error: The QProcess.ProcessError enum value
         """
         error_messages = {
@@ -277,4 +831,8 @@ class ProcessManager(QObject):
         
         error_msg = error_messages.get(error, "Unknown error")
         print(f"Typst process error: {error_msg}")
-        self.processError.emit(f"Process error: {error_msg}")
\ No newline at end of file
+        if error == QProcess.ProcessError.FailedToStart:
+            # No finished signal follows a failed start
+            self._pool.remove(member)
+        if member is self._active:
+            self.processError.emit(f"Process error: {error_msg}")
@@ -6,6 +6,7 @@ Templates are simply directories containing the complete project structure,
 which are copied recursively to the user's chosen location.
 """
 
+import json
 import shutil
 import uuid
 from pathlib import Path
@@ -304,4 +305,30 @@ class ProjectManager(QObject):
                 except OSError:
                     pass
 
-        return f"Template: {template_name}"
\ No newline at end of file
+        return f"Template: {template_name}"
+
+    @Slot(str, result=list)
+    def get_template_packages(self, template_name: str):
+        """
+        Retrieves the Typst packages a template's documents import.
+
+        Templates declare them in the "packages" list of their template.json,
+        so they can be fetched before a project is created.
+
+        Args:
+            template_name: The name of the template.
+
+        Returns:
+            A list of package specifications (e.g., "@preview/versatile-apa:7.1.5"),
+            empty if the template declares none.
+        """
+        manifest = self.templates_dir / template_name / "template.json"
+        if not manifest.is_file():
+            return []
+
+        try:
+            packages = json.loads(manifest.read_text(encoding="utf-8")).get("packages", [])
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Warning: Could not read '{manifest}': {e}")
+            return []
+        return [str(spec) for spec in packages]
@@ -6,6 +6,9 @@ recent project paths, and other persistent application state. QSettings
 automatically handles platform-specific storage locations.
 """
 
+import hashlib
+from pathlib import Path
+
 from PySide6.QtCore import QObject, QSettings, Signal, Slot
 
 
@@ -193,3 +196,51 @@ class SettingsManager(QObject):
             value: The integer value to store.
         """
         self.settings.setValue(key, value)
+
+    # --- Project Settings ---
+
+    @Slot(str, str, str, result=str)
+    def get_project_setting(self, project_path: str, key: str, default_value: str = ""):
+        """
+        Retrieves a setting of one project, e.g., its preview format.
+
+        Project settings concern how Ergo works with a project, not the
+        document, so they are kept with the application settings rather than
+        in the project's form data.
+
+        Args:
+            project_path: The absolute path to the project directory.
+            key: The setting key to retrieve.
+            default_value: The value to return if the key doesn't exist.
+
+        Returns:
+            The setting value as a string, or the default value if not found.
+        """
+        return str(self.settings.value(self._project_key(project_path, key), default_value))
+
+    @Slot(str, str, str)
+    def set_project_setting(self, project_path: str, key: str, value: str):
+        """
+        Stores a setting of one project.
+
+        Args:
+            project_path: The absolute path to the project directory.
+            key: The setting key.
+            value: The value to store.
+        """
+        self.settings.setValue(self._project_key(project_path, key), value)
+
+    @staticmethod
+    def _project_key(project_path: str, key: str) -> str:
+        """
+        Builds the QSettings key of a project setting.
+
+        Paths contain separators QSettings would read as groups, so the
+        project is identified by a digest of its resolved path.
+
+        Args:
+            project_path: The absolute path to the project directory.
+            key: The setting key.
+        """
+        digest = hashlib.blake2b(str(Path(project_path).resolve()).encode("utf-8"), digest_size=8).hexdigest()
+        return f"projects/{digest}/{key}"
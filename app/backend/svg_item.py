@@ -5,56 +5,157 @@ This module provides the SvgItem class, a QQuickPaintedItem subclass
 that uses QSvgRenderer to render SVG content directly. This offers better
 scaling quality than QML's Image component for vector graphics by avoiding
 rasterization at fixed resolutions.
+
+Page URLs from the OutputMonitor carry the revision of the page's content
+("?rev=<digest>"). The bytes of that revision are taken from the shared page
+cache when available, so a page the monitor just read is not read again.
+
+Pages are rasterized in fixed-size tiles, and only the tiles in view. The
+item can cover just the visible part of its page (see the pageSize and
+viewport properties), so its backing image never exceeds the view, however
+far the page is zoomed. Tiles are rendered at discrete zoom buckets and
+kept in the shared tile cache: while zooming, the tiles of the nearest
+cached bucket are drawn scaled until the tiles of the new bucket are
+rendered, followed by the ring of tiles around the view.
+
+Parsing and rasterizing happen on the workers of the SvgRenderPool, never on
+the GUI thread. When the source changes to a new revision, the item keeps
+showing the previous one until the tiles in view of the new one are
+rendered, and then switches to it at once.
 """
 
-from PySide6.QtCore import Property, QUrl, Signal
+from typing import Optional
+
+from PySide6.QtCore import Property, QPointF, QRectF, QSizeF, Qt, QUrl, QUrlQuery, Signal
 from PySide6.QtGui import QPainter
-from PySide6.QtQuick import QQuickPaintedItem
-from PySide6.QtSvg import QSvgRenderer
+from PySide6.QtQuick import QQuickItem, QQuickPaintedItem
+
+from .svg_render_pool import (
+    BUCKETS_PER_OCTAVE,
+    PRIORITY_LOAD,
+    PRIORITY_PREFETCH,
+    PRIORITY_VISIBLE,
+    RenderTicket,
+    render_pool,
+    tile_grid,
+    tiles_in,
+)
+from .tile_cache import TILE_SIZE, tile_cache
 
 
 class SvgItem(QQuickPaintedItem):
     """
     A QML item that renders SVG files using QSvgRenderer.
-    
+
     This component redraws the vector content whenever the item is resized,
     ensuring crisp edges at any zoom level. It replaces the standard Image
     element for SVG previewing purposes.
-    
+
     Attributes:
         source (str): The URL or path to the SVG file.
+        pageSize (QSizeF): The size the whole page is shown at, in item
+            coordinates. Defaults to the item's size.
+        viewport (QRectF): The part of the page the item covers, in page
+            coordinates. Defaults to the whole page.
     """
 
     # Signal emitted when the source property changes
     sourceChanged = Signal()
 
+    # Signals emitted when the page geometry changes
+    pageSizeChanged = Signal()
+    viewportChanged = Signal()
+
+    # Signal emitted by paint(), which may run on the render thread, to
+    # request the missing tiles on the GUI thread
+    _painted = Signal()
+
     def __init__(self, parent=None):
         """Initializes the SvgItem."""
         super().__init__(parent)
         self._source = ""
-        self._renderer = QSvgRenderer()
+        self._loads = 0
+
+        # Content shown: its file, revision, the tile revision its tiles are
+        # keyed by, and its view box
+        self._path = ""
+        self._revision = ""
+        self._tile_revision = ""
+        self._view_box = QRectF()
+        # Tile revision shown before, whose tiles stand in until the tiles of
+        # the current one are rendered
+        self._previous_tile_revision = ""
+        # Content requested from the pool and not shown yet: a dictionary
+        # with its path, revision and tile revision ("key")
+        self._pending: Optional[dict] = None
+
+        # Generation token of the content shown or pending, cancelled when
+        # the source moves on
+        self._ticket = RenderTicket()
+        # Whether a request is in the pool, and whether another one is due
+        # once it returns
+        self._in_flight = False
+        self._request_again = False
+
+        self._page_size = QSizeF()
+        self._viewport = QRectF()
+        self._has_viewport = False
+        # Device pixel ratio of the window, tracked on the GUI thread since
+        # paint() may run on the render thread
+        self._pixel_ratio = 1.0
+
+        # Whether the last paint missed tiles in view
+        self._missing = False
+        self._painted.connect(self._request_tiles, Qt.ConnectionType.QueuedConnection)
 
         # Enable antialiasing for smoother vector lines
         self.setAntialiasing(True)
-        
-        # Render to an internal Image buffer (software rasterization).
-        # This is generally performant for document viewing where the content
-        # is static but the view transforms (zoom/pan) change.
+
+        # Render to an internal Image buffer (software rasterization). The
+        # buffer only covers the item, which covers the part of the page in
+        # view; the page itself is rendered into cached tiles.
         self.setRenderTarget(QQuickPaintedItem.RenderTarget.Image)
-        self.setMipmap(True)
 
     def paint(self, painter: QPainter):
         """
-        Paints the SVG content onto the item.
-        
+        Paints the cached tiles of the part of the page the item covers.
+
+        Tiles that are not cached yet are drawn from another zoom bucket or
+        the previous revision if possible, and requested from the pool.
+
         Args:
             painter: The QPainter used for drawing.
         """
-        if self._renderer.isValid():
-            # Render the SVG into the full bounding rectangle of the item.
-            # QSvgRenderer handles the scaling automatically based on the
-            # target rectangle size.
-            self._renderer.render(painter, self.boundingRect())
+        grid = self._tile_grid()
+        if grid is None:
+            return
+        bucket, bucket_scale, scale = grid
+
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        viewport = self._page_viewport()
+        # Maps bucket pixels to item coordinates
+        factor = scale / bucket_scale
+        origin = viewport.topLeft()
+
+        missing = False
+        # Other buckets with tiles of the revision, nearest first, looked up
+        # once per paint
+        stand_in_buckets = None
+        for column, row in tiles_in(self._shown_page_size(), viewport, bucket_scale / scale, margin=0):
+            target = QRectF(column * TILE_SIZE * factor, row * TILE_SIZE * factor,
+                            TILE_SIZE * factor, TILE_SIZE * factor).translated(-origin)
+            image = tile_cache.get((self._tile_revision, bucket, column, row))
+            if image is not None:
+                painter.drawImage(target, image)
+                continue
+            missing = True
+            if stand_in_buckets is None:
+                stand_in_buckets = sorted(tile_cache.buckets(self._tile_revision) - {bucket},
+                                          key=lambda other: abs(other - bucket))
+            self._paint_stand_in(painter, target, bucket, stand_in_buckets, column, row)
+
+        self._missing = missing
+        self._painted.emit()
 
     @Property(str, notify=sourceChanged)
     def source(self):
@@ -65,7 +166,7 @@ class SvgItem(QQuickPaintedItem):
     def source(self, value):
         """
         Sets the source URL of the SVG.
-        
+
         Args:
             value: The new source URL.
         """
@@ -76,17 +177,117 @@ class SvgItem(QQuickPaintedItem):
         self.sourceChanged.emit()
         self._load_svg()
 
+    @Property(QSizeF, notify=pageSizeChanged)
+    def pageSize(self):
+        """Gets the size the whole page is shown at."""
+        return self._page_size
+
+    @pageSize.setter
+    def pageSize(self, value):
+        """
+        Sets the size the whole page is shown at.
+
+        Args:
+            value: The size in item coordinates, or an empty size to use the
+                item's size.
+        """
+        if self._page_size == value:
+            return
+        self._page_size = QSizeF(value)
+        self.pageSizeChanged.emit()
+        self.update()
+
+    @Property(QRectF, notify=viewportChanged)
+    def viewport(self):
+        """Gets the part of the page the item covers."""
+        return self._viewport
+
+    @viewport.setter
+    def viewport(self, value):
+        """
+        Sets the part of the page the item covers.
+
+        Args:
+            value: The rectangle in page coordinates, or an empty rectangle
+                for the whole page.
+        """
+        if self._has_viewport and self._viewport == value:
+            return
+        self._viewport = QRectF(value)
+        self._has_viewport = True
+        self.viewportChanged.emit()
+        if self._viewport.isEmpty():
+            # Nothing of the page is in view, so nothing is painted; the
+            # edge facing the view is prefetched instead.
+            self._missing = False
+            self._request_tiles()
+        else:
+            self.update()
+
+    def itemChange(self, change, value):
+        """Tracks the device pixel ratio of the window showing the item."""
+        if change in (QQuickItem.ItemChange.ItemSceneChange, QQuickItem.ItemChange.ItemDevicePixelRatioHasChanged):
+            window = value.window if change == QQuickItem.ItemChange.ItemSceneChange else self.window()
+            ratio = window.devicePixelRatio() if window else 1.0
+            if ratio != self._pixel_ratio:
+                self._pixel_ratio = ratio
+                self.update()
+        super().itemChange(change, value)
+
+    def tiles_rendered(self, result: dict):
+        """
+        Takes the result of a request to the pool, on the GUI thread.
+
+        The result of pending content switches the item to it at once; later
+        results repaint the item if they rendered tiles in view.
+
+        Args:
+            result: The result dictionary of the SvgRenderPool.
+        """
+        if result["ticket"] is not self._ticket:
+            return
+        self._in_flight = False
+
+        pending = self._pending
+        if pending is not None and result["key"] == pending["key"]:
+            self._pending = None
+            if not result["loaded"]:
+                print(f"SvgItem: Failed to load SVG from {pending['path']}")
+                return
+
+            self._path = pending["path"]
+            self._revision = pending["revision"]
+            self._previous_tile_revision = self._tile_revision
+            self._tile_revision = pending["key"]
+            self._view_box = result["view_box"]
+
+            # Update the implicit size of the item to match the SVG's natural size
+            default_size = result["default_size"]
+            self.setImplicitWidth(default_size.width())
+            self.setImplicitHeight(default_size.height())
+
+            # Force a repaint since the content has changed
+            self.update()
+        elif result["rendered"] and result["margin"] == 0:
+            self.update()
+
+        if self._request_again:
+            self._request_again = False
+            self._request_tiles()
+
     def _load_svg(self):
-        """Loads the SVG file from the source URL."""
+        """Requests the SVG file of the source URL from the pool."""
         url_str = self._source
         path = url_str
+        revision = ""
 
-        # Handle URL parsing to extract local file path
+        # Handle URL parsing to extract local file path and revision
         if "file://" in url_str:
             qurl = QUrl(url_str)
             if qurl.isValid():
                 path = qurl.toLocalFile()
-        
+                revision = QUrlQuery(qurl).queryItemValue("rev")
+
         # Manually strip query parameters (like cache busters ?t=...)
         # if they weren't handled by QUrl (or if passed as raw string)
         if "?" in path:
@@ -94,15 +295,127 @@ class SvgItem(QQuickPaintedItem):
 
         if not path:
             return
+        latest = self._pending["revision"] if self._pending is not None else self._revision
+        if revision and revision == latest:
+            # Same content under another file name: later requests read the
+            # new file if the revision is no longer cached
+            if self._pending is not None:
+                self._pending["path"] = path
+            else:
+                self._path = path
+            return
 
-        # Load the SVG data into the renderer
-        if self._renderer.load(path):
-            # Update the implicit size of the item to match the SVG's natural size
-            default_size = self._renderer.defaultSize()
-            self.setImplicitWidth(default_size.width())
-            self.setImplicitHeight(default_size.height())
-            
-            # Force a repaint since the content has changed
-            self.update()
+        # The requests of the content shown or pending so far are superseded
+        self._ticket.cancel()
+        self._ticket = RenderTicket()
+        self._in_flight = False
+        self._request_again = False
+
+        # Content without a revision gets tiles of its own per load
+        self._loads += 1
+        key = revision or f"{path}#{id(self)}:{self._loads}"
+        self._pending = {"path": path, "revision": revision, "key": key}
+        self._request_tiles()
+
+    def _request_tiles(self):
+        """
+        Requests tiles from the pool, one request at a time.
+
+        Pending content is requested first, then the tiles the last paint
+        missed, and then the uncached tiles around the view.
+        """
+        if self._in_flight:
+            self._request_again = True
+            return
+
+        if self._pending is not None:
+            path, revision, key = self._pending["path"], self._pending["revision"], self._pending["key"]
+            margin, priority = 0, PRIORITY_LOAD
         else:
-            print(f"SvgItem: Failed to load SVG from {path}")
\ No newline at end of file
+            margin, priority = (0, PRIORITY_VISIBLE) if self._missing else (1, PRIORITY_PREFETCH)
+            if not self._uncached_tiles(margin):
+                if self._missing:
+                    # Rendered meanwhile, e.g., by the request for the
+                    # tiles around the view
+                    self.update()
+                return
+            path, revision, key = self._path, self._revision, self._tile_revision
+
+        self._in_flight = True
+        render_pool().submit(self, self._ticket, key, path, revision, self._shown_page_size(),
+                             self._page_viewport(), self._pixel_ratio, margin, priority)
+
+    def _uncached_tiles(self, margin: int) -> bool:
+        """
+        Checks whether tiles of the part of the page in view are missing.
+
+        Args:
+            margin: Number of extra tiles around the part.
+
+        Returns:
+            True if at least one tile is not cached.
+        """
+        grid = self._tile_grid()
+        if grid is None:
+            return False
+        bucket, bucket_scale, scale = grid
+        return any(
+            not tile_cache.contains((self._tile_revision, bucket, column, row))
+            for column, row in tiles_in(self._shown_page_size(), self._page_viewport(), bucket_scale / scale, margin)
+        )
+
+    def _page_viewport(self) -> QRectF:
+        """Returns the part of the page the item covers, in page coordinates."""
+        if self._has_viewport:
+            return self._viewport
+        return QRectF(QPointF(0, 0), self._shown_page_size())
+
+    def _shown_page_size(self) -> QSizeF:
+        """Returns the size the whole page is shown at."""
+        if self._page_size.isValid() and not self._page_size.isEmpty():
+            return self._page_size
+        return QSizeF(self.width(), self.height())
+
+    def _tile_grid(self):
+        """
+        Picks the zoom bucket of the tiles of the content shown.
+
+        Returns:
+            A (bucket, bucket scale, scale) tuple (see tile_grid()), or None
+            if nothing is shown or the page has no size.
+        """
+        if not self._tile_revision:
+            return None
+        return tile_grid(self._view_box, self._shown_page_size().width(), self._pixel_ratio)
+
+    def _paint_stand_in(self, painter: QPainter, target: QRectF, bucket: int, others: list[int],
+                        column: int, row: int):
+        """
+        Draws a tile that is not rendered yet from other cached tiles.
+
+        Prefers the nearest zoom bucket of the current revision, then the
+        same tile of the previous revision.
+
+        Args:
+            painter: The QPainter used for drawing.
+            target: Where the tile goes, in item coordinates.
+            bucket: The zoom bucket of the tile.
+            others: The other zoom buckets with tiles of the revision,
+                nearest first.
+            column: The tile column.
+            row: The tile row.
+        """
+        for other in others:
+            # Size of a tile of the other bucket relative to this bucket
+            ratio = 2 ** ((other - bucket) / BUCKETS_PER_OCTAVE)
+            source_tile = TILE_SIZE * ratio
+            x, y = column * source_tile, row * source_tile
+            image = tile_cache.get((self._tile_revision, other, int(x // TILE_SIZE), int(y // TILE_SIZE)))
+            if image is not None:
+                painter.drawImage(target, image, QRectF(x % TILE_SIZE, y % TILE_SIZE, source_tile, source_tile))
+                return
+
+        if self._previous_tile_revision:
+            image = tile_cache.get((self._previous_tile_revision, bucket, column, row))
+            if image is not None:
+                painter.drawImage(target, image)
@@ -0,0 +1,403 @@
+"""
+Parses and rasterizes the SVG preview pages off the GUI thread.
+
+An SvgItem hands the pool a render request: its page revision, the size the
+page is shown at and the part of it in view. A worker of the pool parses the
+page (once per revision; parsed pages are kept for the next requests),
+renders the tiles of that part which are not cached yet into the shared tile
+cache, and reports back to the item on the GUI thread. A compile that
+changes many pages therefore no longer blocks the UI while the pages parse.
+
+A QSvgRenderer belongs to the thread that created it, so every worker
+thread keeps the pages it parsed to itself, and drops them on that thread,
+also when the pool shuts down.
+
+Every request carries the RenderTicket of the content the item asked for.
+When the item moves on to a newer revision it cancels its ticket: the
+requests of the superseded revision still waiting are skipped, the ones
+running stop after their current tile, and their results are not delivered.
+"""
+
+import math
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QByteArray, QObject, QRectF, QRunnable, QSizeF, Qt, QThread, QThreadPool, Signal, Slot
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtSvg import QSvgRenderer
+
+from .page_cache import page_cache
+from .tile_cache import TILE_SIZE, tile_cache
+
+# Zoom buckets per doubling of the scale. Tiles are rendered at the next
+# bucket above the actual scale and drawn slightly downscaled.
+BUCKETS_PER_OCTAVE = 4
+
+# Priorities of the requests in the pool: the first tiles of a new
+# revision, the missing tiles in view, and the tiles around the view
+PRIORITY_LOAD = 2
+PRIORITY_VISIBLE = 1
+PRIORITY_PREFETCH = 0
+
+
+def tile_grid(view_box: QRectF, page_width: float, ratio: float) -> Optional[tuple]:
+    """
+    Picks the zoom bucket of the tiles for the size a page is shown at.
+
+    Args:
+        view_box: The view box of the SVG page.
+        page_width: The width the page is shown at, in item coordinates.
+        ratio: The device pixel ratio of the window.
+
+    Returns:
+        A (bucket, bucket scale, scale) tuple, where the scales convert SVG
+        units to device pixels (bucket scale) and to item coordinates
+        (scale), or None if the page has no size.
+    """
+    if view_box.width() <= 0 or page_width <= 0:
+        return None
+    scale = page_width / view_box.width()
+    bucket = math.ceil(math.log2(scale * ratio) * BUCKETS_PER_OCTAVE - 1e-9)
+    return bucket, 2 ** (bucket / BUCKETS_PER_OCTAVE), scale
+
+
+def tiles_in(page_size: QSizeF, viewport: QRectF, factor: float, margin: int) -> list[tuple]:
+    """
+    Lists the tiles covering a part of a page.
+
+    Args:
+        page_size: The size the page is shown at.
+        viewport: The part of the page in page coordinates.
+        factor: Converts page coordinates to bucket pixels.
+        margin: Number of extra tiles around the part.
+
+    Returns:
+        (column, row) tuples, rows first.
+    """
+    columns = math.ceil(page_size.width() * factor / TILE_SIZE)
+    rows = math.ceil(page_size.height() * factor / TILE_SIZE)
+    first_column = max(0, math.floor(viewport.left() * factor / TILE_SIZE) - margin)
+    last_column = min(columns - 1, math.ceil(viewport.right() * factor / TILE_SIZE) - 1 + margin)
+    first_row = max(0, math.floor(viewport.top() * factor / TILE_SIZE) - margin)
+    last_row = min(rows - 1, math.ceil(viewport.bottom() * factor / TILE_SIZE) - 1 + margin)
+    if viewport.height() <= 0:
+        # A page next to the view: its edge facing the view is prefetched
+        last_row = min(rows - 1, first_row + margin)
+    return [
+        (column, row)
+        for row in range(first_row, last_row + 1)
+        for column in range(first_column, last_column + 1)
+    ]
+
+
+def render_tile(renderer: QSvgRenderer, bucket_scale: float, column: int, row: int) -> QImage:
+    """
+    Rasterizes one tile of a page.
+
+    Args:
+        renderer: The renderer holding the parsed page.
+        bucket_scale: Device pixels per SVG unit.
+        column: The tile column.
+        row: The tile row.
+
+    Returns:
+        The tile image.
+    """
+    image = QImage(TILE_SIZE, TILE_SIZE, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    view_box = renderer.viewBoxF()
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    bounds = QRectF(-column * TILE_SIZE, -row * TILE_SIZE,
+                    view_box.width() * bucket_scale, view_box.height() * bucket_scale)
+    renderer.render(painter, bounds)
+    painter.end()
+    return image
+
+
+class RenderTicket:
+    """
+    Generation token of the content an item requested.
+
+    Cancelling the ticket drops every request made with it.
+    """
+
+    __slots__ = ("cancelled",)
+
+    def __init__(self):
+        """Initializes a live ticket."""
+        self.cancelled = False
+
+    def cancel(self):
+        """Marks the requests made with the ticket as superseded."""
+        self.cancelled = True
+
+
+class _RenderJob(QRunnable):
+    """Runs one render request on a worker of the pool."""
+
+    def __init__(self, pool: "SvgRenderPool", request: dict):
+        super().__init__()
+        self._pool = pool
+        self._request = request
+
+    def run(self):
+        self._pool._run(self._request)
+
+
+class _ReleaseJob(QRunnable):
+    """Drops the parsed pages of the worker thread it runs on."""
+
+    def __init__(self, pool: "SvgRenderPool", barrier: threading.Barrier):
+        super().__init__()
+        self._pool = pool
+        self._barrier = barrier
+
+    def run(self):
+        self._pool._release(self._barrier)
+
+
+class SvgRenderPool(QObject):
+    """
+    Worker pool parsing SVG pages and rendering their tiles.
+
+    Every worker thread keeps the pages it parsed in a small LRU cache keyed
+    by the tile revision of the page, so later requests for the same content
+    on that thread only render tiles.
+    """
+
+    # Signal emitted by the workers with the result of a request; delivered
+    # to the item on the GUI thread
+    _finished = Signal(object)
+
+    def __init__(self, max_threads: int = 0, max_documents: int = 8, parent=None):
+        """
+        Initializes the SvgRenderPool.
+
+        Args:
+            max_threads: Number of worker threads (0 picks one less than the
+                number of cores, between 1 and 4).
+            max_documents: Number of parsed pages kept per worker thread at
+                most.
+            parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.max_documents = max_documents
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads or max(1, min(4, QThread.idealThreadCount() - 1)))
+        # Workers own the renderers they parsed, so they are kept alive
+        self._pool.setExpiryTimeout(-1)
+
+        self._lock = threading.Lock()
+        self._closing = False
+        # Parsed pages of every worker thread, by thread identifier. Only
+        # the owning thread adds, uses and drops its renderers.
+        self._renderers: dict[int, OrderedDict[str, QSvgRenderer]] = {}
+        self._counters = {"requests": 0, "skipped": 0, "parsed": 0, "tiles": 0}
+
+        self._finished.connect(self._deliver)
+
+    def submit(self, item, ticket: RenderTicket, key: str, path: str, revision: str,
+               page_size: QSizeF, viewport: QRectF, ratio: float, margin: int, priority: int):
+        """
+        Queues the rendering of the uncached tiles of a part of a page.
+
+        The result is handed to item.tiles_rendered() on the GUI thread,
+        unless the ticket was cancelled or the item destroyed meanwhile.
+
+        Args:
+            item: The requesting SvgItem.
+            ticket: The ticket of the requested content.
+            key: The tile revision of the page (its revision, or a key of
+                its own for content without one).
+            path: The page file, read if the page cache lacks the revision
+                (e.g., after the cache evicted a page parsed before).
+            revision: The content digest of the page, or an empty string.
+            page_size: The size the page is shown at.
+            viewport: The part of the page in view, in page coordinates.
+            ratio: The device pixel ratio of the window.
+            margin: Number of extra tiles around the part.
+            priority: One of the PRIORITY_* constants.
+        """
+        request = {
+            "item": weakref.ref(item), "ticket": ticket, "key": key, "path": path, "revision": revision,
+            "page_size": QSizeF(page_size), "viewport": QRectF(viewport), "ratio": ratio, "margin": margin,
+        }
+        with self._lock:
+            self._counters["requests"] += 1
+        self._pool.start(_RenderJob(self, request), priority)
+
+    @Slot()
+    def shutdown(self):
+        """
+        Stops the workers.
+
+        Requests still waiting are dropped, and running ones stop after
+        their current tile. Then every worker thread drops its parsed pages;
+        returns once they did.
+        """
+        self._closing = True
+        self._pool.clear()
+        # As many release jobs as the pool has threads at most, held by a
+        # barrier until all of them run, so each runs on a thread of its own
+        # and every thread that parsed pages gets one. They are queued before
+        # waiting, which ends the threads.
+        count = self._pool.maxThreadCount()
+        barrier = threading.Barrier(count)
+        for _ in range(count):
+            self._pool.start(_ReleaseJob(self, barrier))
+        self._pool.waitForDone()
+
+    def stats(self) -> dict:
+        """
+        Describes the work of the pool.
+
+        Returns:
+            A dictionary with the number of requests submitted ("requests"),
+            skipped as superseded ("skipped"), the pages parsed ("parsed"),
+            the tiles rendered ("tiles") and the parsed pages kept by all
+            worker threads ("documents").
+        """
+        with self._lock:
+            documents = sum(len(renderers) for renderers in self._renderers.values())
+            return dict(self._counters, documents=documents)
+
+    def _renderer(self, request: dict) -> Optional[QSvgRenderer]:
+        """
+        Gets the parsed page of a request on the current worker thread,
+        parsing it if this thread has not yet.
+
+        Args:
+            request: The render request.
+
+        Returns:
+            The renderer, or None if the page could not be read or parsed,
+            or the request was cancelled meanwhile.
+        """
+        with self._lock:
+            renderers = self._renderers.setdefault(threading.get_ident(), OrderedDict())
+            renderer = renderers.get(request["key"])
+            if renderer is not None:
+                renderers.move_to_end(request["key"])
+                return renderer
+        if request["ticket"].cancelled or self._closing:
+            return None
+
+        renderer = self._parse(request)
+        if renderer is None:
+            # A failed parse is not kept, so the page is read again next time
+            return None
+        dropped = []
+        with self._lock:
+            renderers[request["key"]] = renderer
+            while len(renderers) > self.max_documents:
+                dropped.append(renderers.popitem(last=False)[1])
+        # The renderers dropped are deleted here, on the thread owning them
+        del dropped
+        return renderer
+
+    def _release(self, barrier: threading.Barrier):
+        """
+        Drops the parsed pages of the current worker thread.
+
+        Args:
+            barrier: Holds the thread until every release job runs.
+        """
+        with self._lock:
+            renderers = self._renderers.pop(threading.get_ident(), None)
+        if renderers is not None:
+            renderers.clear()
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+
+    def _parse(self, request: dict) -> Optional[QSvgRenderer]:
+        """
+        Parses the page of a request.
+
+        Args:
+            request: The render request.
+
+        Returns:
+            The renderer, or None if the page could not be read or parsed.
+        """
+        data = page_cache.get(request["revision"]) if request["revision"] else None
+        if data is None:
+            try:
+                data = Path(request["path"]).read_bytes()
+            except OSError:
+                return None
+        renderer = QSvgRenderer(QByteArray(data))
+        if request["revision"]:
+            # The bytes the monitor read were handed over; the cache may
+            # evict them now
+            page_cache.unpin(request["revision"])
+        with self._lock:
+            self._counters["parsed"] += 1
+        return renderer if renderer.isValid() else None
+
+    def _run(self, request: dict):
+        """
+        Renders the uncached tiles of a request on a worker.
+
+        Args:
+            request: The render request.
+        """
+        ticket = request["ticket"]
+        if ticket.cancelled or self._closing:
+            with self._lock:
+                self._counters["skipped"] += 1
+            return
+
+        result = {"item": request["item"], "ticket": ticket, "key": request["key"],
+                  "revision": request["revision"], "margin": request["margin"], "loaded": False, "rendered": 0}
+        renderer = self._renderer(request)
+        if renderer is not None:
+            result.update(loaded=True, view_box=renderer.viewBoxF(), default_size=renderer.defaultSize())
+            grid = tile_grid(result["view_box"], request["page_size"].width(), request["ratio"])
+            if grid is not None:
+                bucket, bucket_scale, scale = grid
+                tiles = tiles_in(request["page_size"], request["viewport"], bucket_scale / scale, request["margin"])
+                for column, row in tiles:
+                    if ticket.cancelled or self._closing:
+                        break
+                    tile_key = (request["key"], bucket, column, row)
+                    if not tile_cache.contains(tile_key):
+                        tile_cache.put(tile_key, render_tile(renderer, bucket_scale, column, row))
+                        result["rendered"] += 1
+
+        with self._lock:
+            self._counters["tiles"] += result["rendered"]
+        self._finished.emit(result)
+
+    def _deliver(self, result: dict):
+        """
+        Hands a result to its item on the GUI thread.
+
+        Args:
+            result: The result of a request.
+        """
+        item = result["item"]()
+        if item is None or result["ticket"].cancelled:
+            return
+        try:
+            item.tiles_rendered(result)
+        except RuntimeError:
+            # The QML item was destroyed.
+            pass
+
+
+# The pool shared by every SvgItem
+_render_pool: Optional[SvgRenderPool] = None
+
+
+def render_pool() -> SvgRenderPool:
+    """Returns the pool shared by every SvgItem, creating it once."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = SvgRenderPool()
+    return _render_pool
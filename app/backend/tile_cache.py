@@ -0,0 +1,144 @@
+"""
+Caches the rasterized tiles of the preview pages.
+
+SvgItem rasterizes a page in fixed-size square tiles, and only the tiles of
+the part of the page in view (plus a ring of neighbours). Tiles are kept
+here, keyed by (page revision, zoom bucket, tile column, tile row), so
+scrolling back to a part of a page, or zooming back to a level already
+rendered, draws cached tiles instead of rasterizing again. The cache is
+bounded by the memory of its images; the least recently used tiles are
+dropped first. An index of the zoom buckets of every revision lets an item
+find stand-in tiles without going through the whole cache.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from PySide6.QtGui import QImage
+
+# Edge length of a tile in device pixels
+TILE_SIZE = 256
+
+
+class TileCache:
+    """
+    A memory-bounded LRU cache of tile images.
+
+    Thread-safe, so tiles can be rendered off the GUI thread.
+    """
+
+    def __init__(self, max_bytes: int = 96 * 1024 * 1024):
+        """
+        Initializes the TileCache.
+
+        Args:
+            max_bytes: Total size of the cached images at most.
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._tiles: OrderedDict[tuple, QImage] = OrderedDict()
+        self._bytes = 0
+        # Number of cached tiles of every (revision, zoom bucket)
+        self._buckets: dict[str, dict[int, int]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def put(self, key: tuple, image: QImage):
+        """
+        Stores a tile.
+
+        Args:
+            key: (revision, zoom bucket, column, row) of the tile.
+            image: The rendered tile.
+        """
+        with self._lock:
+            previous = self._tiles.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.sizeInBytes()
+            else:
+                counts = self._buckets.setdefault(key[0], {})
+                counts[key[1]] = counts.get(key[1], 0) + 1
+            self._tiles[key] = image
+            self._bytes += image.sizeInBytes()
+            while self._bytes > self.max_bytes and len(self._tiles) > 1:
+                dropped_key, dropped = self._tiles.popitem(last=False)
+                self._bytes -= dropped.sizeInBytes()
+                self._unindex(dropped_key)
+
+    def get(self, key: tuple) -> Optional[QImage]:
+        """
+        Gets a tile.
+
+        Args:
+            key: (revision, zoom bucket, column, row) of the tile.
+
+        Returns:
+            The image, or None if the tile is not cached.
+        """
+        with self._lock:
+            image = self._tiles.get(key)
+            if image is None:
+                self._misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self._hits += 1
+            return image
+
+    def contains(self, key: tuple) -> bool:
+        """
+        Checks whether a tile is cached, without counting a lookup.
+
+        Args:
+            key: (revision, zoom bucket, column, row) of the tile.
+
+        Returns:
+            True if the tile is cached.
+        """
+        with self._lock:
+            return key in self._tiles
+
+    def buckets(self, revision: str) -> set:
+        """
+        Lists the zoom buckets that have tiles of a revision.
+
+        Args:
+            revision: The content digest of the page.
+
+        Returns:
+            The set of zoom buckets.
+        """
+        with self._lock:
+            return set(self._buckets.get(revision, ()))
+
+    def clear(self):
+        """Drops every tile."""
+        with self._lock:
+            self._tiles.clear()
+            self._buckets.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Describes the cache.
+
+        Returns:
+            A dictionary with the number of cached tiles ("tiles"), their
+            total size ("bytes") and the lookups that found or missed a tile
+            ("hits", "misses").
+        """
+        with self._lock:
+            return {"tiles": len(self._tiles), "bytes": self._bytes, "hits": self._hits, "misses": self._misses}
+
+    def _unindex(self, key: tuple):
+        """Removes an evicted tile from the bucket index, with the lock held."""
+        counts = self._buckets[key[0]]
+        counts[key[1]] -= 1
+        if not counts[key[1]]:
+            del counts[key[1]]
+            if not counts:
+                del self._buckets[key[0]]
+
+
+# The cache shared by every SvgItem
+tile_cache = TileCache()
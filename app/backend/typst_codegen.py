@@ -0,0 +1,414 @@
+"""
+Generates the Typst sources of APA7 projects from form data.
+
+This module turns the form data dictionary into the text of main.typ and of
+the section files, using the versatile-apa package. It has no Qt dependency,
+so it can run on the generation worker thread or outside the application.
+
+Everything that does not depend on the form data is prepared once at import
+time: the fixed parts of main.typ are constant strings, every fragment with
+placeholders is a bound str.format, and content blocks are rendered by one
+writer function per block type. Escaping is a single str.translate pass.
+Output is streamed into an io.StringIO buffer instead of being built by
+repeated string concatenation.
+"""
+
+import io
+
+# The Typst package imported by every generated file.
+PACKAGE_IMPORT = '#import "@preview/versatile-apa:7.1.5": *'
+
+# Characters that have special meaning in Typst markup, and their escapes.
+# Note: This is a basic implementation. May need to be expanded.
+_ESCAPE_TABLE = str.maketrans({
+    "\\": "\\\\",
+    "[": "\\[",
+    "]": "\\]",
+    "#": "\\#",
+    "$": "\\$",
+})
+
+# --- main.typ fragments ---
+
+_MAIN_HEADER = (
+    PACKAGE_IMPORT + "\n"
+    "\n"
+    "// Document titles should be formatted in title case\n"
+    "#let doc-title = [{title}]\n"
+    "\n"
+    "#show: versatile-apa.with(\n"
+    "  title: doc-title,\n"
+    "\n"
+).format
+
+_AUTHOR_ENTRY = "    (\n      name: [{name}],\n".format
+_AUTHOR_AFFILIATIONS = "      affiliations: ({ids}),\n".format
+_AFFILIATION_ENTRY = '    (\n      id: "AF-{number}",\n      name: [{name}],\n    ),\n'.format
+_ORCID_ENTRY = '    #include-orcid([{name}], "{orcid}")\n\n'.format
+
+_COURSE = "  course: [{}],\n".format
+_INSTRUCTOR = "  instructor: [{}],\n".format
+_DUE_DATE = "  due-date: [{}],\n".format
+_RUNNING_HEAD = "  running-head: [{}],\n".format
+_ABSTRACT = "  abstract: [{}],\n".format
+_KEYWORDS = "  keywords: {},\n".format
+
+_COMMON_FIELDS = (
+    "  // Common fields\n"
+    '  font-family: "{font_family}",\n'
+    "  font-size: {font_size}pt,\n"
+    '  region: "{region}",\n'
+    '  language: "{language}",\n'
+    '  paper-size: "{paper_size}",\n'
+    "  implicit-introduction-heading: false,\n"
+    "  abstract-as-description: {abstract_as_desc},\n"
+    ")\n"
+    "\n"
+).format
+
+_OUTLINES = (
+    "// Document outlines\n"
+    "#outline()\n"
+    "#pagebreak()\n"
+    "#outline(target: figure.where(kind: table), title: [Tables])\n"
+    "#pagebreak()\n"
+    "#outline(target: figure.where(kind: image), title: [Figures])\n"
+    "#pagebreak()\n"
+    "#outline(target: figure.where(kind: math.equation), title: [Equations])\n"
+    "#pagebreak()\n"
+    "#outline(target: figure.where(kind: raw), title: [Listings])\n"
+    "#pagebreak()\n"
+    "\n"
+    "// Main document content\n"
+)
+
+_INCLUDE = '#include "sections/{}.typ"\n'.format
+
+_BIBLIOGRAPHY = (
+    "\n"
+    "#pagebreak()\n"
+    "#bibliography(\n"
+    '  "bibliography/ref.bib",\n'
+    '  style: "csl/apa.csl",\n'
+    "  full: true,\n"
+    "  title: auto,\n"
+    ")"
+)
+
+# --- Section fragments ---
+
+_SECTION_FILE_HEADER = PACKAGE_IMPORT + "\n\n"
+_BLOCK_SEPARATOR = "\n\n"
+_HEADING = "{marker} {title}\n\n".format
+_HEADING_MARKERS = ["=" * level for level in range(7)]
+
+_FIGURE_OPEN = '#figure(\n  image("../{}"),\n'.format
+_FIGURE_CAPTION = "  caption: [{}],\n".format
+_FIGURE_LABEL = " <{}>".format
+_FIGURE_NOTE = '\n#pad(top: 0.5em)[\n  #text(style: "italic")[Note.] {}\n]'.format
+
+
+def escape_typst(text: str) -> str:
+    """
+    Escapes special characters for Typst markup in a single pass.
+
+    Args:
+        text: The text to escape
+
+    Returns:
+        The escaped text safe for use in Typst
+    """
+    if not text:
+        return ""
+    return text.translate(_ESCAPE_TABLE)
+
+
+def render_main_typ(form_data: dict) -> str:
+    """
+    Builds the complete main.typ file content.
+
+    Args:
+        form_data: The form data dictionary (see DEFAULT_FORM_DATA in
+            apa7_form_handler for its keys).
+
+    Returns:
+        The complete main.typ file content as a string.
+    """
+    out = io.StringIO()
+    write = out.write
+
+    authors = form_data["authors"]
+    affiliations = form_data["affiliations"]
+
+    write(_MAIN_HEADER(title=escape_typst(form_data["title"])))
+
+    # Authors and affiliations
+    if authors and affiliations:
+        _write_authors(write, authors, affiliations)
+
+    # Student-specific fields
+    course = form_data["course"]
+    instructor = form_data["instructor"]
+    due_date = form_data["due_date"]
+    if course or instructor or due_date:
+        write("  // Student-specific fields\n")
+        if course:
+            write(_COURSE(escape_typst(course)))
+        if instructor:
+            write(_INSTRUCTOR(escape_typst(instructor)))
+        if due_date:
+            write(_DUE_DATE(escape_typst(due_date)))
+        else:
+            write("  due-date: datetime.today().display(),\n")
+        write("\n")
+
+    # Professional-specific fields
+    running_head = form_data["running_head"]
+    author_notes = form_data["author_notes"]
+    if running_head or author_notes:
+        write("  // Professional-specific fields\n")
+        if running_head:
+            write(_RUNNING_HEAD(escape_typst(running_head)))
+        if author_notes:
+            _write_author_notes(write, author_notes, authors)
+        write("\n")
+
+    # Abstract and keywords
+    abstract = form_data["abstract"]
+    keywords = form_data["keywords"]
+    if abstract or keywords:
+        if abstract:
+            write(_ABSTRACT(escape_typst(abstract)))
+        if keywords:
+            write(_KEYWORDS(render_keywords_list(keywords)))
+        write("\n")
+
+    # Common fields (formatting options)
+    write(_COMMON_FIELDS(
+        font_family=form_data["font_family"],
+        font_size=form_data["font_size"],
+        region=form_data["region"],
+        language=form_data["language"],
+        paper_size=form_data["paper_size"],
+        abstract_as_desc=str(form_data["abstract_as_desc"]).lower(),
+    ))
+
+    write(_OUTLINES)
+
+    # Include sections
+    for section in form_data["sections"]:
+        sec_id = section.get("id")
+        if sec_id and int(section.get("level", 1)) == 1:
+            write(_INCLUDE(sec_id))
+
+    write(_BIBLIOGRAPHY)
+
+    return out.getvalue()
+
+
+def render_section_file(group: list) -> str:
+    """
+    Builds the content of a section file.
+
+    Args:
+        group: The level 1 section followed by its subsections.
+
+    Returns:
+        The complete section file content as a string.
+    """
+    out = io.StringIO()
+    write = out.write
+
+    write(_SECTION_FILE_HEADER)
+    for index, section in enumerate(group):
+        if index:
+            write(_BLOCK_SEPARATOR)
+        _write_section(write, section)
+
+    return out.getvalue()
+
+
+def group_sections(sections: list) -> list:
+    """
+    Groups sections by the level 1 section whose file contains them.
+
+    Subsections that appear before any level 1 section are dropped, since
+    there is no file to append them to.
+
+    Args:
+        sections: The list of section dictionaries, in document order.
+
+    Returns:
+        A list of (level 1 section id, list of sections) tuples.
+    """
+    groups = []
+    for section in sections:
+        if int(section.get("level", 1)) == 1:
+            groups.append((section.get("id"), [section]))
+        elif groups:
+            groups[-1][1].append(section)
+    return [(l1_id, group) for l1_id, group in groups if l1_id]
+
+
+def render_keywords_list(keywords: str) -> str:
+    """
+    Converts comma-separated keywords string to Typst array format.
+
+    Args:
+        keywords: Comma-separated keywords string
+
+    Returns:
+        Typst array format string (e.g., ("keyword1", "keyword2"))
+    """
+    if not keywords:
+        return "()"
+
+    keyword_list = [kw.strip() for kw in keywords.split(",") if kw.strip()]
+    if not keyword_list:
+        return "()"
+
+    return "(" + ", ".join(f'"{escape_typst(kw)}"' for kw in keyword_list) + ")"
+
+
+def _write_authors(write, authors: list, affiliations: list):
+    """
+    Writes the authors and affiliations fields.
+
+    Args:
+        write: The write method of the output buffer.
+        authors: List of author dictionaries
+        affiliations: List of affiliation dictionaries
+    """
+    # Maps each affiliation id to its AF-N number (the first match wins).
+    numbers = {}
+    for idx, affiliation in enumerate(affiliations):
+        numbers.setdefault(affiliation.get("id"), idx + 1)
+
+    write("  // Authors and affiliations\n  authors: (\n")
+
+    for author in authors:
+        name = author.get("name", "")
+        affiliation_ids = author.get("affiliationIds", [])
+
+        # Skips authors without a name or without any affiliations
+        # (APA template requires at least one affiliation per author)
+        if name and affiliation_ids:
+            write(_AUTHOR_ENTRY(name=escape_typst(name)))
+            af_ids = [f'"AF-{numbers[aff_id]}"' for aff_id in affiliation_ids if aff_id in numbers]
+            if af_ids:
+                write(_AUTHOR_AFFILIATIONS(ids=", ".join(af_ids)))
+            write("    ),\n")
+
+    write("  ),\n  affiliations: (\n")
+    for idx, affiliation in enumerate(affiliations):
+        name = affiliation.get("name", "")
+        if name:
+            write(_AFFILIATION_ENTRY(number=idx + 1, name=escape_typst(name)))
+    write("  ),\n\n")
+
+
+def _write_author_notes(write, author_notes: str, authors: list):
+    """
+    Writes the author notes field with ORCID iDs.
+
+    Args:
+        write: The write method of the output buffer.
+        author_notes: The author notes text
+        authors: List of author dictionaries (may contain ORCID iDs)
+    """
+    write("  author-notes: [\n")
+
+    # Adds ORCID iDs for authors who have them
+    for author in authors:
+        name = author.get("name", "")
+        orcid = author.get("orcid", "")
+        if name and orcid:
+            write(_ORCID_ENTRY(name=escape_typst(name), orcid=orcid))
+
+    write("    ")
+    write(escape_typst(author_notes))
+    write("\n  ],\n")
+
+
+def _write_section(write, section: dict):
+    """
+    Writes the heading and body of a single section.
+
+    Args:
+        write: The write method of the output buffer.
+        section: The section dictionary.
+    """
+    write(_HEADING(
+        marker=_heading_marker(int(section.get("level", 1))),
+        title=escape_typst(section.get("title", "")),
+    ))
+
+    # Content comes from blocks (text/image) or falls back to simple content
+    blocks = section.get("blocks", [])
+    if not blocks:
+        write(section.get("content", ""))
+        return
+
+    first = True
+    for block in blocks:
+        writer = _BLOCK_WRITERS.get(block.get("type", "text"))
+        if writer is None:
+            continue
+        if not first:
+            write(_BLOCK_SEPARATOR)
+        first = False
+        writer(write, block)
+
+
+def _heading_marker(level: int) -> str:
+    """
+    Returns the heading marker for a level (e.g., "==" for level 2).
+
+    Args:
+        level: The heading level.
+    """
+    if 0 <= level < len(_HEADING_MARKERS):
+        return _HEADING_MARKERS[level]
+    return "=" * level
+
+
+def _write_text_block(write, block: dict):
+    """
+    Writes a text block.
+
+    Args:
+        write: The write method of the output buffer.
+        block: The block dictionary.
+    """
+    write(block.get("content", ""))
+
+
+def _write_image_block(write, block: dict):
+    """
+    Writes an image block as a figure with optional caption, label and note.
+
+    Args:
+        write: The write method of the output buffer.
+        block: The block dictionary.
+    """
+    write(_FIGURE_OPEN(block.get("path", "").replace("\\", "/")))
+
+    caption = block.get("caption", "")
+    if caption:
+        write(_FIGURE_CAPTION(escape_typst(caption)))
+    write(")")
+
+    label = block.get("label", "")
+    if label:
+        write(_FIGURE_LABEL(label))
+
+    note = block.get("note", "")
+    if note:
+        write(_FIGURE_NOTE(escape_typst(note)))
+
+
+# One writer per content block type. Blocks of unknown types are skipped.
+_BLOCK_WRITERS = {
+    "text": _write_text_block,
+    "image": _write_image_block,
+}
@@ -0,0 +1,140 @@
+"""
+Frames and parses the console output of the Typst compiler.
+
+QProcess delivers output in arbitrary chunks: a chunk can end in the middle
+of a line or even of a multi-byte UTF-8 sequence. The LineFramer turns the
+raw chunks into complete, decoded lines. The DiagnosticsParser turns the
+lines of Typst's human-readable error and warning reports into structured
+records, e.g.:
+
+    error: unknown variable: foo
+       ┌─ sections/intro.typ:3:2
+       │
+     3 │ #foo
+       │  ^^^
+       = hint: if you meant to display multiple letters as is, ...
+
+becomes {"severity": "error", "file": "sections/intro.typ", "line": 3,
+"column": 2, "message": "unknown variable: foo", "hints": [...]}.
+"""
+
+import codecs
+import re
+from typing import Optional
+
+# The first line of a diagnostic, e.g. "error: unknown variable: foo".
+_HEADER_PATTERN = re.compile(r"^(error|warning)(?:\[[^\]]*\])?: (.*)$")
+
+# The location line of a diagnostic, e.g. "   ┌─ main.typ:3:2".
+_LOCATION_PATTERN = re.compile(r"^\s*[┌╭]─\s*(.+?):(\d+):(\d+)\s*$")
+
+# A note attached to a diagnostic, e.g. "   = hint: ...".
+_HINT_PATTERN = re.compile(r"^\s*=\s*(?:hint|help|note):\s*(.*)$")
+
+
+class LineFramer:
+    """
+    Decodes a stream of UTF-8 chunks into complete lines.
+
+    Bytes of an incomplete character or line are kept until the chunk that
+    completes them arrives. Invalid UTF-8 is replaced rather than rejected.
+    """
+
+    def __init__(self):
+        """Initializes the LineFramer."""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+
+    def feed(self, data: bytes) -> list:
+        """
+        Adds a chunk of output.
+
+        Args:
+            data: The raw bytes read from the process.
+
+        Returns:
+            The lines completed by this chunk, without line terminators.
+        """
+        text = self._partial + self._decoder.decode(data)
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        return [line.rstrip("\r") for line in lines]
+
+    def flush(self) -> list:
+        """
+        Ends the stream, returning the last line if it was not terminated.
+
+        Returns:
+            A list with the remaining line, or an empty list.
+        """
+        text = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        self._decoder.reset()
+        return [text.rstrip("\r")] if text else []
+
+
+class DiagnosticsParser:
+    """
+    Builds diagnostic records from the lines of Typst's error reports.
+
+    A record starts with an "error:" or "warning:" line and ends with the
+    blank line that closes every report, or when the next report starts.
+    Lines that are not part of a report are ignored.
+    """
+
+    def __init__(self):
+        """Initializes the DiagnosticsParser."""
+        self._current: Optional[dict] = None
+
+    def feed(self, line: str) -> Optional[dict]:
+        """
+        Parses one line of output (without ANSI escape sequences).
+
+        Args:
+            line: The line to parse.
+
+        Returns:
+            The record completed by this line, or None.
+        """
+        header = _HEADER_PATTERN.match(line)
+        if header:
+            completed = self.finish()
+            self._current = {
+                "severity": header.group(1),
+                "file": "",
+                "line": 0,
+                "column": 0,
+                "message": header.group(2).strip(),
+                "hints": [],
+            }
+            return completed
+
+        if self._current is None:
+            return None
+
+        if not line.strip():
+            return self.finish()
+
+        location = _LOCATION_PATTERN.match(line)
+        if location and not self._current["file"]:
+            self._current["file"] = location.group(1)
+            self._current["line"] = int(location.group(2))
+            self._current["column"] = int(location.group(3))
+            return None
+
+        hint = _HINT_PATTERN.match(line)
+        if hint:
+            self._current["hints"].append(hint.group(1).strip())
+
+        return None
+
+    def finish(self) -> Optional[dict]:
+        """
+        Completes the record being parsed, if any.
+
+        Returns:
+            The completed record, or None.
+        """
+        completed = self._current
+        self._current = None
+        return completed
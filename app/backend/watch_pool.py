@@ -0,0 +1,193 @@
+"""
+Keeps Typst watch processes of recently used projects warm.
+
+Starting typst watch means a cold start and a full first compile, and
+stopping one blocks until it exits. The WatchPool keeps the watch processes
+of the most recently used projects alive, so returning to one of them shows
+a current preview almost at once. Only the member of the active project
+runs; the others are paused (SIGSTOP) until they are used again, and the
+least recently used member is evicted once the pool is full.
+
+On Windows processes cannot be paused with signals, so idle members keep
+running; typst watch only does work when one of its files changes.
+"""
+
+import os
+import signal
+from collections import OrderedDict
+from typing import Optional
+
+from PySide6.QtCore import QProcess
+
+from .typst_diagnostics import DiagnosticsParser, LineFramer
+
+# Whether idle processes can be paused on this platform.
+CAN_PAUSE = hasattr(signal, "SIGSTOP") and hasattr(signal, "SIGCONT")
+
+
+class WatchMember:
+    """
+    A watch process of the pool and the parsing state of its output.
+
+    Each process has its own line framers and diagnostics, so output that
+    arrives while a member is in the background is not mixed with the output
+    of the active one.
+    """
+
+    def __init__(self, project_path: str, process: QProcess, arguments: Optional[list] = None):
+        """
+        Initializes the WatchMember.
+
+        Args:
+            project_path: The project directory the process watches.
+            process: The watch process.
+            arguments: The command line arguments the process was started with.
+        """
+        self.project_path = project_path
+        self.process = process
+        self.arguments = arguments or []
+        self.paused = False
+
+        self.stdout_framer = LineFramer()
+        self.stderr_framer = LineFramer()
+        self.diagnostics_parser = DiagnosticsParser()
+
+        # Diagnostics of the latest compile of this process.
+        self.diagnostics = []
+
+    def is_running(self) -> bool:
+        """Returns True if the process has not exited."""
+        return self.process.state() != QProcess.ProcessState.NotRunning
+
+    def pause(self):
+        """Suspends the process until resume() is called (POSIX only)."""
+        if self.paused or not CAN_PAUSE or not self.is_running():
+            return
+        try:
+            os.kill(self.process.processId(), signal.SIGSTOP)
+            self.paused = True
+        except OSError as e:
+            print(f"Warning: Could not pause Typst watch process: {e}")
+
+    def resume(self):
+        """Resumes a paused process."""
+        if not self.paused:
+            return
+        self.paused = False
+        try:
+            os.kill(self.process.processId(), signal.SIGCONT)
+        except OSError as e:
+            print(f"Warning: Could not resume Typst watch process: {e}")
+
+    def stop(self, wait: bool):
+        """
+        Terminates the process.
+
+        Args:
+            wait: Whether to block until the process has exited, killing it if
+                it does not terminate in time.
+        """
+        if not self.is_running():
+            return
+
+        # A stopped process only handles SIGTERM once it is continued.
+        self.resume()
+        self.process.terminate()
+
+        # A timeout is given to allow for a graceful shutdown. If the
+        # process does not terminate in time, it is forcefully killed.
+        if wait and not self.process.waitForFinished(2000):  # 2-second timeout
+            print("Warning: Process did not terminate gracefully, killing...")
+            self.process.kill()
+            self.process.waitForFinished(1000)  # Wait for kill to complete
+
+
+class WatchPool:
+    """
+    A least recently used set of watch processes, keyed by project path.
+    """
+
+    def __init__(self, limit: int = 3):
+        """
+        Initializes the WatchPool.
+
+        Args:
+            limit: Number of watch processes kept at most, including the one
+                of the active project.
+        """
+        self.limit = max(1, limit)
+        self._members: OrderedDict[str, WatchMember] = OrderedDict()
+
+    def get(self, project_path: str) -> Optional[WatchMember]:
+        """
+        Gets the member of a project and marks it as the most recently used.
+
+        Args:
+            project_path: The project directory.
+
+        Returns:
+            The member, or None if the project has no watch process.
+        """
+        member = self._members.get(project_path)
+        if member is not None:
+            self._members.move_to_end(project_path)
+        return member
+
+    def add(self, member: WatchMember) -> list:
+        """
+        Adds a member as the most recently used one.
+
+        Args:
+            member: The new member.
+
+        Returns:
+            The least recently used members removed to stay within the limit.
+            The caller is responsible for stopping them.
+        """
+        self._members[member.project_path] = member
+        self._members.move_to_end(member.project_path)
+        return self._evict(keep=member)
+
+    def remove(self, member: WatchMember):
+        """
+        Removes a member, e.g., because its process exited.
+
+        Args:
+            member: The member to remove.
+        """
+        if self._members.get(member.project_path) is member:
+            del self._members[member.project_path]
+
+    def set_limit(self, limit: int, keep: Optional[WatchMember] = None) -> list:
+        """
+        Changes the maximum number of members.
+
+        Args:
+            limit: The new limit (at least 1).
+            keep: A member that must not be evicted (e.g., the active one).
+
+        Returns:
+            The members removed to stay within the new limit.
+        """
+        self.limit = max(1, limit)
+        return self._evict(keep)
+
+    def members(self) -> list:
+        """Returns every member, least recently used first."""
+        return list(self._members.values())
+
+    def _evict(self, keep: Optional[WatchMember]) -> list:
+        """
+        Removes the least recently used members beyond the limit.
+
+        Args:
+            keep: A member that must not be evicted, or None.
+        """
+        evicted = []
+        for member in list(self._members.values()):
+            if len(self._members) <= self.limit:
+                break
+            if member is not keep:
+                del self._members[member.project_path]
+                evicted.append(member)
+        return evicted
@@ -0,0 +1,181 @@
+"""
+Headless command line interface of Ergo.
+
+`ergo build` regenerates the Typst sources of one or many projects from their
+form_data.json and compiles them, without starting the user interface:
+
+    ergo build path/to/project-a path/to/project-b --format pdf --format svg
+
+Regeneration runs in a pool of worker processes, one per CPU core by
+default, using the same renderer and writer as the editor. Compilation then
+runs through the ExportEngine of a ProcessManager, which keeps at most one
+Typst process per core busy and serves unchanged projects from the export
+cache. The exit status is 0 if every project was built, 1 otherwise.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication
+
+from .backend.apa7_form_handler import document_from, render_files
+from .backend.export_engine import FORMATS
+from .backend.form_journal import FormJournal
+from .backend.generation_worker import GenerationWorker
+from .backend.process_manager import ProcessManager
+from .backend.project_manager import ProjectManager
+
+
+def regenerate_project(project: str) -> dict:
+    """
+    Regenerates main.typ and the section files of a project.
+
+    Runs in a worker process of the regeneration pool.
+
+    Args:
+        project: The project directory.
+
+    Returns:
+        A dictionary with the project path, the number of files written and
+        skipped ("touched", "skipped") and an error message ("error", empty on
+        success).
+    """
+    project_path = Path(project).resolve()
+    result = {"project": str(project_path), "touched": 0, "skipped": 0, "error": ""}
+
+    json_path = project_path / "form_data.json"
+    if not json_path.exists() and not FormJournal.journal_path_for(json_path).exists():
+        result["error"] = "form_data.json not found."
+        return result
+
+    try:
+        data = FormJournal.load(json_path)
+    except (OSError, json.JSONDecodeError) as e:
+        result["error"] = f"Failed to load form data: {e}"
+        return result
+
+    # Without a thread to move to, the worker generates synchronously inside
+    # submit(). No journal operation is recorded; an existing journal is
+    # folded into form_data.json when it is closed.
+    worker = GenerationWorker(render_files)
+    worker.filesWritten.connect(lambda touched, skipped: result.update(touched=touched, skipped=skipped))
+    worker.fileGenerationFailed.connect(lambda message: result.update(error=message))
+    worker.submit({"project_path": project_path, "form_data": document_from(data), "dirty": None, "ops": []})
+    worker.close_journals()
+    return result
+
+
+def build(projects: list, formats: list, jobs: int, destination: str = "", ppi: int = 144,
+          compile_projects: bool = True) -> bool:
+    """
+    Regenerates and compiles projects.
+
+    Args:
+        projects: The project directories.
+        formats: The export formats to compile each project to.
+        jobs: Number of parallel regeneration processes and Typst compiles.
+        destination: Optional folder the artifacts are copied to.
+        ppi: Resolution of PNG exports.
+        compile_projects: Whether to compile after regenerating.
+
+    Returns:
+        True if every project was regenerated and compiled.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        regenerated = list(executor.map(regenerate_project, projects))
+
+    succeeded = []
+    for result in regenerated:
+        if result["error"]:
+            print(f"FAILED  {result['project']}: {result['error']}")
+        else:
+            print(f"wrote   {result['project']}: {result['touched']} written, {result['skipped']} unchanged")
+            succeeded.append(result["project"])
+
+    if not compile_projects or not succeeded:
+        return len(succeeded) == len(projects)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    process_manager = ProcessManager()
+    process_manager.export_engine.max_parallel = jobs
+
+    # Many parallel compiles must not race to download the same packages.
+    project_manager = ProjectManager()
+    packages = [
+        spec
+        for template_name in project_manager.get_available_templates()
+        for spec in project_manager.get_template_packages(template_name)
+    ]
+    process_manager.package_cache.prefetchFinished.connect(app.quit)
+    process_manager.package_cache.prefetch(packages)
+    if process_manager.package_cache.is_prefetching():
+        app.exec()
+
+    options = {"ppi": ppi} if "png" in formats else {}
+    if destination:
+        options["destination"] = destination
+    jobs_list = [
+        {"project": project, "format": export_format, "options": options}
+        for project in succeeded
+        for export_format in formats
+    ]
+
+    batch_result = {}
+
+    def on_job_finished(_, result):
+        status = "cached " if result["cached"] else ("built  " if result["success"] else "FAILED ")
+        detail = f"{result['compile_ms']:.0f} ms" if result["success"] else result["message"].strip()
+        print(f"{status} {result['project']} [{result['format']}]: {detail}")
+
+    def on_batch_finished(_, result):
+        batch_result.update(result)
+        app.quit()
+
+    process_manager.exportJobFinished.connect(on_job_finished)
+    process_manager.exportBatchFinished.connect(on_batch_finished)
+    process_manager.export_batch(jobs_list)
+    app.exec()
+
+    print(f"{batch_result['succeeded']} of {batch_result['total']} exports succeeded "
+          f"in {batch_result['elapsed_ms'] / 1000:.2f} s")
+    return len(succeeded) == len(projects) and batch_result["failed"] == 0 and batch_result["cancelled"] == 0
+
+
+def main(argv: list) -> int:
+    """
+    Runs an Ergo command.
+
+    Args:
+        argv: The command line arguments after the program name.
+
+    Returns:
+        The exit status.
+    """
+    parser = argparse.ArgumentParser(prog="ergo", description="Headless Ergo commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Regenerate and compile projects.")
+    build_parser.add_argument("projects", nargs="+", help="Project directories.")
+    build_parser.add_argument("-f", "--format", dest="formats", action="append", choices=FORMATS,
+                              help="Export format; may be repeated (default: pdf).")
+    build_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                              help="Parallel processes (default: number of CPU cores).")
+    build_parser.add_argument("-d", "--destination", default="",
+                              help="Folder the artifacts are copied to (default: each project's output/export/).")
+    build_parser.add_argument("--ppi", type=int, default=144, help="Resolution of PNG exports.")
+    build_parser.add_argument("--no-compile", action="store_true", help="Only regenerate the Typst sources.")
+
+    arguments = parser.parse_args(argv)
+    ok = build(
+        arguments.projects,
+        arguments.formats or ["pdf"],
+        max(1, arguments.jobs),
+        destination=arguments.destination,
+        ppi=arguments.ppi,
+        compile_projects=not arguments.no_compile,
+    )
+    return 0 if ok else 1
@@ -17,14 +17,21 @@ from PySide6.QtWidgets import QApplication
 from .backend.apa7_form_handler import Apa7FormHandler
 from .backend.bibliography_manager import BibliographyManager
 from .backend.output_monitor import OutputMonitor
+from .backend.pdf_item import PdfPageItem
 from .backend.process_manager import ProcessManager
 from .backend.project_manager import ProjectManager
 from .backend.settings_manager import SettingsManager
 from .backend.svg_item import SvgItem
+from .backend.svg_render_pool import render_pool
 
 
 def main():
     """Initializes and runs the Qt application."""
+    # Headless commands (e.g., "ergo build") run without the user interface.
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        from .cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
     # Enable global antialiasing for QML (must be set before app creation)
     format = QSurfaceFormat()
     format.setSamples(4)
@@ -50,8 +57,48 @@ def main():
     # OutputMonitor watches the output directory for generated SVG files.
     output_monitor = OutputMonitor()
 
+    # Number of Typst watch processes kept warm for recently used projects.
+    process_manager.set_watch_pool_limit(int(settings_manager.get_int_setting("watchPoolSize", 3)))
+
+    # Starts Typst without scanning the system fonts when a project only uses
+    # fonts Typst embeds or Ergo bundles, unless the user opted out. The probe
+    # finds those fonts and measures the time saved.
+    process_manager.set_use_system_fonts(settings_manager.get_bool_setting("useSystemFonts", False))
+    process_manager.font_set.probe()
+    apa7_form_handler.fontFamilyChanged.connect(process_manager.set_font_family)
+
+    # Fetches the Typst packages the templates import in the background. A
+    # watch process requested meanwhile starts once they are downloaded.
+    template_packages = [
+        spec
+        for template_name in project_manager.get_available_templates()
+        for spec in project_manager.get_template_packages(template_name)
+    ]
+    process_manager.package_cache.prefetch(template_packages)
+
     # Ensures the background process is terminated when the application quits.
     app.aboutToQuit.connect(process_manager.stop_process)
+    app.aboutToQuit.connect(process_manager.package_cache.cancel)
+    app.aboutToQuit.connect(process_manager.font_set.cancel)
+    app.aboutToQuit.connect(process_manager.export_engine.cancel_all)
+    # Stops the workers reading and rendering the preview pages.
+    app.aboutToQuit.connect(output_monitor.shutdown)
+    app.aboutToQuit.connect(render_pool().shutdown)
+    # Stops the generation thread, flushing any pending edit before exiting.
+    app.aboutToQuit.connect(apa7_form_handler.shutdown)
+
+    # Paces generation according to the compile times reported by Typst watch.
+    compile_scheduler = apa7_form_handler.compile_scheduler
+    process_manager.compileStarted.connect(compile_scheduler.on_compile_started)
+    process_manager.compileFinished.connect(compile_scheduler.on_compile_finished)
+    process_manager.processStopped.connect(compile_scheduler.reset)
+
+    # Refreshes the preview once per finished compile, when every page has
+    # been written; file system events are only a fallback.
+    process_manager.projectCompileStarted.connect(output_monitor.on_compile_started)
+    process_manager.projectCompileFinished.connect(output_monitor.on_compile_finished)
+    # Looks for SVG pages or the preview PDF, whichever the watch process writes.
+    process_manager.previewFormatChanged.connect(output_monitor.set_preview_format)
 
     # --- Internationalization Setup ---
     # Dynamically loads a translation file (.qm) based on the system's locale
@@ -69,6 +116,7 @@ def main():
 
     # Register custom types
     qmlRegisterType(SvgItem, "Ergo", 1, 0, "SvgItem")
+    qmlRegisterType(PdfPageItem, "Ergo", 1, 0, "PdfPageItem")
 
     # Exposes the manager instances to the QML context, allowing the UI to
     # call their methods.
@@ -37,14 +37,8 @@ Item {
     property int affiliationNamesVersion: 0
 
     // Formatting properties
-    property string fontFamily: {
-        var fonts = Qt.fontFamilies();
-        var candidates = ["Libertinus Serif", "Times New Roman", "Liberation Serif", "Georgia", "Cambria"];
-        for (var i = 0; i < candidates.length; i++) {
-            if (fonts.indexOf(candidates[i]) !== -1) return candidates[i];
-        }
-        return "Times New Roman"; // Fallback
-    }
+    // The default family comes from the form handler, which generates the document
+    property string fontFamily: typeof apa7FormHandler !== 'undefined' ? apa7FormHandler.get_font_family() : "Libertinus Serif"
     property int fontSize: 12
     property string paperSize: "us-letter"
     property string region: "us"
@@ -65,13 +59,15 @@ Item {
                     isImplicit: true
                 });
                 apaForm.sections = newSections;
-                apaForm.scheduleUpdate();
+                apaForm.patchField("implicit_intro", true);
+                apaForm.syncSections();
             }
         } else {
             if (hasIntro) {
                 newSections.shift();
                 apaForm.sections = newSections;
-                apaForm.scheduleUpdate();
+                apaForm.patchField("implicit_intro", false);
+                apaForm.syncSections();
             }
         }
     }
@@ -88,7 +84,53 @@ Item {
         apaForm.hasValidAffiliations = hasValid;
     }
 
-    // Queue-based update system for immediate sequential processing
+    // --- Patch helpers ---
+    // Regular edits send only the changed value to apa7FormHandler, which owns
+    // the document model and regenerates just the files the change affects.
+    function patchField(key, value) {
+        if (isLoading || typeof apa7FormHandler === 'undefined') return;
+        apa7FormHandler.set_field(key, value);
+    }
+
+    function patchSection(sectionId, key, value) {
+        if (isLoading || typeof apa7FormHandler === 'undefined') return;
+        apa7FormHandler.set_section_field(sectionId, key, value);
+    }
+
+    function patchBlock(sectionId, blockIndex, key, value) {
+        if (isLoading || typeof apa7FormHandler === 'undefined') return;
+        apa7FormHandler.set_block_field(sectionId, blockIndex, key, value);
+    }
+
+    function patchAuthor(index, key, value) {
+        if (isLoading || typeof apa7FormHandler === 'undefined') return;
+        apa7FormHandler.set_author_field(index, key, value);
+    }
+
+    function patchAffiliation(index, key, value) {
+        if (isLoading || typeof apa7FormHandler === 'undefined') return;
+        apa7FormHandler.set_affiliation_field(index, key, value);
+    }
+
+    // Structural changes (adding, removing or moving items) send the whole
+    // affected list.
+    function syncSections() {
+        if (isLoading || typeof apa7FormHandler === 'undefined') return;
+        apa7FormHandler.set_sections(apaForm.sections);
+    }
+
+    function syncAuthors() {
+        if (isLoading || typeof apa7FormHandler === 'undefined') return;
+        apa7FormHandler.set_authors(apaForm.authors);
+    }
+
+    function syncAffiliations() {
+        if (isLoading || typeof apa7FormHandler === 'undefined') return;
+        apa7FormHandler.set_affiliations(apaForm.affiliations);
+    }
+
+    // Queue-based full-state update, used after loading saved data and when
+    // the project settings change.
     property var updateQueue: []
     property bool isProcessing: false
     property bool isLoading: false
@@ -276,8 +318,9 @@ Item {
                         var newSections = apaForm.sections.slice();
                         newSections[0].title = text;
                         apaForm.sections = newSections;
+                        apaForm.patchSection("implicit_intro", "title", text);
                     }
-                    apaForm.scheduleUpdate();
+                    apaForm.patchField("title", text);
                 }
             }
 
@@ -287,7 +330,7 @@ Item {
                 id: runningHeadField
                 Layout.fillWidth: true
                 placeholderText: qsTr("Short title for page headers")
-                onTextChanged: apaForm.scheduleUpdate()
+                onTextChanged: apaForm.patchField("running_head", text)
             }
 
             Rectangle {
@@ -336,7 +379,7 @@ Item {
                             onTextChanged: {
                                 if (authorNameField.text !== modelData.name) {
                                     rootForm.authors[index].name = authorNameField.text;
-                                    rootForm.scheduleUpdate();
+                                    rootForm.patchAuthor(index, "name", authorNameField.text);
                                 }
                             }
                             onEditingFinished: {
@@ -364,7 +407,7 @@ Item {
                             onTextChanged: {
                                 if (orcidField.text !== modelData.orcid) {
                                     rootForm.authors[index].orcid = orcidField.text;
-                                    rootForm.scheduleUpdate();
+                                    rootForm.patchAuthor(index, "orcid", orcidField.text);
                                 }
                             }
                             onEditingFinished: {
@@ -479,11 +522,10 @@ Item {
                                 rootForm.affiliations[index].name = affiliationField.text;
                                 rootForm.updateValidAffiliationsState();
                                 rootForm.affiliationNamesVersion++;
-                                rootForm.scheduleUpdate();
+                                rootForm.patchAffiliation(index, "name", affiliationField.text);
                             }
                         }
                         onEditingFinished: {
-                            rootForm.scheduleUpdate();
                             rootForm.affiliationsChanged();
                         }
                     }
@@ -532,7 +574,7 @@ Item {
                 Layout.preferredHeight: 100
                 wrapMode: Text.WordWrap
                 placeholderText: qsTr("Enter author notes, acknowledgments, or disclosures")
-                onTextChanged: apaForm.scheduleUpdate()
+                onTextChanged: apaForm.patchField("author_notes", text)
             }
 
             Rectangle {
@@ -555,21 +597,21 @@ Item {
                 id: courseField
                 Layout.fillWidth: true
                 placeholderText: qsTr("Course number and name")
-                onTextChanged: apaForm.scheduleUpdate()
+                onTextChanged: apaForm.patchField("course", text)
             }
             Label { text: qsTr("Instructor") }
             TextField {
                 id: instructorField
                 Layout.fillWidth: true
                 placeholderText: qsTr("Instructor name")
-                onTextChanged: apaForm.scheduleUpdate()
+                onTextChanged: apaForm.patchField("instructor", text)
             }
             Label { text: qsTr("Due Date") }
             TextField {
                 id: dueDateField
                 Layout.fillWidth: true
                 placeholderText: qsTr("Due date (e.g., October 24, 2023)")
-                onTextChanged: apaForm.scheduleUpdate()
+                onTextChanged: apaForm.patchField("due_date", text)
             }
 
             Rectangle {
@@ -613,14 +655,14 @@ Item {
                 Layout.preferredHeight: 150
                 wrapMode: Text.WordWrap
                 placeholderText: qsTr("Write your abstract here")
-                onTextChanged: apaForm.scheduleUpdate()
+                onTextChanged: apaForm.patchField("abstract", text)
             }
             Label { text: qsTr("Keywords") }
             TextField {
                 id: keywordsField
                 Layout.fillWidth: true
                 placeholderText: qsTr("keyword1, keyword2, keyword3")
-                onTextChanged: apaForm.scheduleUpdate()
+                onTextChanged: apaForm.patchField("keywords", text)
             }
 
             Rectangle {
@@ -671,7 +713,7 @@ Item {
                                 if (text !== modelData.title) {
                                     apaForm.sections[index].title = text;
                                     apaForm.sectionTitleChanged();
-                                    apaForm.scheduleUpdate();
+                                    apaForm.patchSection(modelData.id, "title", text);
                                 }
                             }
                         }
@@ -736,10 +778,11 @@ Item {
                                         var section = apaForm.sections[sectionIndex];
                                         if (section.blocks) {
                                             section.blocks[index].content = text;
+                                            apaForm.patchBlock(section.id, index, "content", text);
                                         } else {
                                             section.content = text;
+                                            apaForm.patchSection(section.id, "content", text);
                                         }
-                                        apaForm.scheduleUpdate();
                                     }
                                 }
 
@@ -806,7 +849,7 @@ Item {
                                     text: modelData.caption || ""
                                     onTextEdited: {
                                         apaForm.sections[sectionIndex].blocks[index].caption = text;
-                                        apaForm.scheduleUpdate();
+                                        apaForm.patchBlock(apaForm.sections[sectionIndex].id, index, "caption", text);
                                     }
                                 }
 
@@ -817,7 +860,7 @@ Item {
                                     text: modelData.note || ""
                                     onTextChanged: {
                                         apaForm.sections[sectionIndex].blocks[index].note = text;
-                                        apaForm.scheduleUpdate();
+                                        apaForm.patchBlock(apaForm.sections[sectionIndex].id, index, "note", text);
                                     }
                                 }
                             }
@@ -898,7 +941,7 @@ Item {
             level: 1
         });
         apaForm.sections = newSections;
-        apaForm.scheduleUpdate();
+        apaForm.syncSections();
     }
 
     function addSubsection(parentIndex) {
@@ -924,7 +967,7 @@ Item {
             level: parentLevel + 1
         });
         apaForm.sections = newSections;
-        apaForm.scheduleUpdate();
+        apaForm.syncSections();
     }
 
     function removeSection(index) {
@@ -941,7 +984,7 @@ Item {
 
         newSections.splice(index, count);
         apaForm.sections = newSections;
-        apaForm.scheduleUpdate();
+        apaForm.syncSections();
     }
 
     function addTextBlock(sectionIndex) {
@@ -956,7 +999,7 @@ Item {
         blocks.push({type: "text", content: ""});
         newSections[sectionIndex].blocks = blocks;
         apaForm.sections = newSections;
-        apaForm.scheduleUpdate();
+        apaForm.syncSections();
     }
 
     function addImageBlock(sectionIndex) {
@@ -983,7 +1026,7 @@ Item {
         });
         newSections[sectionIndex].blocks = blocks;
         apaForm.sections = newSections;
-        apaForm.scheduleUpdate();
+        apaForm.syncSections();
     }
 
     function removeBlock(sectionIndex, blockIndex) {
@@ -999,7 +1042,7 @@ Item {
             blocks.splice(blockIndex, 1);
             newSections[sectionIndex].blocks = blocks;
             apaForm.sections = newSections;
-            apaForm.scheduleUpdate();
+            apaForm.syncSections();
         }
     }
 
@@ -1012,7 +1055,7 @@ Item {
         apaForm.affiliations = newAffiliations;
         apaForm.affiliationsChanged();
         apaForm.updateValidAffiliationsState();
-        apaForm.scheduleUpdate();
+        apaForm.syncAffiliations();
     }
 
     function removeAffiliation(index) {
@@ -1033,7 +1076,8 @@ Item {
         apaForm.affiliationsChanged();
         apaForm.authorsChanged();
         apaForm.updateValidAffiliationsState();
-        apaForm.scheduleUpdate();
+        apaForm.syncAuthors();
+        apaForm.syncAffiliations();
     }
 
     function addAuthor() {
@@ -1046,7 +1090,7 @@ Item {
         });
         apaForm.authors = newAuthors;
         apaForm.authorsChanged();
-        apaForm.scheduleUpdate();
+        apaForm.syncAuthors();
     }
 
     function removeAuthor(index) {
@@ -1054,7 +1098,7 @@ Item {
         newAuthors.splice(index, 1);
         apaForm.authors = newAuthors;
         apaForm.authorsChanged();
-        apaForm.scheduleUpdate();
+        apaForm.syncAuthors();
     }
 
     function addAffiliationToAuthor(authorIndex, affiliationId) {
@@ -1070,7 +1114,7 @@ Item {
             newAuthors[authorIndex].affiliationIds.push(affiliationId);
             apaForm.authors = newAuthors;
             apaForm.authorsChanged();
-            apaForm.scheduleUpdate();
+            apaForm.syncAuthors();
         }
     }
 
@@ -1088,7 +1132,7 @@ Item {
             newAuthors[authorIndex].affiliationIds.splice(affiliationIndex, 1);
             apaForm.authors = newAuthors;
             apaForm.authorsChanged();
-            apaForm.scheduleUpdate();
+            apaForm.syncAuthors();
         }
     }
 
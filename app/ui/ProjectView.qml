@@ -105,26 +105,18 @@ Item {
             SplitView.preferredWidth: mainSplitView.width * 0.45
             SplitView.minimumWidth: 150
 
-            imageSources: outputMonitor ? outputMonitor.get_output_files() : []
+            projectLocation: projectView.projectLocation
+            // The monitor updates the rows of the pages that changed
+            pageModel: outputMonitor ? outputMonitor.pages : null
 
             Connections {
                 id: outputMonitorConnections
                 target: outputMonitor
                 enabled: outputMonitor !== null
-                function onFilesChanged(files) {
-                    outputPanel.imageSources = files;
-                }
                 function onActivePageChanged(index) {
                     outputPanel.scrollToPage(index);
                 }
             }
-
-            Component.onCompleted: {
-                // Loads initial file list when panel is created
-                if (outputMonitor) {
-                    outputPanel.imageSources = outputMonitor.get_output_files();
-                }
-            }
         }
     }
 }
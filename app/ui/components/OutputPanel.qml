@@ -13,9 +13,47 @@ ColumnLayout {
         anchors.centerIn: parent
     }
 
-    property var imageSources: []
+    property string projectLocation: ""
+    // Page model of the OutputMonitor: url, revision, pageWidth, pageHeight
+    property var pageModel: null
     property int zoomLevel: 100 // Percentage
 
+    // 816px is roughly 100% width for US Letter at standard DPI (8.5 inch * 96 dpi = 816)
+    // We use this as a baseline for 100% zoom.
+    readonly property real paperWidth: 816 * (zoomLevel / 100)
+
+    // Whether the watch process writes SVG pages or one PDF ("svg" or "pdf")
+    property string previewFormat: processManager ? processManager.get_preview_format() : "svg"
+
+    // Compile state and latency reported by the Typst watch process
+    property string compileState: processManager ? processManager.get_compile_state() : "idle"
+    property var compileStats: processManager ? processManager.get_compile_stats() : ({})
+    // Whether the watch process skips the system fonts and the time it saves
+    property var fontStats: processManager ? processManager.get_font_stats() : ({})
+
+    Connections {
+        target: processManager
+        enabled: processManager !== null
+        function onCompileStateChanged(state) {
+            root.compileState = state;
+        }
+        function onCompileStatsChanged(stats) {
+            root.compileStats = stats;
+        }
+        function onFontStatsChanged(stats) {
+            root.fontStats = stats;
+        }
+        function onPreviewFormatChanged(format) {
+            root.previewFormat = format;
+        }
+    }
+
+    // Formats a duration in milliseconds for the status label
+    function formatDuration(ms) {
+        if (ms >= 1000) return (ms / 1000).toFixed(2) + " s";
+        return Math.round(ms) + " ms";
+    }
+
     Timer {
         id: scrollRetryTimer
         interval: 100
@@ -27,46 +65,42 @@ ColumnLayout {
     // Scroll to a specific page index
     function scrollToPage(index) {
         if (index < 0) return;
-        
+
         // Wait if model isn't populated yet
-        if (imageRepeater.count === 0 || index >= imageRepeater.count) {
+        if (index >= pageList.count) {
             scrollRetryTimer.targetIndex = index;
             scrollRetryTimer.restart();
             return;
         }
-        
-        var item = imageRepeater.itemAt(index);
-        // Ensure item exists and has been laid out
-        if (item && item.height > 0) {
-            // Calculate the item's y-position relative to the content container
-            var pos = item.mapToItem(workspace, 0, 0);
-
-            // Verify layout has occurred: items beyond the first one should not be at the very top
-            // Since paperColumn is centered with 100px extra height, top is at 50px.
-            // So any item > 0 should be well below 50px.
-            if (index > 0 && pos.y < 100) {
-                scrollRetryTimer.targetIndex = index;
-                scrollRetryTimer.restart();
-                return;
-            }
 
-            if (pos) {
-                // Calculate the scroll position
-                // ScrollBar.position corresponds to contentY / contentHeight
-                var targetPosition = Math.max(0, pos.y - 20) / workspace.height;
+        // The list knows the height of every page from the page model, so the
+        // page does not have to be instantiated before scrolling to it
+        pageList.positionViewAtIndex(index, ListView.Beginning);
+        pageList.contentY -= 20;
+        pageList.returnToBounds();
+    }
 
-                if (previewScrollView.ScrollBar.vertical) {
-                    previewScrollView.ScrollBar.vertical.position = targetPosition;
-                } else if (previewScrollView.contentItem && previewScrollView.contentItem.contentY !== undefined) {
-                    // Fallback: Access the internal Flickable directly
-                    previewScrollView.contentItem.contentY = Math.max(0, pos.y - 20);
-                }
-            }
-        } else {
-            // Item not ready, retry
-            scrollRetryTimer.targetIndex = index;
-            scrollRetryTimer.restart();
+    // Zooms to a level, keeping the point at the center of the view in place
+    function setZoom(level) {
+        level = Math.max(25, Math.min(400, Math.round(level)));
+        if (level === root.zoomLevel) return;
+
+        var centerY = pageList.contentY + pageList.height / 2;
+        var index = pageList.indexAt(1, centerY);
+        var item = index >= 0 ? pageList.itemAtIndex(index) : null;
+        var fraction = item ? (centerY - item.y) / item.height : 0;
+
+        root.zoomLevel = level;
+        if (!item) return;
+
+        pageList.forceLayout();
+        pageList.positionViewAtIndex(index, ListView.Beginning);
+        var zoomedItem = pageList.itemAtIndex(index);
+        if (zoomedItem) {
+            pageList.contentY = zoomedItem.y + fraction * zoomedItem.height - pageList.height / 2;
+            pageList.contentX = (pageList.contentWidth - pageList.width) / 2;
         }
+        pageList.returnToBounds();
     }
 
     // --- Toolbar ---
@@ -89,7 +123,60 @@ ColumnLayout {
                 color: root.palette.text
             }
 
-            Item { Layout.fillWidth: true } // Spacer
+            // Compile status: tells a preview being updated from a current one
+            Label {
+                id: compileStatusLabel
+                Layout.fillWidth: true
+                elide: Text.ElideRight
+                opacity: 0.7
+                color: root.compileState === "failed" ? "#c62828" : root.palette.text
+                text: {
+                    switch (root.compileState) {
+                    case "compiling":
+                        return qsTr("Compiling…");
+                    case "succeeded":
+                        return qsTr("Compiled in %1").arg(root.formatDuration(root.compileStats.last || 0));
+                    case "failed":
+                        return qsTr("Compilation failed");
+                    default:
+                        return "";
+                    }
+                }
+
+                HoverHandler { id: compileStatusHover }
+                ToolTip.visible: compileStatusHover.hovered && (root.compileStats.count || 0) > 0
+                ToolTip.text: qsTr("%1 compiles · p50 %2 · p95 %3 · max %4")
+                    .arg(root.compileStats.count || 0)
+                    .arg(root.formatDuration(root.compileStats.p50 || 0))
+                    .arg(root.formatDuration(root.compileStats.p95 || 0))
+                    .arg(root.formatDuration(root.compileStats.max || 0))
+                    + (root.fontStats.skipped
+                       ? "\n" + qsTr("System fonts skipped: %1 faster start")
+                             .arg(root.formatDuration(root.fontStats.saved_ms || 0))
+                       : "")
+            }
+
+            // Preview format of the project: SVG pages or one PDF rendered
+            // page by page, which parses faster for long documents
+            ComboBox {
+                id: previewFormatComboBox
+                Layout.preferredWidth: 80
+                textRole: "text"
+                valueRole: "value"
+                model: [
+                    { text: qsTr("SVG"), value: "svg" },
+                    { text: qsTr("PDF"), value: "pdf" }
+                ]
+                currentIndex: indexOfValue(root.previewFormat)
+                onActivated: {
+                    if (root.projectLocation !== "") {
+                        settingsManager.set_project_setting(root.projectLocation, "previewFormat", currentValue);
+                    }
+                    processManager.set_preview_format(currentValue);
+                }
+                ToolTip.visible: hovered
+                ToolTip.text: qsTr("Preview format")
+            }
 
             Button {
                 text: qsTr("⇩ PDF")
@@ -105,7 +192,7 @@ ColumnLayout {
                 flat: true
                 Layout.preferredWidth: 30
                 onClicked: {
-                    root.zoomLevel = Math.max(25, root.zoomLevel - 10);
+                    root.setZoom(root.zoomLevel - 10);
                 }
             }
 
@@ -117,7 +204,7 @@ ColumnLayout {
                 stepSize: 5
                 Layout.preferredWidth: 150
                 onMoved: {
-                    root.zoomLevel = value;
+                    root.setZoom(value);
                 }
             }
 
@@ -126,7 +213,7 @@ ColumnLayout {
                 flat: true
                 Layout.preferredWidth: 30
                 onClicked: {
-                    root.zoomLevel = Math.min(400, root.zoomLevel + 10);
+                    root.setZoom(root.zoomLevel + 10);
                 }
             }
 
@@ -140,95 +227,121 @@ ColumnLayout {
     }
 
     // --- Preview Area ---
-    ScrollView {
-        id: previewScrollView
+    // Only the pages in view, plus about one page above and below, are
+    // instantiated; pages scrolled away are destroyed with their renderers
+    // and rasters. The heights of the other pages come from the page model.
+    Rectangle {
         Layout.fillWidth: true
         Layout.fillHeight: true
-        clip: true
-        ScrollBar.horizontal.policy: ScrollBar.AsNeeded
-        ScrollBar.vertical.policy: ScrollBar.AsNeeded
+        color: "#e6e6e6" // Light grey background
 
-        contentWidth: workspace.width
-        contentHeight: workspace.height
+        ListView {
+            id: pageList
+            anchors.fill: parent
+            clip: true
+            model: root.pageModel
+            spacing: 20
+            cacheBuffer: Math.round(root.paperWidth * 1.2941)
+            boundsBehavior: Flickable.StopAtBounds
+
+            // Pages wider than the view scroll horizontally
+            contentWidth: Math.max(width, root.paperWidth + 100)
+            flickableDirection: Flickable.AutoFlickIfNeeded
+
+            ScrollBar.vertical: ScrollBar { policy: ScrollBar.AsNeeded }
+            ScrollBar.horizontal: ScrollBar { policy: ScrollBar.AsNeeded }
+
+            // Margins above the first and below the last page
+            header: Item { height: 50; width: 1 }
+            footer: Item { height: 50; width: 1 }
+
+            delegate: Item {
+                id: pageDelegate
+                width: pageList.contentWidth
+
+                required property string url
+                required property real pageWidth
+                required property real pageHeight
+
+                // Pages of the preview PDF are rendered by a PdfPageItem
+                readonly property bool isPdf: url.split("?")[0].endsWith(".pdf")
+                readonly property Item pageContent: isPdf ? pdfContent : imageContent
+
+                // Calculate height based on the page size reported by the model,
+                // or else the aspect ratio of the loaded image
+                // Default to roughly US Letter aspect ratio (1.29) if loading
+                height: pageWidth > 0 && pageHeight > 0
+                        ? root.paperWidth / pageWidth * pageHeight
+                        : (pageContent && pageContent.implicitWidth > 0 && pageContent.implicitHeight > 0)
+                                      ? (root.paperWidth / pageContent.implicitWidth * pageContent.implicitHeight)
+                                      : root.paperWidth * 1.2941
+
+                // Part of the page in view, in page coordinates. Pages outside the
+                // view get an empty rectangle at the edge facing the view.
+                readonly property rect visiblePart: {
+                    var pageWidth = paper.width - 2;
+                    var pageHeight = paper.height - 2;
+                    var top = Math.min(pageHeight, Math.max(0, pageList.contentY - pageDelegate.y - 1));
+                    var bottom = Math.max(top, Math.min(pageHeight, pageList.contentY + pageList.height - pageDelegate.y - 1));
+                    var left = Math.min(pageWidth, Math.max(0, pageList.contentX - paper.x - 1));
+                    var right = Math.max(left, Math.min(pageWidth, pageList.contentX + pageList.width - paper.x - 1));
+                    return Qt.rect(left, top, right - left, bottom - top);
+                }
 
-        // Background for the workspace
-        background: Rectangle {
-            color: "#e6e6e6" // Light grey background
-        }
+                // Paper Sheet Appearance
+                Rectangle {
+                    id: paper
+                    x: (parent.width - width) / 2
+                    width: root.paperWidth
+                    height: parent.height
+                    color: "white"
+
+                    // Shadow effect using border and slight offset logic if we were using a real DropShadow
+                    // For simplicity, just a crisp border here.
+                    border.color: "#cccccc"
+                    border.width: 1
+
+                    // Covers only the part of the page in view and renders it in tiles,
+                    // so zooming in does not rasterize the whole page
+                    SvgItem {
+                        id: imageContent
+                        x: 1 + viewport.x
+                        y: 1 + viewport.y
+                        width: viewport.width
+                        height: viewport.height
+                        pageSize: Qt.size(paper.width - 2, paper.height - 2)
+                        viewport: pageDelegate.visiblePart
+                        visible: !pageDelegate.isPdf
+                        source: pageDelegate.isPdf ? "" : pageDelegate.url
+                    }
 
-        // Content Container
-        // This item ensures the content can be larger than the view (scrolling)
-        // or centered if smaller than the view.
-        Item {
-            id: workspace
-            width: paperColumn.width + 100
-            height: paperColumn.height + 100
-
-            MouseArea {
-                anchors.fill: parent
-                acceptedButtons: Qt.NoButton
-                onWheel: (wheel) => {
-                    if (wheel.modifiers & Qt.ControlModifier) {
-                        var delta = wheel.angleDelta.y;
-                        if (delta > 0) {
-                            root.zoomLevel = Math.min(400, root.zoomLevel + 10);
-                        } else if (delta < 0) {
-                            root.zoomLevel = Math.max(25, root.zoomLevel - 10);
-                        }
-                        wheel.accepted = true;
-                    } else {
-                        wheel.accepted = false;
+                    PdfPageItem {
+                        id: pdfContent
+                        anchors.fill: parent
+                        anchors.margins: 1
+                        visible: pageDelegate.isPdf
+                        source: pageDelegate.isPdf ? pageDelegate.url : ""
                     }
                 }
             }
+        }
 
-            Column {
-                id: paperColumn
-                anchors.centerIn: parent
-                spacing: 20
-
-                // 816px is roughly 100% width for US Letter at standard DPI (8.5 inch * 96 dpi = 816)
-                // We use this as a baseline for 100% zoom.
-                width: 816 * (root.zoomLevel / 100)
-
-                Repeater {
-                    id: imageRepeater
-                    model: root.imageSources
-
-                    delegate: Item {
-                        id: pageDelegate
-                        width: paperColumn.width
-
-                        // Calculate height based on aspect ratio of the loaded image
-                        // Default to roughly US Letter aspect ratio (1.29) if loading
-                        height: (imageContent && imageContent.implicitWidth > 0 && imageContent.implicitHeight > 0)
-                                              ? (pageDelegate.width / imageContent.implicitWidth * imageContent.implicitHeight)
-                                              : pageDelegate.width * 1.2941
-
-                        required property string modelData
-
-                        // Paper Sheet Appearance
-                        Rectangle {
-                            anchors.fill: parent
-                            color: "white"
-
-                            // Shadow effect using border and slight offset logic if we were using a real DropShadow
-                            // For simplicity, just a crisp border here.
-                            border.color: "#cccccc"
-                            border.width: 1
-
-                            SvgItem {
-                                id: imageContent
-                                anchors.fill: parent
-                                anchors.margins: 1
-                                source: pageDelegate.modelData
-                            }
-                        }
+        // Ctrl + wheel zooms; other wheel events scroll the list underneath
+        MouseArea {
+            anchors.fill: parent
+            acceptedButtons: Qt.NoButton
+            onWheel: (wheel) => {
+                if (wheel.modifiers & Qt.ControlModifier) {
+                    var delta = wheel.angleDelta.y;
+                    if (delta > 0) {
+                        root.setZoom(root.zoomLevel + 10);
+                    } else if (delta < 0) {
+                        root.setZoom(root.zoomLevel - 10);
                     }
+                    wheel.accepted = true;
+                } else {
+                    wheel.accepted = false;
                 }
-
-                // Extra space at bottom
-                Item { height: 20; width: 1 }
             }
         }
     }
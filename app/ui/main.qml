@@ -106,6 +106,7 @@ ApplicationWindow {
         root.selectedTemplate = "apa7"; // TODO: Detect template type from project
         apa7FormHandler.set_project_path(projectPath);
         processManager.set_project_path(projectPath);
+        processManager.set_preview_format(settingsManager.get_project_setting(projectPath, "previewFormat", "svg"));
         processManager.start_typst_watch();
         outputMonitor.set_project_path(projectPath);
         viewLoader.source = "ProjectView.qml";
@@ -126,6 +127,7 @@ ApplicationWindow {
             projectManager.create_project(root.projectLocation, root.selectedTemplate)
             apa7FormHandler.set_project_path(root.projectLocation)
             processManager.set_project_path(root.projectLocation)
+            processManager.set_preview_format(settingsManager.get_project_setting(root.projectLocation, "previewFormat", "svg"))
             processManager.start_typst_watch()
             outputMonitor.set_project_path(root.projectLocation)
             viewLoader.source = "ProjectView.qml"
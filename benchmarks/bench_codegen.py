@@ -0,0 +1,139 @@
+"""
+Benchmarks the Typst code generator on synthetic APA7 documents.
+
+Generates documents of 10, 100 and 1000 sections (with text and image
+blocks) and reports how many complete generations (main.typ plus every
+section file) run per second.
+
+Usage (from the repository root):
+    python benchmarks/bench_codegen.py [--seconds 2.0]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.backend.typst_codegen import group_sections, render_main_typ, render_section_file  # noqa: E402
+
+SECTION_COUNTS = (10, 100, 1000)
+
+PARAGRAPH = (
+    "Participants [n = 42] completed the #1 task in $5 sessions. Results are "
+    "reported in @fig-results and discussed below. "
+) * 4
+
+
+def build_document(section_count: int) -> dict:
+    """
+    Builds a synthetic form data dictionary.
+
+    Every fourth section is a level 1 section, the others are subsections.
+    Each section has two text blocks and one captioned image.
+
+    Args:
+        section_count: Number of sections in the document.
+
+    Returns:
+        The form data dictionary.
+    """
+    sections = []
+    for index in range(section_count):
+        sections.append({
+            "id": f"section-{index}",
+            "title": f"Section {index} [draft] #{index}",
+            "level": 1 if index % 4 == 0 else 2,
+            "blocks": [
+                {"type": "text", "content": PARAGRAPH},
+                {
+                    "type": "image",
+                    "path": f"images\\figure-{index}.png",
+                    "caption": f"Figure {index} caption with $ and #",
+                    "note": "Adapted from [source].",
+                    "label": f"img:{index}",
+                },
+                {"type": "text", "content": PARAGRAPH},
+            ],
+        })
+
+    return {
+        "title": "A Synthetic Document for [Benchmarking]",
+        "authors": [
+            {"name": f"Author {i}", "orcid": "0000-0000-0000-0000", "affiliationIds": [f"aff-{i % 3}"]}
+            for i in range(6)
+        ],
+        "affiliations": [{"id": f"aff-{i}", "name": f"University #{i}"} for i in range(3)],
+        "sections": sections,
+        "running_head": "SYNTHETIC DOCUMENT",
+        "author_notes": "Correspondence concerning this article should be addressed to [Author 0].",
+        "course": "",
+        "instructor": "",
+        "due_date": "",
+        "abstract": PARAGRAPH,
+        "keywords": "benchmark, typst, code generation",
+        "font_family": "Libertinus Serif",
+        "font_size": 12,
+        "paper_size": "us-letter",
+        "region": "us",
+        "language": "en",
+        "implicit_intro": False,
+        "abstract_as_desc": True,
+    }
+
+
+def generate(form_data: dict) -> int:
+    """
+    Renders every file of a document, like a full generation does.
+
+    Args:
+        form_data: The form data dictionary.
+
+    Returns:
+        The total number of characters generated.
+    """
+    total = len(render_main_typ(form_data))
+    for _, group in group_sections(form_data["sections"]):
+        total += len(render_section_file(group))
+    return total
+
+
+def run(section_count: int, seconds: float) -> tuple:
+    """
+    Generates a document repeatedly for about the given duration.
+
+    Args:
+        section_count: Number of sections in the document.
+        seconds: Minimum measuring time.
+
+    Returns:
+        A (generations per second, characters per generation) tuple.
+    """
+    form_data = build_document(section_count)
+    size = generate(form_data)  # Warm-up
+
+    iterations = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        generate(form_data)
+        iterations += 1
+        elapsed = time.perf_counter() - start
+
+    return iterations / elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the Typst code generator.")
+    parser.add_argument("--seconds", type=float, default=2.0, help="measuring time per document size")
+    args = parser.parse_args()
+
+    print(f"{'sections':>10} {'gen/s':>12} {'ms/gen':>10} {'chars':>12}")
+    for section_count in SECTION_COUNTS:
+        rate, size = run(section_count, args.seconds)
+        print(f"{section_count:>10} {rate:>12.1f} {1000 / rate:>10.3f} {size:>12}")
+
+
+if __name__ == "__main__":
+    main()
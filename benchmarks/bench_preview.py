@@ -0,0 +1,220 @@
+"""
+Benchmarks the SVG and PDF preview formats on synthetic documents.
+
+Compiles documents of 10, 100 and 300 pages (text, a table and a vector
+figure per page) with the bundled Typst executable, once to one SVG file per
+page and once to a single PDF, and then times what the preview does with
+each after a compile:
+
+- first: parsing and rasterizing the first page only, i.e., the time until
+  the page on screen appears
+- parse: parsing every page (QSvgRenderer per SVG file, QPdfDocument for the
+  PDF)
+- render: rasterizing every page at 100% zoom (816 pixels wide)
+
+Usage (from the repository root):
+    python benchmarks/bench_preview.py [--typst path/to/typst] [--pages 10 100 300]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QSize  # noqa: E402
+from PySide6.QtGui import QGuiApplication, QImage, QPainter  # noqa: E402
+from PySide6.QtPdf import QPdfDocument  # noqa: E402
+from PySide6.QtSvg import QSvgRenderer  # noqa: E402
+
+from app.backend.process_manager import ProcessManager  # noqa: E402
+
+PAGE_COUNTS = (10, 100, 300)
+
+# Width of a page at 100% zoom in the preview
+PAGE_WIDTH = 816
+
+PAGE_SOURCE = """
+= Section {index}
+
+#lorem(250)
+
+#table(columns: 4, ..range(16).map(n => [Cell {index}.#n]))
+
+#figure(
+  canvas,
+  caption: [Figure {index}],
+)
+#pagebreak(weak: true)
+"""
+
+DOCUMENT_HEADER = """
+#set page(paper: "us-letter")
+#set text(font: "Libertinus Serif", size: 11pt)
+#let canvas = box(width: 100%, height: 4cm, {
+  for i in range(40) {
+    place(dx: i * 3%, dy: calc.rem(i * 7, 30) * 1mm, circle(radius: 2mm, fill: rgb(40, 90, 160)))
+  }
+})
+"""
+
+
+def compile_document(typst: str, folder: Path, page_count: int) -> tuple:
+    """
+    Writes a synthetic document and compiles it to SVG pages and to a PDF.
+
+    Args:
+        typst: The Typst executable.
+        folder: An empty working folder.
+        page_count: Number of pages of the document.
+
+    Returns:
+        A (list of SVG page files, PDF file) tuple.
+    """
+    source = DOCUMENT_HEADER + "".join(PAGE_SOURCE.format(index=index) for index in range(page_count))
+    (folder / "main.typ").write_text(source, encoding="utf-8")
+    (folder / "output").mkdir()
+
+    for output in ("output/p{p}.svg", "output/preview.pdf"):
+        subprocess.run([typst, "compile", "main.typ", output], cwd=folder, check=True, capture_output=True)
+
+    pages = sorted((folder / "output").glob("p*.svg"), key=lambda path: int(path.stem[1:]))
+    return pages, folder / "output" / "preview.pdf"
+
+
+def render_svg(renderer: QSvgRenderer) -> QImage:
+    """
+    Rasterizes a parsed SVG page at the preview width.
+
+    Args:
+        renderer: The renderer holding the page.
+
+    Returns:
+        The raster.
+    """
+    size = renderer.defaultSize()
+    image = QImage(PAGE_WIDTH, round(PAGE_WIDTH * size.height() / size.width()), QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(0xFFFFFFFF)
+    painter = QPainter(image)
+    renderer.render(painter)
+    painter.end()
+    return image
+
+
+def bench_svg(pages: list) -> dict:
+    """
+    Times the SVG preview of a document.
+
+    Args:
+        pages: The SVG page files in page order.
+
+    Returns:
+        A dictionary with the durations in milliseconds ("first", "parse",
+        "render") and the total size of the files ("bytes").
+    """
+    start = time.perf_counter()
+    render_svg(QSvgRenderer(QByteArray(pages[0].read_bytes())))
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    renderers = [QSvgRenderer(QByteArray(page.read_bytes())) for page in pages]
+    parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for renderer in renderers:
+        render_svg(renderer)
+    render = time.perf_counter() - start
+
+    return {"first": first * 1000, "parse": parse * 1000, "render": render * 1000,
+            "bytes": sum(page.stat().st_size for page in pages)}
+
+
+def load_pdf(data: bytes) -> tuple:
+    """
+    Parses a PDF from memory, like the output monitor does.
+
+    Args:
+        data: The file's bytes.
+
+    Returns:
+        A (document, buffer) tuple; the buffer must outlive the document.
+    """
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    document = QPdfDocument()
+    document.load(buffer)
+    return document, buffer
+
+
+def render_pdf(document: QPdfDocument, page: int) -> QImage:
+    """
+    Rasterizes a PDF page at the preview width.
+
+    Args:
+        document: The parsed document.
+        page: The page index.
+
+    Returns:
+        The raster.
+    """
+    size = document.pagePointSize(page)
+    return document.render(page, QSize(PAGE_WIDTH, round(PAGE_WIDTH * size.height() / size.width())))
+
+
+def bench_pdf(path: Path) -> dict:
+    """
+    Times the PDF preview of a document.
+
+    Args:
+        path: The PDF file.
+
+    Returns:
+        A dictionary like bench_svg().
+    """
+    start = time.perf_counter()
+    document, buffer = load_pdf(path.read_bytes())
+    render_pdf(document, 0)
+    first = time.perf_counter() - start
+    document.close()
+
+    start = time.perf_counter()
+    document, buffer = load_pdf(path.read_bytes())
+    parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for page in range(document.pageCount()):
+        render_pdf(document, page)
+    render = time.perf_counter() - start
+    document.close()
+
+    return {"first": first * 1000, "parse": parse * 1000, "render": render * 1000, "bytes": path.stat().st_size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the SVG and PDF preview formats.")
+    parser.add_argument("--typst", default="", help="Typst executable (default: the bundled one)")
+    parser.add_argument("--pages", type=int, nargs="+", default=list(PAGE_COUNTS), help="document lengths")
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv[:1])  # noqa: F841 (rasterizing needs an application)
+    typst = args.typst or ProcessManager()._get_typst_executable_path()
+    if not typst:
+        sys.exit("Typst executable not found; pass --typst.")
+
+    print(f"{'pages':>6} {'format':>6} {'first ms':>10} {'parse ms':>10} {'render ms':>10} {'MiB':>8}")
+    for page_count in args.pages:
+        with tempfile.TemporaryDirectory(prefix="ergo-bench-") as folder:
+            svg_pages, pdf_path = compile_document(typst, Path(folder), page_count)
+            for name, result in (("svg", bench_svg(svg_pages)), ("pdf", bench_pdf(pdf_path))):
+                print(f"{len(svg_pages):>6} {name:>6} {result['first']:>10.1f} {result['parse']:>10.1f} "
+                      f"{result['render']:>10.1f} {result['bytes'] / 2 ** 20:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
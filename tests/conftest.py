@@ -0,0 +1,15 @@
+"""Shared fixtures of the test suite."""
+
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """Returns the Qt application, creating it once for the session."""
+    return QCoreApplication.instance() or QCoreApplication([])
@@ -0,0 +1,129 @@
+"""Tests for the patch API of the APA7 form handler."""
+
+import json
+
+import pytest
+
+from app.backend.apa7_form_handler import MAIN_TARGET, Apa7FormHandler, document_from, render_files
+
+FORM_DATA = {
+    "title": "Paper",
+    "authors": [{"id": 1, "name": "Ada", "orcid": "", "affiliationIds": [1]}],
+    "affiliations": [{"id": 1, "name": "University"}],
+    "sections": [
+        {"id": "intro", "level": 1, "title": "Introduction", "blocks": [{"type": "text", "content": "Hello."}]},
+        {"id": "details", "level": 2, "title": "Details", "blocks": []},
+        {"id": "method", "level": 1, "title": "Method", "blocks": [{"type": "text", "content": "Steps."}]},
+    ],
+}
+
+
+@pytest.fixture
+def handler(qapp, tmp_path):
+    (tmp_path / "form_data.json").write_text(json.dumps(FORM_DATA))
+    handler = Apa7FormHandler()
+    handler.set_project_path(str(tmp_path))
+    handler.load_form_data()
+    # Collects the snapshots instead of generating them
+    handler.submitted = []
+    handler.compile_scheduler.submit = handler.submitted.append
+    yield handler
+    handler.shutdown()
+
+
+def patches(handler):
+    return [(snapshot["dirty"], snapshot["ops"]) for snapshot in handler.submitted]
+
+
+def test_document_field_rerenders_main(handler):
+    handler.set_field("title", "New")
+    assert patches(handler) == [({MAIN_TARGET}, [{"path": ["title"], "value": "New"}])]
+    assert handler.submitted[0]["form_data"]["title"] == "New"
+
+
+def test_section_field_rerenders_the_file_of_its_level_1_section(handler):
+    handler.set_section_field("details", "title", "More")
+    handler.set_section_field("method", "title", "Methods")
+    assert patches(handler) == [
+        ({("section", "intro")}, [{"path": ["sections", "details", "title"], "value": "More"}]),
+        ({("section", "method")}, [{"path": ["sections", "method", "title"], "value": "Methods"}]),
+    ]
+
+
+def test_new_level_rerenders_everything(handler):
+    handler.set_section_field("details", "level", 1)
+    assert patches(handler) == [(None, [{"path": ["sections", "details", "level"], "value": 1}])]
+
+
+def test_block_field_rerenders_its_section(handler):
+    handler.set_block_field("intro", 0, "content", "Hi.")
+    assert patches(handler) == [
+        ({("section", "intro")}, [{"path": ["sections", "intro", "blocks", 0, "content"], "value": "Hi."}]),
+    ]
+
+
+def test_author_and_affiliation_fields_rerender_main(handler):
+    handler.set_author_field(0, "name", "Grace")
+    handler.set_affiliation_field(0, "name", "College")
+    assert patches(handler) == [
+        ({MAIN_TARGET}, [{"path": ["authors", 0, "name"], "value": "Grace"}]),
+        ({MAIN_TARGET}, [{"path": ["affiliations", 0, "name"], "value": "College"}]),
+    ]
+
+
+def test_structural_changes_replace_whole_lists(handler):
+    sections = FORM_DATA["sections"][:1]
+    handler.set_sections(sections)
+    handler.set_authors([])
+    assert patches(handler) == [
+        (None, [{"path": ["sections"], "value": sections}]),
+        ({MAIN_TARGET}, [{"path": ["authors"], "value": []}]),
+    ]
+
+
+def test_unknown_targets_and_unchanged_values_are_rejected(handler):
+    document = handler._document
+    handler.set_field("bogus", 1)
+    handler.set_field("sections", [])
+    handler.set_field("title", "Paper")
+    handler.set_section_field("missing", "title", "x")
+    handler.set_block_field("intro", 5, "content", "x")
+    handler.set_block_field("missing", 0, "content", "x")
+    handler.set_author_field(3, "name", "x")
+    handler.set_affiliation_field(-1, "name", "x")
+
+    assert handler.submitted == []
+    assert handler._document is document
+    assert document == document_from(FORM_DATA)
+
+
+def test_section_dirty_set_renders_only_that_section(tmp_path):
+    rendered = render_files({
+        "project_path": tmp_path,
+        "form_data": document_from(FORM_DATA),
+        "dirty": {("section", "method")},
+    })
+    assert [path for path, _ in rendered["sources"]] == [tmp_path / "sections" / "method.typ"]
+    assert rendered["main"] == tmp_path / "main.typ"
+
+    rendered = render_files({"project_path": tmp_path, "form_data": document_from(FORM_DATA), "dirty": None})
+    assert [path.name for path, _ in rendered["sources"]] == ["intro.typ", "method.typ", "main.typ"]
+
+
+def test_font_family_is_reported_once_on_load(qapp, tmp_path):
+    handler = Apa7FormHandler()
+    families = []
+    handler.fontFamilyChanged.connect(families.append)
+    try:
+        # Without saved form data, the form shows the handler's default
+        handler.set_project_path(str(tmp_path))
+        assert handler.load_form_data() == {}
+        assert families == [handler.get_font_family()] == ["Libertinus Serif"]
+
+        (tmp_path / "form_data.json").write_text(json.dumps({"font_family": "Georgia"}))
+        handler.set_project_path(str(tmp_path))
+        handler.load_form_data()
+        assert families[1:] == ["Georgia"]
+        assert handler.get_font_family() == "Georgia"
+    finally:
+        handler.shutdown()
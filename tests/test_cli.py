@@ -0,0 +1,47 @@
+"""Tests for the headless command line interface."""
+
+import json
+
+from app.cli import main
+
+
+def make_project(root):
+    project = root / "project"
+    project.mkdir()
+    (project / "main.typ").write_text("stale")
+    (project / "form_data.json").write_text(json.dumps({
+        "title": "Headless Paper",
+        "sections": [
+            {"id": "intro", "level": 1, "title": "Introduction", "blocks": [{"type": "text", "content": "Hello."}]},
+            {"id": "details", "level": 2, "title": "Details", "blocks": [{"type": "text", "content": "More."}]},
+            {"id": "method", "level": 1, "title": "Method", "blocks": []},
+        ],
+    }))
+    return project
+
+
+def test_build_regenerates_sources_without_compiling(tmp_path, capsys):
+    project = make_project(tmp_path)
+
+    assert main(["build", str(project), "--no-compile", "--jobs", "1"]) == 0
+    main_typ = (project / "main.typ").read_text()
+    assert "Headless Paper" in main_typ
+    assert sorted(path.name for path in (project / "sections").iterdir()) == ["intro.typ", "method.typ"]
+    # Subsections are written to the file of their level 1 section
+    intro = (project / "sections" / "intro.typ").read_text()
+    assert "Introduction" in intro and "Details" in intro
+    assert "built" not in capsys.readouterr().out
+
+    # A second build finds every file up to date
+    assert main(["build", str(project), "--no-compile", "--jobs", "1"]) == 0
+    assert "0 written" in capsys.readouterr().out
+    assert (project / "main.typ").read_text() == main_typ
+
+
+def test_build_fails_for_a_folder_without_form_data(tmp_path, capsys):
+    project = make_project(tmp_path)
+    (tmp_path / "empty").mkdir()
+
+    assert main(["build", str(project), str(tmp_path / "empty"), "--no-compile", "--jobs", "1"]) == 1
+    assert "form_data.json not found." in capsys.readouterr().out
+    assert "Headless Paper" in (project / "main.typ").read_text()
@@ -0,0 +1,72 @@
+"""Tests for the bounded compile log."""
+
+from app.backend.compile_log import CompileLog
+
+
+def seqs(records):
+    return [record["seq"] for record in records]
+
+
+def fill(log, count, text="line"):
+    for index in range(count):
+        log.append("stderr", f"{text} {index}")
+
+
+def test_oldest_records_are_dropped_by_count():
+    log = CompileLog(max_records=3)
+    fill(log, 5)
+    assert seqs(log.get_range(0, 10)) == [3, 4, 5]
+    assert log.bounds()["first"] == 3
+    assert log.bounds()["last"] == 5
+    assert log.bounds()["count"] == 3
+
+
+def test_oldest_records_are_dropped_by_size():
+    log = CompileLog(max_bytes=20)
+    for text in ("a" * 8, "b" * 8, "c" * 8):
+        log.append("stdout", text)
+    assert [record["text"] for record in log.get_range(0, 10)] == ["b" * 8, "c" * 8]
+    assert log.bounds()["bytes"] == 16
+
+    # A single record larger than the bound is still kept
+    log.append("stdout", "é" * 20)
+    assert log.bounds()["count"] == 1
+    assert log.bounds()["bytes"] == 40
+
+
+def test_long_lines_are_truncated():
+    log = CompileLog(max_line_length=4)
+    assert log.append("stdout", "abcdefgh")["text"] == "abcd…"
+
+
+def test_get_since_continues_after_the_cursor():
+    log = CompileLog()
+    fill(log, 5)
+    assert seqs(log.get_since(0)) == [1, 2, 3, 4, 5]
+    assert seqs(log.get_since(3)) == [4, 5]
+    assert seqs(log.get_since(1, limit=2)) == [2, 3]
+    assert log.get_since(5) == []
+
+
+def test_get_since_skips_to_the_oldest_kept_record_after_eviction():
+    log = CompileLog(max_records=3)
+    fill(log, 3)
+    cursor = log.bounds()["last"]
+    fill(log, 4)
+
+    # Records 4 to 7 were added, but only 5 to 7 are kept: the gap shows
+    assert seqs(log.get_since(cursor)) == [5, 6, 7]
+    assert seqs(log.get_since(cursor, limit=1)) == [5]
+    assert seqs(log.get_since(6)) == [7]
+
+
+def test_sequence_numbers_keep_increasing_after_clear():
+    log = CompileLog()
+    fill(log, 2)
+    log.clear()
+    assert log.get_since(0) == []
+    assert log.bounds() == {"first": 0, "last": 0, "count": 0, "bytes": 0}
+
+    fill(log, 1)
+    assert seqs(log.get_since(2)) == [3]
+    assert seqs(log.get_since(0)) == [3]
@@ -0,0 +1,92 @@
+"""Tests for the pacing of document generation."""
+
+from PySide6.QtTest import QTest
+
+from app.backend.compile_scheduler import CompileScheduler
+
+
+def snapshot(title, project="/project", dirty=None):
+    return {"project_path": project, "form_data": {"title": title}, "dirty": dirty, "ops": None}
+
+
+def make_scheduler(**kwargs):
+    released = []
+    return CompileScheduler(released.append, **kwargs), released
+
+
+def test_zero_quiet_period_releases_at_once(qapp):
+    scheduler, released = make_scheduler()
+    scheduler.submit(snapshot("A"))
+    assert [s["form_data"]["title"] for s in released] == ["A"]
+
+
+def test_quiet_period_follows_median_compile_time(qapp):
+    scheduler, _ = make_scheduler(min_quiet=10, max_quiet=400, quiet_factor=0.5, history=3)
+    periods = []
+    scheduler.quietPeriodChanged.connect(periods.append)
+
+    for duration in (100, 300, 200):
+        scheduler.on_compile_finished(True, duration)
+    assert scheduler.get_quiet_period() == 100
+
+    # Only the latest compiles count, and the period stays within its range
+    for duration in (5000, 5000):
+        scheduler.on_compile_finished(True, duration)
+    assert scheduler.get_quiet_period() == 400
+
+    for duration in (1, 1, 1):
+        scheduler.on_compile_finished(True, duration)
+    assert scheduler.get_quiet_period() == 10
+    assert periods == [50, 100, 150, 400, 10]
+
+
+def test_snapshots_within_quiet_period_are_merged(qapp):
+    scheduler, released = make_scheduler(min_quiet=30)
+    scheduler.submit(snapshot("A", dirty={"intro"}))
+    scheduler.submit(snapshot("B", dirty={"methods"}))
+    assert released == []
+
+    QTest.qWait(100)
+    assert len(released) == 1
+    assert released[0]["form_data"]["title"] == "B"
+    assert released[0]["dirty"] == {"intro", "methods"}
+
+
+def test_snapshots_of_another_project_flush_the_waiting_one(qapp):
+    scheduler, released = make_scheduler(min_quiet=1000)
+    scheduler.submit(snapshot("A", project="/one"))
+    scheduler.submit(snapshot("B", project="/two"))
+    assert [s["project_path"] for s in released] == ["/one"]
+    scheduler.flush()
+    assert [s["project_path"] for s in released] == ["/one", "/two"]
+
+
+def test_snapshot_waits_for_running_compile(qapp):
+    scheduler, released = make_scheduler(min_quiet=20, max_hold=5000)
+    scheduler.on_compile_started()
+    scheduler.submit(snapshot("A"))
+
+    QTest.qWait(80)
+    assert released == []
+
+    scheduler.on_compile_finished(True, 10)
+    assert len(released) == 1
+
+
+def test_snapshot_is_not_held_past_max_hold(qapp):
+    scheduler, released = make_scheduler(min_quiet=20, max_hold=60)
+    scheduler.on_compile_started()
+    scheduler.submit(snapshot("A"))
+
+    QTest.qWait(200)
+    assert len(released) == 1
+
+
+def test_reset_releases_snapshot_waiting_for_compile(qapp):
+    scheduler, released = make_scheduler(min_quiet=20, max_hold=5000)
+    scheduler.on_compile_started()
+    scheduler.submit(snapshot("A"))
+    QTest.qWait(80)
+
+    scheduler.reset()
+    assert len(released) == 1
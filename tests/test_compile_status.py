@@ -0,0 +1,57 @@
+"""Tests for the compile state machine and its latency statistics."""
+
+from app.backend.compile_status import COMPILING, FAILED, IDLE, SUCCEEDED, CompileStatus, percentile
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 21))
+    assert percentile(values, 0.5) == 10
+    assert percentile(values, 0.95) == 19
+    assert percentile(values, 1.0) == 20
+    assert percentile([7], 0.95) == 7
+    assert percentile([], 0.5) == 0.0
+
+
+def test_transitions_report_changes_only():
+    status = CompileStatus()
+    assert status.state == IDLE
+    assert status.start()
+    assert not status.start()
+    assert status.state == COMPILING
+    assert status.finish(False, 10.0)
+    assert status.state == FAILED
+    assert status.start()
+    assert status.finish(True, 10.0)
+    assert status.state == SUCCEEDED
+    assert not status.finish(True, 12.0)
+    assert status.reset()
+    assert not status.reset()
+
+
+def test_stats_summarize_recent_durations():
+    status = CompileStatus(history=20)
+    status.set_project("/project")
+    for duration in [5.0] * 25 + [float(d) for d in range(20, 0, -1)]:
+        status.finish(duration > 18, duration)
+
+    stats = status.stats()
+    assert stats["count"] == 20
+    assert stats["failures"] == 43
+    assert stats["last"] == 1.0
+    assert (stats["p50"], stats["p95"], stats["max"]) == (10.0, 19.0, 20.0)
+
+
+def test_projects_keep_their_own_state_and_history():
+    status = CompileStatus()
+    status.set_project("/one")
+    status.finish(True, 100.0)
+    status.set_project("/two")
+    assert status.stats() == {"state": IDLE, "count": 0, "failures": 0, "last": 0.0,
+                              "p50": 0.0, "p95": 0.0, "max": 0.0}
+    status.start()
+
+    status.set_project("/one")
+    assert status.state == SUCCEEDED
+    assert status.stats()["p50"] == 100.0
+    status.set_project("/two")
+    assert status.state == COMPILING
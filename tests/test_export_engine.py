@@ -0,0 +1,365 @@
+"""Tests for the batch export engine."""
+
+import stat
+import sys
+import time
+
+import pytest
+from PySide6.QtTest import QTest
+
+from app.backend.export_cache import MANIFEST_NAME, ExportCache
+from app.backend.export_engine import CANCELLED, DONE, FAILED, ExportEngine
+
+# Stands in for Typst: copies main.typ to the output (one file per page for
+# {0p} patterns), counting its runs in the project folder. Run n waits while
+# a hold-n file exists there.
+FAKE_TYPST = f"""#!{sys.executable}
+import sys, time
+from pathlib import Path
+
+runs = Path("runs")
+run = int(runs.read_text()) + 1 if runs.exists() else 1
+Path("runs.tmp").write_text(str(run))
+Path("runs.tmp").replace(runs)
+deadline = time.monotonic() + 10
+while Path(f"hold-{{run}}").exists() and time.monotonic() < deadline:
+    time.sleep(0.01)
+
+source = Path(sys.argv[2]).read_text()
+output = sys.argv[3]
+if "{{0p}}" in output:
+    for page in (1, 2):
+        Path(output.replace("{{0p}}", str(page))).write_text(source)
+else:
+    Path(output).write_text(source)
+"""
+
+
+def wait_for(condition, timeout=10000):
+    """Processes events until the condition holds, returning whether it did."""
+    deadline = time.monotonic() + timeout / 1000
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        QTest.qWait(10)
+    return True
+
+
+@pytest.fixture
+def typst(tmp_path):
+    path = tmp_path / "typst"
+    path.write_text(FAKE_TYPST)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+@pytest.fixture
+def make_engine(typst):
+    """Creates engines running the fake Typst, stopping them after the test."""
+    engines = []
+
+    def make(cached=False, **kwargs):
+        kwargs.setdefault("executable_resolver", lambda: typst)
+        if cached:
+            kwargs["cache"] = ExportCache(kwargs["executable_resolver"])
+        engine = ExportEngine(**kwargs)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.cancel_all()
+        wait_for(lambda: not engine.is_busy())
+
+
+def project(root, name, source="= Title"):
+    folder = root / name
+    folder.mkdir()
+    (folder / "main.typ").write_text(source)
+    return folder
+
+
+def runs(folder):
+    path = folder / "runs"
+    return int(path.read_text()) if path.exists() else 0
+
+
+def job(folder, export_format="pdf", **options):
+    return {"project": str(folder), "format": export_format, "options": options}
+
+
+class Batches:
+    """Collects the results of finished batches."""
+
+    def __init__(self, engine):
+        self.results = {}
+        engine.batchFinished.connect(lambda batch_id, result: self.results.__setitem__(batch_id, result))
+
+    def wait(self, *batch_ids):
+        assert wait_for(lambda: all(batch_id in self.results for batch_id in batch_ids))
+        return [self.results[batch_id] for batch_id in batch_ids]
+
+
+def states(result):
+    return [job_result["state"] for job_result in result["jobs"]]
+
+
+def test_jobs_of_one_key_share_a_queued_compile(qapp, tmp_path, make_engine):
+    engine = make_engine(max_parallel=1)
+    batches = Batches(engine)
+    busy, shared = project(tmp_path, "busy"), project(tmp_path, "shared")
+    (busy / "hold-1").touch()
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    first = engine.submit([job(busy)])
+    assert wait_for(lambda: runs(busy) == 1)
+    second = engine.submit([job(shared), job(shared, destination=str(destination))])
+    third = engine.submit([job(shared)])
+    QTest.qWait(50)
+    (busy / "hold-1").unlink()
+
+    results = batches.wait(first, second, third)
+    assert [states(result) for result in results] == [[DONE], [DONE, DONE], [DONE]]
+    assert runs(shared) == 1
+    assert (destination / "shared.pdf").read_text() == "= Title"
+
+
+def test_running_compile_is_not_joined(qapp, tmp_path, make_engine):
+    engine = make_engine(max_parallel=2)
+    batches = Batches(engine)
+    folder = project(tmp_path, "project")
+    (folder / "hold-1").touch()
+
+    first = engine.submit([job(folder)])
+    assert wait_for(lambda: runs(folder) == 1)
+    # Starts once the running compile freed the export folder
+    second = engine.submit([job(folder)])
+    QTest.qWait(50)
+    assert runs(folder) == 1
+    (folder / "hold-1").unlink()
+
+    assert [states(result) for result in batches.wait(first, second)] == [[DONE], [DONE]]
+    assert runs(folder) == 2
+
+
+def test_cancelled_queued_compile_never_starts(qapp, tmp_path, make_engine):
+    engine = make_engine(max_parallel=1)
+    batches = Batches(engine)
+    busy, queued = project(tmp_path, "busy"), project(tmp_path, "queued")
+    (busy / "hold-1").touch()
+
+    first = engine.submit([job(busy)])
+    second = engine.submit([job(queued)])
+    assert wait_for(lambda: runs(busy) == 1)
+    engine.cancel(second)
+    assert states(batches.results[second]) == [CANCELLED]
+    (busy / "hold-1").unlink()
+
+    assert states(batches.wait(first)[0]) == [DONE]
+    assert not engine.is_busy()
+    assert runs(queued) == 0
+
+
+def test_compile_shared_with_another_batch_survives_cancel(qapp, tmp_path, make_engine):
+    engine = make_engine(max_parallel=1)
+    batches = Batches(engine)
+    busy, shared = project(tmp_path, "busy"), project(tmp_path, "shared")
+    (busy / "hold-1").touch()
+
+    engine.submit([job(busy)])
+    assert wait_for(lambda: runs(busy) == 1)
+    first = engine.submit([job(shared)])
+    second = engine.submit([job(shared)])
+    QTest.qWait(50)
+    engine.cancel(first)
+    (busy / "hold-1").unlink()
+
+    results = batches.wait(first, second)
+    assert [states(result) for result in results] == [[CANCELLED], [DONE]]
+    assert runs(shared) == 1
+
+
+def test_cancelled_compile_keeps_its_slot_until_it_exits(qapp, tmp_path, make_engine):
+    engine = make_engine(max_parallel=1)
+    batches = Batches(engine)
+    killed, waiting = project(tmp_path, "killed"), project(tmp_path, "waiting")
+    (killed / "hold-1").touch()
+
+    first = engine.submit([job(killed)])
+    assert wait_for(lambda: runs(killed) == 1)
+    second = engine.submit([job(waiting)])
+    engine.cancel(first)
+
+    # The jobs are cancelled at once, while the killed process still runs
+    assert states(batches.results[first]) == [CANCELLED]
+    assert engine.is_busy()
+
+    assert states(batches.wait(second)[0]) == [DONE]
+    assert runs(waiting) == 1
+    assert not engine.is_busy()
+
+
+def test_invalid_jobs_fail_without_compiling(qapp, tmp_path, make_engine):
+    engine = make_engine()
+    batches = Batches(engine)
+    folder = project(tmp_path, "project")
+    (tmp_path / "empty").mkdir()
+
+    batch = engine.submit([
+        job(folder, "docx"),
+        job(tmp_path / "empty"),
+        job(folder, destination=str(tmp_path / "missing")),
+    ])
+    result = batches.wait(batch)[0]
+    assert states(result) == [FAILED, FAILED, FAILED]
+    assert result["failed"] == 3
+    assert runs(folder) == 0
+
+
+def test_missing_executable_fails_the_job(qapp, tmp_path, make_engine):
+    engine = make_engine(executable_resolver=lambda: None)
+    batches = Batches(engine)
+    result = batches.wait(engine.submit([job(project(tmp_path, "project"))]))[0]
+    assert states(result) == [FAILED]
+    assert result["jobs"][0]["message"] == "Typst executable not found."
+
+
+def manifests(folder):
+    return list((folder / "output" / "export").glob(f"*/{MANIFEST_NAME}"))
+
+
+def test_unchanged_inputs_are_served_from_the_cache(qapp, tmp_path, make_engine):
+    engine = make_engine(cached=True)
+    batches = Batches(engine)
+    folder = project(tmp_path, "project")
+
+    first = batches.wait(engine.submit([job(folder, "svg")]))[0]
+    assert wait_for(lambda: manifests(folder))
+    second = batches.wait(engine.submit([job(folder, "svg")]))[0]
+    assert [result["jobs"][0]["cached"] for result in (first, second)] == [False, True]
+    assert len(second["jobs"][0]["outputs"]) == 2
+    assert runs(folder) == 1
+
+    (folder / "main.typ").write_text("= Changed")
+    third = batches.wait(engine.submit([job(folder, "svg")]))[0]
+    assert not third["jobs"][0]["cached"]
+    assert runs(folder) == 2
+
+
+def test_inputs_changed_during_the_compile_are_not_recorded(qapp, tmp_path, make_engine):
+    engine = make_engine(cached=True)
+    batches = Batches(engine)
+    folder = project(tmp_path, "project")
+    (folder / "hold-1").touch()
+
+    first = engine.submit([job(folder)])
+    assert wait_for(lambda: runs(folder) == 1)
+    (folder / "main.typ").write_text("= Changed")
+    (folder / "hold-1").unlink()
+    assert states(batches.wait(first)[0]) == [DONE]
+    QTest.qWait(100)
+    assert manifests(folder) == []
+
+    second = batches.wait(engine.submit([job(folder)]))[0]
+    assert not second["jobs"][0]["cached"]
+    assert runs(folder) == 2
+
+
+def slow_font_dirs(project):
+    # Keeps the digest worker busy while the GUI thread goes on
+    time.sleep(0.05)
+    return []
+
+
+def test_digest_of_a_compile_does_not_label_the_next_one(qapp, tmp_path, typst, make_engine):
+    engine = make_engine(cache=ExportCache(lambda: typst, font_dirs=slow_font_dirs))
+    batches = Batches(engine)
+    folder = project(tmp_path, "project", "= First")
+    (folder / "hold-1").touch()
+    (folder / "hold-2").touch()
+
+    first = engine.submit([job(folder)])
+    assert wait_for(lambda: runs(folder) == 1)
+    # Waits for the running compile of the same folder
+    second = engine.submit([job(folder)])
+    QTest.qWait(100)
+    (folder / "hold-1").unlink()
+
+    # The second compile rewrites the folder while the first one's digest is
+    # checked, then its inputs change
+    assert wait_for(lambda: runs(folder) == 2)
+    assert states(batches.wait(first)[0]) == [DONE]
+    QTest.qWait(200)
+    (folder / "main.typ").write_text("= Second")
+    (folder / "hold-2").unlink()
+    assert states(batches.wait(second)[0]) == [DONE]
+    # The second compile's digest is checked before its inputs change back
+    engine._digest_pool.waitForDone()
+    QTest.qWait(50)
+    assert manifests(folder) == []
+
+    # The folder holds the second compile's artifact, so the first one's
+    # inputs are not a hit
+    (folder / "main.typ").write_text("= First")
+    third = batches.wait(engine.submit([job(folder)]))[0]
+    assert not third["jobs"][0]["cached"]
+    assert runs(folder) == 3
+
+
+def test_folder_written_by_a_running_compile_is_not_a_hit(qapp, tmp_path, make_engine):
+    engine = make_engine(cached=True)
+    batches = Batches(engine)
+    folder = project(tmp_path, "project")
+    (folder / "hold-1").touch()
+
+    first = engine.submit([job(folder, "svg")])
+    assert wait_for(lambda: runs(folder) == 1)
+    # Even if the folder matches, its pages are still being written
+    output_dir = (folder / "output" / "export").iterdir().__next__()
+    (output_dir / MANIFEST_NAME).write_text(engine.cache.input_digest(folder))
+    (output_dir / "p1.svg").write_text("partial")
+    second = engine.submit([job(folder, "svg")])
+    QTest.qWait(100)
+    (folder / "hold-1").unlink()
+
+    results = batches.wait(first, second)
+    assert [result["jobs"][0]["cached"] for result in results] == [False, False]
+    assert runs(folder) == 2
+
+
+def test_projects_with_one_name_are_not_delivered_to_one_place(qapp, tmp_path, make_engine):
+    engine = make_engine()
+    batches = Batches(engine)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first, second = project(tmp_path / "a", "paper", "= A"), project(tmp_path / "b", "paper", "= B")
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    result = batches.wait(engine.submit([
+        job(first, destination=str(destination)),
+        job(second, destination=str(destination)),
+        job(first, "svg", destination=str(destination)),
+    ]))[0]
+    assert states(result) == [DONE, FAILED, DONE]
+    assert "Another project named 'paper'" in result["jobs"][1]["message"]
+    assert (destination / "paper.pdf").read_text() == "= A"
+    assert runs(second) == 0
+
+
+def test_stale_pages_are_removed_from_the_bundle(qapp, tmp_path, make_engine):
+    engine = make_engine()
+    batches = Batches(engine)
+    folder = project(tmp_path, "paper")
+    destination = tmp_path / "destination"
+    (destination / "paper").mkdir(parents=True)
+    for name in ("p1.svg", "p2.svg", "p3.svg", "p1.png", "notes.txt"):
+        (destination / "paper" / name).write_text("old")
+
+    result = batches.wait(engine.submit([job(folder, "svg", destination=str(destination))]))[0]
+    assert states(result) == [DONE]
+    assert sorted(path.name for path in (destination / "paper").iterdir()) == [
+        "notes.txt", "p1.png", "p1.svg", "p2.svg",
+    ]
+    assert (destination / "paper" / "p2.svg").read_text() == "= Title"
@@ -0,0 +1,121 @@
+"""Tests for the form data snapshot and journal."""
+
+import json
+
+from app.backend.form_journal import FormJournal, apply_op, merge_ops
+
+
+def write_snapshot(path, document):
+    path.write_text(json.dumps(document), encoding="utf-8")
+
+
+def test_load_without_files_returns_empty_document(tmp_path):
+    assert FormJournal.load(tmp_path / "form_data.json") == {}
+
+
+def test_load_replays_journal_on_snapshot(tmp_path):
+    snapshot = tmp_path / "form_data.json"
+    write_snapshot(snapshot, {"title": "Old", "sections": [{"id": "a", "body": "x"}]})
+
+    journal = FormJournal(snapshot)
+    journal.append([
+        {"path": ["title"], "value": "New"},
+        {"path": ["sections", "a", "body"], "value": "y"},
+    ])
+    journal.close()
+
+    assert FormJournal.load(snapshot) == {"title": "New", "sections": [{"id": "a", "body": "y"}]}
+
+
+def test_replay_is_idempotent(tmp_path):
+    # A crash between writing the snapshot and truncating the journal replays
+    # records the snapshot already contains.
+    snapshot = tmp_path / "form_data.json"
+    write_snapshot(snapshot, {"title": "New"})
+    FormJournal.journal_path_for(snapshot).write_text(
+        json.dumps({"path": ["title"], "value": "New"}) + "\n", encoding="utf-8")
+
+    assert FormJournal.load(snapshot) == {"title": "New"}
+
+
+def test_load_stops_at_torn_last_record(tmp_path):
+    snapshot = tmp_path / "form_data.json"
+    write_snapshot(snapshot, {"title": "Old"})
+    journal_path = FormJournal.journal_path_for(snapshot)
+    journal_path.write_text(
+        json.dumps({"path": ["title"], "value": "New"}) + "\n" + '{"path": ["title"], "val', encoding="utf-8")
+
+    assert FormJournal.load(snapshot) == {"title": "New"}
+
+
+def test_new_journal_trims_torn_record_before_appending(tmp_path):
+    snapshot = tmp_path / "form_data.json"
+    write_snapshot(snapshot, {})
+    journal_path = FormJournal.journal_path_for(snapshot)
+    complete = json.dumps({"path": ["a"], "value": 1}) + "\n"
+    journal_path.write_text(complete + '{"path": ["b"', encoding="utf-8")
+
+    journal = FormJournal(snapshot)
+    assert journal_path.read_text(encoding="utf-8") == complete
+    assert not journal.is_empty()
+
+    journal.append([{"path": ["c"], "value": 3}])
+    journal.close()
+
+    assert FormJournal.load(snapshot) == {"a": 1, "c": 3}
+
+
+def test_compact_writes_snapshot_and_empties_journal(tmp_path):
+    snapshot = tmp_path / "form_data.json"
+    journal = FormJournal(snapshot, max_records=2)
+    journal.append([{"path": ["a"], "value": 1}])
+    assert not journal.needs_compaction()
+    journal.append([{"path": ["b"], "value": 2}])
+    assert journal.needs_compaction()
+
+    document = FormJournal.load(snapshot)
+    journal.compact(document)
+
+    assert json.loads(snapshot.read_text(encoding="utf-8")) == {"a": 1, "b": 2}
+    assert FormJournal.journal_path_for(snapshot).read_text(encoding="utf-8") == ""
+    assert journal.is_empty()
+    assert not journal.needs_compaction()
+    assert not journal.has_unsynced_data()
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+    # Appends after compaction go to the emptied journal
+    journal.append([{"path": ["a"], "value": 10}])
+    journal.close()
+    assert FormJournal.load(snapshot) == {"a": 10, "b": 2}
+
+
+def test_compaction_triggered_by_size(tmp_path):
+    journal = FormJournal(tmp_path / "form_data.json", max_bytes=64)
+    journal.append([{"path": ["text"], "value": "x" * 64}])
+    assert journal.needs_compaction()
+    journal.close()
+
+
+def test_apply_op_ignores_missing_targets():
+    document = {"sections": [{"id": "a", "body": "x"}]}
+    apply_op(document, ["sections", "missing", "body"], "y")
+    apply_op(document, ["sections", 5], {})
+    assert document == {"sections": [{"id": "a", "body": "x"}]}
+
+    apply_op(document, ["sections", 0, "body"], "z")
+    assert document == {"sections": [{"id": "a", "body": "z"}]}
+
+    apply_op(document, [], {"title": "Replaced"})
+    assert document == {"title": "Replaced"}
+
+
+def test_merge_ops_drops_obsolete_operations():
+    earlier = [
+        {"path": ["title"], "value": "A"},
+        {"path": ["sections", "a", "body"], "value": "x"},
+    ]
+    later = [
+        {"path": ["sections", "a"], "value": {"id": "a"}},
+        {"path": ["title"], "value": "B"},
+    ]
+    assert merge_ops(earlier, later) == later
@@ -0,0 +1,124 @@
+"""Tests for the generation of the Typst sources."""
+
+import os
+import tempfile
+
+from app.backend.generation_worker import GenerationWorker
+
+# Modification time of files written before a test step, in nanoseconds
+OLD = 1_700_000_000 * 10**9
+
+
+def render(snapshot):
+    project = snapshot["project_path"]
+    data = snapshot["form_data"]
+    return {
+        "sources": [
+            (project / "sections" / "intro.typ", data["intro"]),
+            (project / "sections" / "method.typ", data["method"]),
+            (project / "main.typ", data["title"]),
+        ],
+        "main": project / "main.typ",
+    }
+
+
+def make_worker(render=render):
+    worker = GenerationWorker(render)
+    events = {"written": [], "failed": []}
+    worker.filesWritten.connect(lambda touched, skipped: events["written"].append((touched, skipped)))
+    worker.fileGenerationFailed.connect(events["failed"].append)
+    return worker, events
+
+
+def submit(worker, project, title="= Title", intro="Intro", method="Method"):
+    # Without a thread of its own, the worker generates inside submit()
+    worker.submit({
+        "project_path": project,
+        "form_data": {"title": title, "intro": intro, "method": method},
+        "dirty": None,
+        "ops": [],
+    })
+
+
+def leftovers(project):
+    return sorted(path.name for path in project.rglob(".*.tmp"))
+
+
+def test_unchanged_files_are_not_rewritten(qapp, tmp_path):
+    worker, events = make_worker()
+    submit(worker, tmp_path)
+    assert events["written"] == [(3, 0)]
+    for path in (tmp_path / "main.typ", tmp_path / "sections" / "intro.typ"):
+        os.utime(path, ns=(OLD, OLD))
+
+    submit(worker, tmp_path, method="Changed")
+    assert events["written"][-1] == (1, 2)
+    assert (tmp_path / "main.typ").stat().st_mtime_ns == OLD
+    assert (tmp_path / "sections" / "intro.typ").stat().st_mtime_ns == OLD
+    assert (tmp_path / "sections" / "method.typ").read_text() == "Changed"
+
+
+def test_files_up_to_date_on_disk_are_skipped(qapp, tmp_path):
+    submit(make_worker()[0], tmp_path)
+
+    # A new worker (e.g., after reopening the project) seeds its digests from disk
+    worker, events = make_worker()
+    submit(worker, tmp_path)
+    assert events["written"] == [(0, 3)]
+
+
+def test_main_typ_is_published_last(qapp, tmp_path, monkeypatch):
+    worker, _ = make_worker()
+    published = []
+    replace = os.replace
+
+    def record(source, destination):
+        published.append(os.path.basename(destination))
+        replace(source, destination)
+
+    monkeypatch.setattr(os, "replace", record)
+    submit(worker, tmp_path)
+    assert published == ["intro.typ", "method.typ", "main.typ"]
+    assert leftovers(tmp_path) == []
+
+
+def test_failed_stage_leaves_previous_sources(qapp, tmp_path, monkeypatch):
+    worker, events = make_worker()
+    submit(worker, tmp_path)
+
+    mkstemp = tempfile.mkstemp
+
+    def fail_for_main(*args, **kwargs):
+        if kwargs.get("prefix", "").startswith(".main.typ"):
+            raise OSError("disk full")
+        return mkstemp(*args, **kwargs)
+
+    monkeypatch.setattr(tempfile, "mkstemp", fail_for_main)
+    submit(worker, tmp_path, title="= New", intro="New intro")
+
+    assert len(events["failed"]) == 1
+    assert (tmp_path / "main.typ").read_text() == "= Title"
+    assert (tmp_path / "sections" / "intro.typ").read_text() == "Intro"
+    assert leftovers(tmp_path) == []
+
+    # Nothing was published, so the next generation writes both files
+    monkeypatch.undo()
+    submit(worker, tmp_path, title="= New", intro="New intro")
+    assert events["written"][-1] == (2, 1)
+
+
+def test_render_error_does_not_stop_later_generations(qapp, tmp_path):
+    def fragile(snapshot):
+        if snapshot["form_data"]["title"] == "bad":
+            raise ValueError("invalid literal for int() with base 10: 'x'")
+        return render(snapshot)
+
+    worker, events = make_worker(fragile)
+    submit(worker, tmp_path, title="bad")
+    assert len(events["failed"]) == 1
+    assert "ValueError" in events["failed"][0]
+    assert events["written"] == []
+
+    submit(worker, tmp_path)
+    assert events["written"] == [(3, 0)]
+    assert (tmp_path / "main.typ").read_text() == "= Title"
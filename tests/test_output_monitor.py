@@ -0,0 +1,171 @@
+"""Tests for the page selection and pruning of the output monitor."""
+
+import os
+import time
+
+import pytest
+from PySide6.QtTest import QTest
+
+from app.backend.output_monitor import OutputMonitor
+from app.backend.page_cache import page_cache
+from app.backend.page_model import PageModel
+
+# Modification time of the oldest page files, in nanoseconds
+T0 = 1_700_000_000 * 10**9
+
+
+def write_page(output, name, content, age):
+    """Writes a page file whose modification time is T0 plus age seconds."""
+    path = output / name
+    path.write_text(f'<svg viewBox="0 0 612 792" width="612pt" height="792pt">{content}</svg>')
+    os.utime(path, ns=(T0 + age * 10**9, T0 + age * 10**9))
+    return path
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "output").mkdir()
+    return tmp_path
+
+
+@pytest.fixture
+def monitor(qapp):
+    monitor = OutputMonitor()
+    yield monitor
+    monitor.shutdown()
+
+
+def settle(monitor, timeout=10000):
+    """Processes events until the monitor read the pages of its scans."""
+    deadline = time.monotonic() + timeout / 1000
+    while monitor._reading or monitor._pending_scan is not None:
+        assert time.monotonic() < deadline, "the scan did not finish"
+        QTest.qWait(10)
+
+
+def names(monitor):
+    return [os.path.basename(url.split("?")[0]) for url in monitor.page_model.urls()]
+
+
+def revisions(monitor):
+    model = monitor.page_model
+    return [model.data(model.index(row), PageModel.RevisionRole) for row in range(model.rowCount())]
+
+
+def files(project):
+    return sorted(path.name for path in (project / "output").iterdir())
+
+
+def test_partial_newer_set_is_kept(project, monitor):
+    output = project / "output"
+    write_page(output, "p1-2.svg", "a", 0)
+    write_page(output, "p2-2.svg", "b", 0)
+    # The first page of a compile still writing its other two
+    write_page(output, "p1-3.svg", "c", 5)
+
+    monitor.set_project_path(str(project))
+    settle(monitor)
+    assert names(monitor) == ["p1-2.svg", "p2-2.svg"]
+
+    monitor.on_compile_finished(str(project), True)
+    settle(monitor)
+    assert names(monitor) == ["p1-2.svg", "p2-2.svg"]
+    assert files(project) == ["p1-2.svg", "p1-3.svg", "p2-2.svg"]
+    assert monitor.get_stats()["pruned"] == 0
+
+
+def test_older_total_is_pruned_after_a_finished_compile(project, monitor):
+    output = project / "output"
+    for page in (1, 2, 3):
+        write_page(output, f"p{page}-3.svg", f"old {page}", 0)
+    write_page(output, "p1-2.svg", "a", 5)
+    write_page(output, "p2-2.svg", "b", 5)
+
+    # A scan that was not triggered by a finished compile deletes nothing
+    monitor.set_project_path(str(project))
+    settle(monitor)
+    assert names(monitor) == ["p1-2.svg", "p2-2.svg"]
+    assert len(files(project)) == 5
+
+    monitor.on_compile_finished(str(project), True)
+    settle(monitor)
+    assert files(project) == ["p1-2.svg", "p2-2.svg"]
+    assert monitor.get_stats()["pruned"] == 3
+    assert names(monitor) == ["p1-2.svg", "p2-2.svg"]
+
+
+def test_finished_compile_of_another_project_prunes_nothing(project, monitor, tmp_path_factory):
+    output = project / "output"
+    write_page(output, "p1-1.svg", "old", 0)
+    write_page(output, "p1-2.svg", "a", 5)
+    write_page(output, "p2-2.svg", "b", 5)
+
+    monitor.set_project_path(str(project))
+    settle(monitor)
+    monitor.on_compile_finished(str(tmp_path_factory.mktemp("other")), True)
+    settle(monitor)
+    assert len(files(project)) == 3
+
+
+def test_renamed_pages_keep_their_revision(project, monitor):
+    output = project / "output"
+    write_page(output, "p1-2.svg", "a", 0)
+    write_page(output, "p2-2.svg", "b", 0)
+    monitor.set_project_path(str(project))
+    settle(monitor)
+    before = revisions(monitor)
+
+    # A new page was inserted at the end: Typst renames the unchanged pages
+    for page in (1, 2):
+        (output / f"p{page}-2.svg").rename(output / f"p{page}-3.svg")
+    write_page(output, "p3-3.svg", "c", 5)
+    monitor.on_compile_finished(str(project), True)
+    settle(monitor)
+
+    assert names(monitor) == ["p1-3.svg", "p2-3.svg", "p3-3.svg"]
+    assert revisions(monitor)[:2] == before
+    assert len(set(revisions(monitor))) == 3
+    assert files(project) == ["p1-3.svg", "p2-3.svg", "p3-3.svg"]
+
+
+def test_poll_backs_off_to_a_few_seconds(project, monitor):
+    monitor.set_project_path(str(project))
+    settle(monitor)
+    for _ in range(20):
+        monitor._poll()
+    assert monitor.get_stats()["poll_interval"] == OutputMonitor.MAX_POLL_INTERVAL <= 5000
+
+    # Activity polls quickly again
+    monitor.notify_activity()
+    assert monitor.get_stats()["poll_interval"] == OutputMonitor.MIN_POLL_INTERVAL
+
+
+def test_pages_are_applied_once_read(project, monitor):
+    output = project / "output"
+    write_page(output, "p1-1.svg", "a", 0)
+    monitor.set_project_path(str(project))
+    settle(monitor)
+
+    page = write_page(output, "p1-1.svg", "b", 5)
+    monitor.on_compile_finished(str(project), True)
+    # The page is read on the reader thread and applied on the GUI thread
+    before = revisions(monitor)
+    settle(monitor)
+    assert revisions(monitor) != before
+
+    # The renderer gets exactly the bytes the revision was computed from
+    assert page_cache.get(revisions(monitor)[0]) == page.read_bytes()
+    assert page_cache.get(before[0]) is None
+
+
+def test_results_of_a_previous_project_are_dropped(project, monitor, tmp_path_factory):
+    write_page(project / "output", "p1-1.svg", "first project", 0)
+    other = tmp_path_factory.mktemp("other")
+    (other / "output").mkdir()
+    write_page(other / "output", "p1-1.svg", "other project", 0)
+
+    monitor.set_project_path(str(project))
+    monitor.set_project_path(str(other))
+    settle(monitor)
+    assert [url.split("?")[0] for url in monitor.page_model.urls()] == [(other / "output" / "p1-1.svg").as_uri()]
+    assert monitor.get_stats()["reads"] == 1
@@ -0,0 +1,39 @@
+"""Tests for the Typst package cache."""
+
+from app.backend.package_cache import PackageCache, parse_package_spec
+
+
+def download(cache_dir, namespace, name, version):
+    folder = cache_dir / namespace / name / version
+    folder.mkdir(parents=True)
+    (folder / "typst.toml").write_text("[package]\n")
+
+
+def test_parse_package_spec():
+    assert parse_package_spec("@preview/versatile-apa:7.1.5") == ("preview", "versatile-apa", "7.1.5")
+    assert parse_package_spec("@preview/versatile-apa") is None
+    assert parse_package_spec("versatile-apa:7.1.5") is None
+
+
+def test_missing_lists_packages_not_downloaded(qapp, tmp_path):
+    cache = PackageCache(lambda: None, cache_dir=tmp_path)
+    download(tmp_path, "preview", "versatile-apa", "7.1.5")
+
+    specs = ["@preview/versatile-apa:7.1.5", "@preview/other:1.0.0", "@preview/other:1.0.0", "invalid"]
+    assert cache.missing(specs) == ["@preview/other:1.0.0"]
+    assert cache.environment().value("TYPST_PACKAGE_CACHE_PATH") == str(tmp_path)
+
+
+def test_prefetch_without_missing_packages_finishes_at_once(qapp, tmp_path):
+    cache = PackageCache(lambda: None, cache_dir=tmp_path)
+    download(tmp_path, "preview", "versatile-apa", "7.1.5")
+    results = []
+    cache.prefetchFinished.connect(results.append)
+
+    cache.prefetch(["@preview/versatile-apa:7.1.5"])
+    assert results == [True]
+    assert not cache.is_prefetching()
+
+    # Without a Typst executable, missing packages cannot be fetched
+    cache.prefetch(["@preview/other:1.0.0"])
+    assert results == [True, False]
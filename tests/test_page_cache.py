@@ -0,0 +1,36 @@
+"""Tests for the cache of preview page contents."""
+
+from app.backend.page_cache import PageCache
+
+
+def test_least_recently_used_pages_are_evicted_by_size():
+    cache = PageCache(max_bytes=30)
+    for revision in "abc":
+        cache.put(revision, b"x" * 10)
+    assert cache.get("a") is not None
+
+    cache.put("d", b"x" * 10)
+    assert cache.get("b") is None
+    assert all(cache.get(revision) is not None for revision in "acd")
+
+
+def test_pinned_pages_are_kept_until_unpinned():
+    cache = PageCache(max_bytes=20)
+    cache.put("read", b"x" * 10, pin=True)
+    for revision in "abc":
+        cache.put(revision, b"x" * 10)
+    # Pinned bytes do not count toward the bound
+    assert cache.get("read") is not None
+    assert cache.stats()["pinned"] == 1
+    assert [revision for revision in "abc" if cache.get(revision)] == ["b", "c"]
+
+    cache.unpin("read")
+    assert cache.stats()["pinned"] == 0
+    assert cache.get("read") is None
+
+
+def test_discarded_page_is_unpinned():
+    cache = PageCache(max_bytes=20)
+    cache.put("read", b"x" * 10, pin=True)
+    cache.discard("read")
+    assert cache.stats() == {"pages": 0, "bytes": 0, "pinned": 0, "hits": 0, "misses": 0}
@@ -0,0 +1,85 @@
+"""Tests for the preview page model."""
+
+from app.backend.page_model import PageModel
+
+
+def page(number, revision, width=595.0, height=842.0, pages=3):
+    return (f"file:///out/p{number}-{pages}.svg?rev={revision}", revision, width, height)
+
+
+def record(model):
+    """Collects the change notifications of a model."""
+    events = []
+    model.dataChanged.connect(
+        lambda first, last, roles: events.append(("changed", first.row(), last.row(), list(roles))))
+    model.rowsInserted.connect(lambda parent, first, last: events.append(("inserted", first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: events.append(("removed", first, last)))
+    return events
+
+
+def test_first_pages_are_inserted():
+    model = PageModel()
+    events = record(model)
+    model.set_pages([page(1, "a"), page(2, "b")])
+
+    assert events == [("inserted", 0, 1)]
+    assert model.rowCount() == 2
+    assert model.url_at(1) == page(2, "b")[0]
+    assert model.url_at(2) == ""
+
+
+def test_unchanged_pages_report_nothing():
+    model = PageModel()
+    model.set_pages([page(1, "a"), page(2, "b")])
+    events = record(model)
+    model.set_pages([page(1, "a"), page(2, "b")])
+
+    assert events == []
+    assert model.stats()["changed"] == 0
+
+
+def test_changed_rows_are_reported_as_runs():
+    model = PageModel()
+    model.set_pages([page(n, str(n)) for n in range(1, 6)])
+    events = record(model)
+    model.set_pages([page(1, "1"), page(2, "x"), page(3, "y"), page(4, "4"), page(5, "z")])
+
+    assert events == [("changed", 1, 2, []), ("changed", 4, 4, [])]
+    assert model.data(model.index(2), PageModel.RevisionRole) == "y"
+    assert model.stats()["changed"] == 3
+
+
+def test_renamed_pages_only_change_their_url():
+    model = PageModel()
+    model.set_pages([page(n, str(n), pages=3) for n in range(1, 4)])
+    events = record(model)
+    model.set_pages([page(n, str(n), pages=4) for n in range(1, 5)])
+
+    assert events == [("changed", 0, 2, [PageModel.UrlRole]), ("inserted", 3, 3)]
+    assert model.urls() == [page(n, str(n), pages=4)[0] for n in range(1, 5)]
+    stats = model.stats()
+    assert (stats["changed"], stats["renamed"], stats["inserted"]) == (0, 3, 4)
+
+
+def test_content_and_url_changes_form_separate_runs():
+    model = PageModel()
+    model.set_pages([page(n, str(n), pages=3) for n in range(1, 4)])
+    events = record(model)
+    model.set_pages([page(1, "1", pages=2), page(2, "x", pages=2)])
+
+    assert events == [
+        ("changed", 0, 0, [PageModel.UrlRole]),
+        ("changed", 1, 1, []),
+        ("removed", 2, 2),
+    ]
+    assert model.count == 2
+
+
+def test_size_change_is_a_content_change():
+    model = PageModel()
+    model.set_pages([page(1, "a")])
+    events = record(model)
+    model.set_pages([page(1, "a", width=842.0, height=595.0)])
+
+    assert events == [("changed", 0, 0, [])]
+    assert model.data(model.index(0), PageModel.WidthRole) == 842.0
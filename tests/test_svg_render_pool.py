@@ -0,0 +1,97 @@
+"""Tests for the tile layout and the workers of the SVG render pool."""
+
+import threading
+import time
+
+from PySide6.QtCore import QRectF, QSizeF
+from PySide6.QtTest import QTest
+
+from app.backend.svg_render_pool import PRIORITY_VISIBLE, RenderTicket, SvgRenderPool, tile_grid, tiles_in
+
+VIEW_BOX = QRectF(0, 0, 612, 792)
+
+
+def test_bucket_is_the_next_one_above_the_scale():
+    assert tile_grid(VIEW_BOX, 612, 1.0) == (0, 1.0, 1.0)
+
+    bucket, bucket_scale, scale = tile_grid(VIEW_BOX, 918, 1.0)
+    assert (bucket, scale) == (3, 1.5)
+    assert 1.5 <= bucket_scale < 1.5 * 2 ** 0.25
+
+    # An exact bucket scale is not rounded up to the next bucket
+    bucket, bucket_scale, _ = tile_grid(VIEW_BOX, 612, 2.0)
+    assert (bucket, bucket_scale) == (4, 2.0)
+    assert tile_grid(VIEW_BOX, 306, 1.0)[0] == -4
+
+
+def test_page_without_size_has_no_grid():
+    assert tile_grid(QRectF(), 612, 1.0) is None
+    assert tile_grid(VIEW_BOX, 0, 1.0) is None
+
+
+def test_tiles_cover_the_viewport_rows_first():
+    page = QSizeF(512, 512)
+    assert tiles_in(page, QRectF(0, 0, 512, 512), 1.0, 0) == [(0, 0), (1, 0), (0, 1), (1, 1)]
+    assert tiles_in(page, QRectF(100, 300, 50, 50), 1.0, 0) == [(0, 1)]
+    # The factor converts page coordinates to bucket pixels
+    assert tiles_in(page, QRectF(100, 300, 50, 50), 2.0, 0) == [(0, 2), (1, 2)]
+
+
+def test_tile_ranges_are_clamped_at_the_page_edges():
+    page = QSizeF(1000, 600)
+    assert tiles_in(page, QRectF(100, 300, 50, 50), 1.0, 1) == [
+        (0, 0), (1, 0), (0, 1), (1, 1), (0, 2), (1, 2),
+    ]
+    # Partial tiles at the right and bottom edges are part of the grid
+    assert tiles_in(page, QRectF(900, 500, 100, 100), 1.0, 5)[-1] == (3, 2)
+    assert len(tiles_in(page, QRectF(0, 0, 1000, 600), 1.0, 5)) == 12
+
+
+def test_edge_facing_the_view_is_prefetched():
+    page = QSizeF(512, 1024)
+    # A page below the view: its top rows
+    assert tiles_in(page, QRectF(0, 0, 512, 0), 1.0, 1) == [(0, 0), (1, 0), (0, 1), (1, 1)]
+    assert tiles_in(page, QRectF(0, 0, 512, 0), 1.0, 0) == [(0, 0), (1, 0)]
+    # A page above the view: its bottom row
+    assert tiles_in(page, QRectF(0, 1024, 512, 0), 1.0, 1) == [(0, 3), (1, 3)]
+
+
+class Item:
+    """Collects the results delivered by the pool."""
+
+    def __init__(self):
+        self.results = []
+
+    def tiles_rendered(self, result):
+        self.results.append(result)
+
+
+def test_parsed_pages_are_dropped_by_their_threads_at_shutdown(qapp, tmp_path):
+    page = tmp_path / "p1-1.svg"
+    page.write_text('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100" width="100pt" height="100pt">'
+                    '<rect width="100" height="100"/></svg>')
+    pool = SvgRenderPool(max_threads=2, max_documents=1)
+    owners = {}
+    parse = pool._parse
+
+    def record_owner(request):
+        renderer = parse(request)
+        owners[request["key"]] = threading.get_ident()
+        return renderer
+
+    pool._parse = record_owner
+    item = Item()
+    for key in ("a", "b", "c"):
+        pool.submit(item, RenderTicket(), key, str(page), "", QSizeF(100, 100), QRectF(0, 0, 100, 100), 1.0, 0,
+                    PRIORITY_VISIBLE)
+    deadline = time.monotonic() + 10
+    while len(item.results) < 3 and time.monotonic() < deadline:
+        QTest.qWait(10)
+    assert all(result["loaded"] for result in item.results)
+    # Every thread keeps one page at most, only its own
+    assert 1 <= pool.stats()["documents"] <= 2
+    assert set(pool._renderers) <= set(owners.values())
+
+    pool.shutdown()
+    assert pool.stats()["documents"] == 0
+    assert pool._renderers == {}
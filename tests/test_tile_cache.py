@@ -0,0 +1,71 @@
+"""Tests for the cache of rasterized preview tiles."""
+
+from PySide6.QtGui import QImage
+
+from app.backend.tile_cache import TileCache
+
+
+def tile(size=16):
+    return QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+
+
+def test_least_recently_used_tiles_are_evicted_by_size():
+    image_bytes = tile().sizeInBytes()
+    cache = TileCache(max_bytes=3 * image_bytes)
+    for column in range(3):
+        cache.put(("a", 0, column, 0), tile())
+    assert cache.get(("a", 0, 0, 0)) is not None
+
+    cache.put(("a", 0, 3, 0), tile())
+    assert not cache.contains(("a", 0, 1, 0))
+    assert all(cache.contains(("a", 0, column, 0)) for column in (0, 2, 3))
+    assert cache.stats()["bytes"] == 3 * image_bytes
+
+    # A large tile evicts as many as needed
+    cache.put(("a", 1, 0, 0), tile(27))
+    assert cache.stats()["tiles"] == 1
+    assert cache.stats()["bytes"] == tile(27).sizeInBytes()
+
+
+def test_replaced_tile_is_counted_once():
+    cache = TileCache()
+    cache.put(("a", 0, 0, 0), tile())
+    cache.put(("a", 0, 0, 0), tile(32))
+    assert cache.stats()["tiles"] == 1
+    assert cache.stats()["bytes"] == tile(32).sizeInBytes()
+
+
+def test_lookups_are_counted():
+    cache = TileCache()
+    cache.put(("a", 0, 0, 0), tile())
+    assert cache.get(("a", 0, 0, 0)) is not None
+    assert cache.get(("a", 0, 0, 1)) is None
+    # contains() does not count as a lookup
+    assert cache.contains(("a", 0, 0, 0))
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_buckets_of_a_revision():
+    cache = TileCache()
+    cache.put(("a", 0, 0, 0), tile())
+    cache.put(("a", 2, 0, 0), tile())
+    cache.put(("b", 1, 0, 0), tile())
+    assert cache.buckets("a") == {0, 2}
+    cache.clear()
+    assert cache.buckets("a") == set()
+    assert cache.stats()["bytes"] == 0
+
+
+def test_buckets_follow_evictions():
+    cache = TileCache(max_bytes=2 * tile().sizeInBytes())
+    cache.put(("a", 0, 0, 0), tile())
+    cache.put(("a", 0, 0, 0), tile())
+    cache.put(("a", 1, 0, 0), tile())
+    assert cache.buckets("a") == {0, 1}
+
+    cache.put(("b", 0, 0, 0), tile())
+    assert cache.buckets("a") == {1}
+    cache.put(("b", 0, 1, 0), tile())
+    assert cache.buckets("a") == set()
+    assert cache.buckets("b") == {0}
@@ -0,0 +1,71 @@
+"""Tests for framing and parsing the Typst compiler output."""
+
+from app.backend.typst_diagnostics import DiagnosticsParser, LineFramer
+
+REPORT = """\
+error: unknown variable: foo
+   ┌─ sections/intro.typ:3:2
+   │
+ 3 │ #foo
+   │  ^^^
+   = hint: if you meant to display multiple letters as is, try adding spaces
+
+"""
+
+
+def parse(lines):
+    parser = DiagnosticsParser()
+    records = [record for record in map(parser.feed, lines) if record is not None]
+    last = parser.finish()
+    return records + ([last] if last is not None else [])
+
+
+def test_framer_joins_lines_split_across_chunks():
+    framer = LineFramer()
+    assert framer.feed(b"compiling ") == []
+    assert framer.feed(b"...\r\ncompiled ") == ["compiling ..."]
+    assert framer.feed(b"in 5ms\n") == ["compiled in 5ms"]
+    assert framer.flush() == []
+
+
+def test_framer_joins_split_utf8_sequences():
+    data = REPORT.encode("utf-8")
+    split = data.index("┌".encode("utf-8")) + 1
+    framer = LineFramer()
+    lines = framer.feed(data[:split]) + framer.feed(data[split:])
+    assert lines == REPORT.split("\n")[:-1]
+
+
+def test_framer_flush_returns_unterminated_line():
+    framer = LineFramer()
+    framer.feed(b"last line\xe2\x94")
+    assert framer.flush() == ["last line�"]
+    assert framer.flush() == []
+
+
+def test_parser_builds_record_from_report():
+    assert parse(REPORT.split("\n")) == [{
+        "severity": "error",
+        "file": "sections/intro.typ",
+        "line": 3,
+        "column": 2,
+        "message": "unknown variable: foo",
+        "hints": ["if you meant to display multiple letters as is, try adding spaces"],
+    }]
+
+
+def test_parser_starts_new_record_on_next_header():
+    records = parse([
+        "warning[unused]: unused variable",
+        "  ╭─ main.typ:1:5",
+        "error: file not found",
+        "   ┌─ main.typ:9:1",
+    ])
+    assert [(r["severity"], r["file"], r["line"], r["column"]) for r in records] == [
+        ("warning", "main.typ", 1, 5),
+        ("error", "main.typ", 9, 1),
+    ]
+
+
+def test_parser_ignores_lines_outside_reports():
+    assert parse(["watching main.typ", "", "compiled successfully"]) == []
@@ -0,0 +1,60 @@
+"""Tests for the pool of warm Typst watch processes."""
+
+from PySide6.QtCore import QProcess
+
+from app.backend.watch_pool import WatchMember, WatchPool
+
+
+def member(name):
+    # A process that was never started is enough for the bookkeeping
+    return WatchMember(f"/{name}", QProcess())
+
+
+def paths(members):
+    return [m.project_path for m in members]
+
+
+def test_add_evicts_least_recently_used(qapp):
+    pool = WatchPool(limit=2)
+    a, b, c = member("a"), member("b"), member("c")
+    assert pool.add(a) == []
+    assert pool.add(b) == []
+    assert pool.get("/a") is a
+
+    assert pool.add(c) == [b]
+    assert paths(pool.members()) == ["/a", "/c"]
+    assert pool.get("/b") is None
+
+
+def test_set_limit_keeps_given_member(qapp):
+    pool = WatchPool(limit=3)
+    a, b, c = member("a"), member("b"), member("c")
+    for m in (a, b, c):
+        pool.add(m)
+
+    evicted = pool.set_limit(1, keep=a)
+    assert evicted == [b, c]
+    assert pool.members() == [a]
+
+    # The limit is at least one
+    assert pool.set_limit(0, keep=a) == []
+    assert pool.limit == 1
+
+
+def test_remove_ignores_replaced_member(qapp):
+    pool = WatchPool()
+    old, new = member("a"), member("a")
+    pool.add(old)
+    pool.add(new)
+    pool.remove(old)
+    assert pool.members() == [new]
+    pool.remove(new)
+    assert pool.members() == []
+
+
+def test_idle_member_cannot_be_paused(qapp):
+    m = member("a")
+    assert not m.is_running()
+    m.pause()
+    assert not m.paused
+    m.stop(wait=True)